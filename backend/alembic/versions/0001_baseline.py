@@ -0,0 +1,191 @@
+"""baseline schema
+
+Bảng gốc của ứng dụng (trước khi có migration). CSDL đã được tạo bằng
+create_all thì đánh dấu bằng `alembic stamp 0001_baseline` rồi upgrade.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+room_status = sa.Enum("VACANT", "OCCUPIED", name="roomstatus")
+meter_type = sa.Enum("ELECTRIC", "WATER", name="metertype")
+invoice_status = sa.Enum("UNPAID", "PARTIAL", "PAID", name="invoicestatus")
+expense_category = sa.Enum("REPAIR", "UTILITY", "MAINTENANCE", "OTHER", name="expensecategory")
+
+
+def timestamps():
+    return [
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(100), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        *timestamps(),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("address", sa.String(255)),
+        sa.Column("owner_name", sa.String(100)),
+        sa.Column("owner_phone", sa.String(50)),
+        sa.Column("electric_price", sa.Numeric(10, 2)),
+        sa.Column("water_price", sa.Numeric(10, 0)),
+        sa.Column("garbage_fee", sa.Numeric(10, 0)),
+        sa.Column("wifi_fee", sa.Numeric(10, 0)),
+        sa.Column("tv_fee", sa.Numeric(10, 0)),
+        sa.Column("laundry_fee", sa.Numeric(10, 0)),
+        sa.Column("payment_due_day", sa.Integer()),
+        sa.Column("notes", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_locations_id", "locations", ["id"])
+
+    op.create_table(
+        "room_types",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("code", sa.String(10), nullable=False),
+        sa.Column("name", sa.String(50)),
+        sa.Column("price", sa.Numeric(12, 0), nullable=False),
+        sa.Column("daily_deduction", sa.Numeric(10, 0)),
+        sa.Column("description", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_room_types_id", "room_types", ["id"])
+
+    op.create_table(
+        "rooms",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("room_type_id", sa.Integer(), sa.ForeignKey("room_types.id")),
+        sa.Column("room_code", sa.String(20), nullable=False),
+        sa.Column("price", sa.Numeric(10, 0)),
+        sa.Column("status", room_status),
+        sa.Column("notes", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_rooms_id", "rooms", ["id"])
+
+    op.create_table(
+        "tenants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False),
+        sa.Column("full_name", sa.String(100), nullable=False),
+        sa.Column("phone", sa.String(20)),
+        sa.Column("id_card", sa.String(20)),
+        sa.Column("move_in_date", sa.Date(), nullable=False),
+        sa.Column("move_out_date", sa.Date()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("notes", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_tenants_id", "tenants", ["id"])
+
+    op.create_table(
+        "meters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False),
+        sa.Column("meter_type", meter_type, nullable=False),
+        sa.Column("meter_code", sa.String(50)),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_meters_id", "meters", ["id"])
+
+    op.create_table(
+        "meter_readings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("meter_id", sa.Integer(), sa.ForeignKey("meters.id"), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("old_reading", sa.Numeric(10, 2), nullable=False),
+        sa.Column("new_reading", sa.Numeric(10, 2), nullable=False),
+        sa.Column("consumption", sa.Numeric(10, 2)),
+        *timestamps(),
+    )
+    op.create_index("ix_meter_readings_id", "meter_readings", ["id"])
+
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("room_fee", sa.Numeric(12, 0), nullable=False),
+        sa.Column("absent_days", sa.Integer()),
+        sa.Column("absent_deduction", sa.Numeric(12, 0)),
+        sa.Column("electric_fee", sa.Numeric(12, 0)),
+        sa.Column("water_fee", sa.Numeric(12, 0)),
+        sa.Column("garbage_fee", sa.Numeric(12, 0)),
+        sa.Column("wifi_fee", sa.Numeric(12, 0)),
+        sa.Column("tv_fee", sa.Numeric(12, 0)),
+        sa.Column("laundry_fee", sa.Numeric(12, 0)),
+        sa.Column("other_fee", sa.Numeric(12, 0)),
+        sa.Column("other_fee_note", sa.String(255)),
+        sa.Column("previous_debt", sa.Numeric(12, 0)),
+        sa.Column("previous_credit", sa.Numeric(12, 0)),
+        sa.Column("total", sa.Numeric(12, 0), nullable=False),
+        sa.Column("paid_amount", sa.Numeric(12, 0)),
+        sa.Column("remaining_debt", sa.Numeric(12, 0)),
+        sa.Column("remaining_credit", sa.Numeric(12, 0)),
+        sa.Column("status", invoice_status),
+        sa.Column("payment_date", sa.Date()),
+        sa.Column("notes", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_invoices_id", "invoices", ["id"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=False),
+        sa.Column("amount", sa.Numeric(12, 0), nullable=False),
+        sa.Column("payment_date", sa.Date(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+
+    op.create_table(
+        "expenses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id")),
+        sa.Column("category", expense_category),
+        sa.Column("description", sa.String(255), nullable=False),
+        sa.Column("amount", sa.Numeric(12, 0), nullable=False),
+        sa.Column("expense_date", sa.Date(), nullable=False),
+        sa.Column("notes", sa.Text()),
+        *timestamps(),
+    )
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "expenses", "payments", "invoices", "meter_readings", "meters",
+        "tenants", "rooms", "room_types", "locations", "users",
+    ):
+        op.drop_table(table)
+    bind = op.get_bind()
+    for enum in (expense_category, invoice_status, meter_type, room_status):
+        enum.drop(bind, checkfirst=True)
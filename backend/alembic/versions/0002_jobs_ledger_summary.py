@@ -0,0 +1,127 @@
+"""jobs, room balance ledger, monthly summary, reading/expense indexes
+
+Các bảng này có thể đã được create_all tạo trước khi có migration, nên
+mỗi bước chỉ chạy khi bảng/chỉ mục chưa tồn tại. Chỉ số trùng
+meter_readings(meter_id, year, month) phải được xử lý tay trước khi nâng cấp.
+
+Revision ID: 0002_jobs_ledger_summary
+Revises: 0001_baseline
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_jobs_ledger_summary"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+job_status = sa.Enum("PENDING", "RUNNING", "SUCCEEDED", "FAILED", name="jobstatus")
+
+READING_KEY = ["meter_id", "year", "month"]
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _has_table(name: str) -> bool:
+    return _inspector().has_table(name)
+
+
+def _has_index(table: str, name: str) -> bool:
+    inspector = _inspector()
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    names |= {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+    return name in names
+
+
+def _check_duplicate_readings() -> None:
+    """Dừng với thông báo rõ ràng thay vì lỗi ràng buộc khó đọc"""
+    column_list = ", ".join(READING_KEY)
+    count = op.get_bind().execute(sa.text(
+        f"SELECT COUNT(*) FROM (SELECT {column_list} FROM meter_readings "
+        f"GROUP BY {column_list} HAVING COUNT(*) > 1) AS duplicates"
+    )).scalar()
+    if count:
+        raise RuntimeError(
+            f"Remove duplicate rows before upgrading: meter_readings({column_list}): {count} duplicated keys"
+        )
+
+
+def upgrade() -> None:
+    if not _has_table("jobs"):
+        op.create_table(
+            "jobs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("job_type", sa.String(50), nullable=False),
+            sa.Column("status", job_status),
+            sa.Column("params", sa.JSON()),
+            sa.Column("result", sa.JSON()),
+            sa.Column("error", sa.Text()),
+            sa.Column("progress_done", sa.Integer()),
+            sa.Column("progress_total", sa.Integer()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("started_at", sa.DateTime(timezone=True)),
+            sa.Column("finished_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_jobs_id", "jobs", ["id"])
+        op.create_index("ix_jobs_status", "jobs", ["status"])
+
+    if not _has_table("room_balances"):
+        op.create_table(
+            "room_balances",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("room_id", sa.Integer(), sa.ForeignKey("rooms.id"), nullable=False),
+            sa.Column("month", sa.Integer(), nullable=False),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("opening_balance", sa.Numeric(12, 0), nullable=False),
+            sa.Column("charges", sa.Numeric(12, 0), nullable=False),
+            sa.Column("payments", sa.Numeric(12, 0), nullable=False),
+            sa.Column("closing_balance", sa.Numeric(12, 0), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+            sa.UniqueConstraint("room_id", "year", "month", name="uq_room_balances_room_period"),
+        )
+        op.create_index("ix_room_balances_id", "room_balances", ["id"])
+
+    if not _has_table("monthly_summary"):
+        op.create_table(
+            "monthly_summary",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id")),
+            sa.Column("month", sa.Integer(), nullable=False),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("invoice_count", sa.Integer(), nullable=False),
+            sa.Column("total_income", sa.Numeric(14, 0), nullable=False),
+            sa.Column("total_collected", sa.Numeric(14, 0), nullable=False),
+            sa.Column("total_pending", sa.Numeric(14, 0), nullable=False),
+            sa.Column("total_expense", sa.Numeric(14, 0), nullable=False),
+            sa.Column("room_count", sa.Integer(), nullable=False),
+            sa.Column("occupied_rooms", sa.Integer(), nullable=False),
+            sa.Column("active_tenants", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("location_id", "year", "month", name="uq_monthly_summary_location_period"),
+        )
+        op.create_index("ix_monthly_summary_id", "monthly_summary", ["id"])
+
+    if not _has_index("meter_readings", "uq_meter_readings_meter_period"):
+        _check_duplicate_readings()
+        with op.batch_alter_table("meter_readings") as batch:
+            batch.create_unique_constraint("uq_meter_readings_meter_period", READING_KEY)
+
+    if not _has_index("expenses", "ix_expenses_location_date"):
+        op.create_index("ix_expenses_location_date", "expenses", ["location_id", "expense_date"])
+    if not _has_index("expenses", "ix_expenses_expense_date"):
+        op.create_index("ix_expenses_expense_date", "expenses", ["expense_date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_expenses_expense_date", "expenses")
+    op.drop_index("ix_expenses_location_date", "expenses")
+    with op.batch_alter_table("meter_readings") as batch:
+        batch.drop_constraint("uq_meter_readings_meter_period", type_="unique")
+    op.drop_table("monthly_summary")
+    op.drop_table("room_balances")
+    op.drop_table("jobs")
+    job_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,68 @@
+"""unique keys and lookup indexes
+
+Ràng buộc duy nhất thay cho kiểm tra "đã tồn tại chưa" trước khi ghi:
+invoices(room_id, year, month), meters(room_id, meter_type),
+rooms(location_id, room_code); chỉ mục tenants(room_id, is_active) và
+rooms(status). Dữ liệu trùng phải được xử lý tay trước khi nâng cấp.
+
+Revision ID: 0003_unique_keys_and_indexes
+Revises: 0002_jobs_ledger_summary
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_unique_keys_and_indexes"
+down_revision = "0002_jobs_ledger_summary"
+branch_labels = None
+depends_on = None
+
+UNIQUE_KEYS = [
+    ("invoices", "uq_invoices_room_period", ["room_id", "year", "month"]),
+    ("meters", "uq_meters_room_type", ["room_id", "meter_type"]),
+    ("rooms", "uq_rooms_location_code", ["location_id", "room_code"]),
+]
+
+
+def _has_index(table: str, name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    names = {index["name"] for index in inspector.get_indexes(table)}
+    names |= {constraint["name"] for constraint in inspector.get_unique_constraints(table)}
+    return name in names
+
+
+def _check_duplicates() -> None:
+    """Dừng với thông báo rõ ràng thay vì lỗi ràng buộc khó đọc"""
+    bind = op.get_bind()
+    problems = []
+    for table, _, columns in UNIQUE_KEYS:
+        column_list = ", ".join(columns)
+        count = bind.execute(sa.text(
+            f"SELECT COUNT(*) FROM (SELECT {column_list} FROM {table} "
+            f"GROUP BY {column_list} HAVING COUNT(*) > 1) AS duplicates"
+        )).scalar()
+        if count:
+            problems.append(f"{table}({column_list}): {count} duplicated keys")
+    if problems:
+        raise RuntimeError("Remove duplicate rows before upgrading: " + "; ".join(problems))
+
+
+def upgrade() -> None:
+    _check_duplicates()
+    # Skip keys that create_all already made on databases created from the models
+    for table, name, columns in UNIQUE_KEYS:
+        if not _has_index(table, name):
+            with op.batch_alter_table(table) as batch:
+                batch.create_unique_constraint(name, columns)
+    if not _has_index("tenants", "ix_tenants_room_active"):
+        op.create_index("ix_tenants_room_active", "tenants", ["room_id", "is_active"])
+    if not _has_index("rooms", "ix_rooms_status"):
+        op.create_index("ix_rooms_status", "rooms", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rooms_status", "rooms")
+    op.drop_index("ix_tenants_room_active", "tenants")
+    for table, name, _ in reversed(UNIQUE_KEYS):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_constraint(name, type_="unique")
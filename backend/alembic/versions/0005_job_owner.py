@@ -0,0 +1,31 @@
+"""job owner and heartbeat
+
+jobs.worker_id (tiến trình giữ tác vụ) và jobs.heartbeat_at để chỉ các tác vụ
+mà tiến trình giữ đã dừng mới bị đánh dấu lỗi khi có nhiều worker.
+
+Revision ID: 0005_job_owner
+Revises: 0004_refresh_tokens
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_job_owner"
+down_revision = "0004_refresh_tokens"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("jobs")}
+    with op.batch_alter_table("jobs") as batch:
+        if "worker_id" not in columns:
+            batch.add_column(sa.Column("worker_id", sa.String(64)))
+        if "heartbeat_at" not in columns:
+            batch.add_column(sa.Column("heartbeat_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_column("heartbeat_at")
+        batch.drop_column("worker_id")
@@ -0,0 +1,38 @@
+"""backfill room balances
+
+0002 tạo room_balances rỗng; hóa đơn có từ trước chưa có dòng sổ công nợ nên
+lần tạo hóa đơn tiếp theo không thấy nợ/thừa chuyển kỳ. Bước này ghi dòng còn
+thiếu cho mọi hóa đơn theo đúng cách rebuild_balances tính (đầu kỳ = nợ cũ -
+thừa cũ, cuối kỳ = tổng - đã thu). Dòng đã có được giữ nguyên nên chạy lại an toàn.
+
+Revision ID: 0006_backfill_room_balances
+Revises: 0005_job_owner
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_backfill_room_balances"
+down_revision = "0005_job_owner"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(
+        "INSERT INTO room_balances "
+        "(room_id, month, year, opening_balance, charges, payments, closing_balance) "
+        "SELECT i.room_id, i.month, i.year, "
+        "COALESCE(i.previous_debt, 0) - COALESCE(i.previous_credit, 0), "
+        "i.total - COALESCE(i.previous_debt, 0) + COALESCE(i.previous_credit, 0), "
+        "COALESCE(i.paid_amount, 0), "
+        "i.total - COALESCE(i.paid_amount, 0) "
+        "FROM invoices i "
+        "WHERE NOT EXISTS (SELECT 1 FROM room_balances b "
+        "WHERE b.room_id = i.room_id AND b.year = i.year AND b.month = i.month)"
+    ))
+
+
+def downgrade() -> None:
+    # Data only: the rows stay valid ledger entries
+    pass
@@ -1,23 +1,63 @@
 """
 Authentication API
 """
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.denylist import token_denylist
+from app.core.security import PasswordHasherBusy, decode_refresh_token, password_hasher
 from app.models.user import User
-from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
+from app.schemas.user import RefreshRequest, UserCreate, UserLogin, UserResponse, Token
+from app.services.auth_tokens import issue_tokens, revoke_session, rotate_refresh_token
+from app.core.user_cache import CurrentUser
 from app.api.deps import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["Xác thực"])
 
 
+async def _hashing(awaitable):
+    """Chờ kết quả băm mật khẩu; hàng đợi đầy thì trả 503 để client thử lại"""
+    try:
+        return await awaitable
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hệ thống đang bận xử lý đăng nhập, vui lòng thử lại sau",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _find_user(db: Session, email: str) -> Optional[User]:
+    return db.query(User).filter(User.email == email).first()
+
+
+def _token_response(user: User, access_token: str, refresh_token: str) -> Token:
+    return Token(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        user=UserResponse.model_validate(user)
+    )
+
+
 @router.post("/login", response_model=Token)
-def login(user_login: UserLogin, db: Session = Depends(get_db)):
-    """Đăng nhập"""
-    user = db.query(User).filter(User.email == user_login.email).first()
+async def login(user_login: UserLogin, db: Session = Depends(get_db)):
+    """Đăng nhập
+
+    Truy vấn CSDL chạy trên threadpool, bcrypt chạy trên pool băm riêng nên
+    request không giữ luồng nào trong lúc băm.
+    """
+    user = await run_in_threadpool(_find_user, db, user_login.email)
     
-    if not user or not verify_password(user_login.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await _hashing(
+            password_hasher.verify_and_update(user_login.password, user.hashed_password)
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email hoặc mật khẩu không đúng",
@@ -29,19 +69,52 @@ def login(user_login: UserLogin, db: Session = Depends(get_db)):
             detail="Tài khoản đã bị khóa",
         )
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    def start_session():
+        # Cost changed since this hash was made: store the rehashed password
+        if new_hash:
+            user.hashed_password = new_hash
+        access_token, refresh_token = issue_tokens(db, user)
+        token = _token_response(user, access_token, refresh_token)
+        db.commit()
+        return token
     
-    return Token(
-        access_token=access_token,
-        user=UserResponse.model_validate(user)
-    )
+    return await run_in_threadpool(start_session)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Đổi refresh token lấy access token mới (refresh token cũ hết hiệu lực)"""
+    claims = decode_refresh_token(request.refresh_token)
+    rotated = rotate_refresh_token(db, claims) if claims else None
+    if rotated is None:
+        # Commit any session revocation triggered by token reuse
+        db.commit()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token không hợp lệ hoặc đã hết hạn",
+        )
+    
+    user, access_token, refresh_token = rotated
+    token = _token_response(user, access_token, refresh_token)
+    db.commit()
+    return token
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Đăng xuất: thu hồi phiên của refresh token, access token của phiên bị chặn ngay"""
+    claims = decode_refresh_token(request.refresh_token)
+    if claims and claims.get("sid"):
+        revoke_session(db, claims["sid"])
+        db.commit()
+        token_denylist.deny_session(claims["sid"])
 
 
 @router.post("/register", response_model=UserResponse)
-def register(user_create: UserCreate, db: Session = Depends(get_db)):
+async def register(user_create: UserCreate, db: Session = Depends(get_db)):
     """Đăng ký tài khoản mới (chỉ dùng cho setup ban đầu)"""
     # Check if user exists
-    existing = db.query(User).filter(User.email == user_create.email).first()
+    existing = await run_in_threadpool(_find_user, db, user_create.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -50,18 +123,21 @@ def register(user_create: UserCreate, db: Session = Depends(get_db)):
     
     user = User(
         email=user_create.email,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=await _hashing(password_hasher.hash(user_create.password)),
         full_name=user_create.full_name,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
     
-    return user
+    def save():
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return UserResponse.model_validate(user)
+    
+    return await run_in_threadpool(save)
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: CurrentUser = Depends(get_current_user)):
     """Lấy thông tin người dùng hiện tại"""
     return current_user
 
@@ -0,0 +1,90 @@
+"""
+Conditional GET - ETag theo mốc thay đổi (updated_at) của các bảng nguồn
+
+Mỗi API đọc khai báo các bảng mà kết quả phụ thuộc vào. ETag được tính từ một
+truy vấn duy nhất: với mỗi bảng lấy count(*) và max(coalesce(updated_at,
+created_at)), ghép với đường dẫn và query string. Nếu khớp If-None-Match thì
+trả 304 ngay, không tải danh sách. count(*) bắt được cả dòng bị xóa, điều
+max() không thấy.
+
+ETag là weak (W/"...") vì cùng nội dung có thể được gửi nén hoặc không, và
+vì mốc thời gian là now() của giao dịch: một giao dịch dài chỉ sửa dòng (không
+thêm/xóa) có thể commit với mốc nhỏ hơn mốc đã thấy. Phản hồi kèm
+Cache-Control: private, no-cache để trình duyệt luôn hỏi lại bằng If-None-Match.
+"""
+import hashlib
+from datetime import date
+from typing import Any, Sequence
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.async_database import get_async_db
+from app.core.database import get_db
+from app.api.deps import require_auth
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def watermark_statement(models: Sequence[Any]):
+    """Một câu SELECT trả về (count, mốc thay đổi mới nhất) của từng bảng"""
+    columns = []
+    for model in models:
+        changed = func.coalesce(model.updated_at, model.created_at) if hasattr(model, "created_at") else model.updated_at
+        columns.append(select(func.count()).select_from(model).scalar_subquery())
+        columns.append(select(func.max(changed)).scalar_subquery())
+    return select(*columns)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """So sánh weak theo RFC 9110 (bỏ tiền tố W/), hỗ trợ danh sách và *"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+class ConditionalGet:
+    """Dependency: gắn ETag vào phản hồi, trả 304 khi client đã có bản hiện tại
+
+    daily=True khi kết quả còn phụ thuộc ngày hiện tại (vd. thống kê tháng này).
+    """
+
+    def __init__(self, *models: Any, daily: bool = False):
+        self.statement = watermark_statement(models)
+        self.daily = daily
+
+    def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        _: None = Depends(require_auth),
+    ) -> None:
+        self.check(request, response, db.execute(self.statement).one())
+
+    def etag(self, request: Request, watermark: Sequence[Any]) -> str:
+        parts = [request.url.path, str(sorted(request.query_params.multi_items())), repr(tuple(watermark))]
+        if self.daily:
+            parts.append(date.today().isoformat())
+        return 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+    def check(self, request: Request, response: Response, watermark: Sequence[Any]) -> None:
+        etag = self.etag(request, watermark)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+
+class AsyncConditionalGet(ConditionalGet):
+    """Như ConditionalGet, cho các API chạy trên AsyncSession"""
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_db),
+        _: None = Depends(require_auth),
+    ) -> None:
+        self.check(request, response, (await db.execute(self.statement)).one())
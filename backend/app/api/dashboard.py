@@ -1,111 +1,142 @@
 """
 Dashboard API - Thống kê tổng quan
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, extract
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
 from typing import Optional
 from decimal import Decimal
 from datetime import datetime
+from app.core.async_database import get_async_db
 from app.core.database import get_db
 from app.models.room import Room, RoomStatus
 from app.models.tenant import Tenant
 from app.models.invoice import Invoice, InvoiceStatus
-from app.models.expense import Expense
 from app.models.location import Location
-from app.schemas.dashboard import DashboardStats, MonthlyReport, UnpaidInvoice
-from app.api.deps import get_current_user
+from app.models.monthly_summary import MonthlySummary
+from app.models.expense import Expense
+from app.schemas.dashboard import DashboardStats, LocationSummary, MonthlyReport, RangeReport, UnpaidInvoice
+from app.services.reports import period_list, range_report
+from app.api.conditional import AsyncConditionalGet, ConditionalGet
+from app.api.deps import require_auth
 
 router = APIRouter(prefix="/dashboard", tags=["Tổng quan"])
+# Bản async của các API đọc, chỉ được gắn khi DB_ASYNC bật (xem app.main)
+async_router = APIRouter(prefix="/dashboard", tags=["Tổng quan"], include_in_schema=False)
 
+MAX_REPORT_MONTHS = 60  # Số tháng tối đa của báo cáo xu hướng
 
-@router.get("/stats", response_model=DashboardStats)
-def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
-):
-    """Lấy thống kê tổng quan"""
-    now = datetime.now()
-    current_month = now.month
-    current_year = now.year
-    
-    # Room stats
-    total_rooms = db.query(Room).count()
-    occupied_rooms = db.query(Room).filter(Room.status == RoomStatus.OCCUPIED).count()
-    vacant_rooms = total_rooms - occupied_rooms
-    
-    # Tenant stats
-    total_tenants = db.query(Tenant).filter(Tenant.is_active == True).count()
-    
-    # Invoice stats for current month
-    invoices_this_month = db.query(Invoice).filter(
-        Invoice.month == current_month,
-        Invoice.year == current_year
-    ).all()
-    
-    total_income = sum(inv.total for inv in invoices_this_month) or Decimal("0")
-    total_paid = sum(inv.paid_amount for inv in invoices_this_month) or Decimal("0")
-    total_unpaid = total_income - total_paid
-    
-    # Expense stats for current month
-    total_expense = db.query(func.sum(Expense.amount)).filter(
-        extract('month', Expense.expense_date) == current_month,
-        extract('year', Expense.expense_date) == current_year
-    ).scalar() or Decimal("0")
+# Mọi bảng mà các báo cáo đọc tới; thống kê "tháng này" còn đổi theo ngày
+DASHBOARD_TABLES = (Room, Tenant, Location, Invoice, Expense, MonthlySummary)
+DASHBOARD_ETAG = ConditionalGet(*DASHBOARD_TABLES, daily=True)
+DASHBOARD_ETAG_ASYNC = AsyncConditionalGet(*DASHBOARD_TABLES, daily=True)
+
+
+def _summary_statement(month: int, year: int):
+    """Dòng tổng hợp của tháng, một dòng mỗi khu (kèm tên khu)"""
+    return select(MonthlySummary, Location.name).outerjoin(
+        Location, Location.id == MonthlySummary.location_id
+    ).where(
+        MonthlySummary.month == month,
+        MonthlySummary.year == year
+    ).order_by(Location.name)
+
+
+def _summary_rows(db: Session, month: int, year: int):
+    return db.execute(_summary_statement(month, year)).all()
+
+
+def _sum(rows, field: str) -> Decimal:
+    return sum((getattr(summary, field) for summary, _ in rows), Decimal("0"))
+
+
+# Room and tenant counts in one round-trip each
+ROOM_COUNTS = select(
+    func.count(Room.id),
+    func.count(case((Room.status == RoomStatus.OCCUPIED, Room.id))),
+)
+ACTIVE_TENANTS = select(func.count(Tenant.id)).where(Tenant.is_active == True)
+
+
+def _dashboard_stats(room_counts, total_tenants: int, summaries) -> DashboardStats:
+    total_rooms, occupied_rooms = room_counts
+    total_income = _sum(summaries, "total_income")
+    total_paid = _sum(summaries, "total_collected")
     
     return DashboardStats(
         total_rooms=total_rooms,
         occupied_rooms=occupied_rooms,
-        vacant_rooms=vacant_rooms,
+        vacant_rooms=total_rooms - occupied_rooms,
         total_tenants=total_tenants,
         total_income_this_month=total_income,
         total_paid_this_month=total_paid,
-        total_unpaid_this_month=total_unpaid,
-        total_expense_this_month=total_expense
+        total_unpaid_this_month=total_income - total_paid,
+        total_expense_this_month=_sum(summaries, "total_expense")
+    )
+
+
+@router.get("/stats", response_model=DashboardStats, dependencies=[Depends(DASHBOARD_ETAG)])
+def get_dashboard_stats(
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy thống kê tổng quan"""
+    now = datetime.now()
+    
+    # Money figures for current month come from the monthly summary
+    return _dashboard_stats(
+        db.execute(ROOM_COUNTS).one(),
+        db.execute(ACTIVE_TENANTS).scalar(),
+        _summary_rows(db, now.month, now.year),
     )
 
 
-@router.get("/report", response_model=MonthlyReport)
+@async_router.get("/stats", response_model=DashboardStats, dependencies=[Depends(DASHBOARD_ETAG_ASYNC)])
+async def get_dashboard_stats_async(
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy thống kê tổng quan (AsyncSession)"""
+    now = datetime.now()
+    
+    room_counts = (await db.execute(ROOM_COUNTS)).one()
+    total_tenants = (await db.execute(ACTIVE_TENANTS)).scalar()
+    summaries = (await db.execute(_summary_statement(now.month, now.year))).all()
+    return _dashboard_stats(room_counts, total_tenants, summaries)
+
+
+@router.get("/report", response_model=MonthlyReport, dependencies=[Depends(DASHBOARD_ETAG)])
 def get_monthly_report(
     month: int = Query(..., description="Tháng"),
     year: int = Query(..., description="Năm"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy báo cáo tháng"""
-    # Get all invoices for the month
-    invoices = db.query(Invoice).options(
-        joinedload(Invoice.room).joinedload(Room.location)
-    ).filter(
-        Invoice.month == month,
-        Invoice.year == year
-    ).all()
-    
-    total_income = sum(inv.total for inv in invoices) or Decimal("0")
-    total_collected = sum(inv.paid_amount for inv in invoices) or Decimal("0")
+    summaries = _summary_rows(db, month, year)
+    total_income = _sum(summaries, "total_income")
+    total_collected = _sum(summaries, "total_collected")
     total_pending = total_income - total_collected
-    
-    # Get expenses for the month
-    total_expense = db.query(func.sum(Expense.amount)).filter(
-        extract('month', Expense.expense_date) == month,
-        extract('year', Expense.expense_date) == year
-    ).scalar() or Decimal("0")
+    total_expense = _sum(summaries, "total_expense")
     
     net_income = total_collected - total_expense
     
-    # Get unpaid invoices
-    unpaid_invoices = []
-    for inv in invoices:
-        if inv.status != InvoiceStatus.PAID:
-            remaining = inv.total - inv.paid_amount
-            unpaid_invoices.append(UnpaidInvoice(
-                id=inv.id,
-                room_code=inv.room.room_code,
-                location_name=inv.room.location.name,
-                total=inv.total,
-                paid_amount=inv.paid_amount,
-                remaining=remaining
-            ))
+    # Get unpaid invoices (only the columns the report shows)
+    unpaid_rows = db.query(
+        Invoice.id,
+        Room.room_code,
+        Location.name.label("location_name"),
+        Invoice.total,
+        Invoice.paid_amount,
+        (Invoice.total - Invoice.paid_amount).label("remaining"),
+    ).join(Room, Room.id == Invoice.room_id).join(Location, Location.id == Room.location_id).filter(
+        Invoice.month == month,
+        Invoice.year == year,
+        Invoice.status != InvoiceStatus.PAID
+    ).order_by(Location.name, Room.room_code)
+    
+    unpaid_invoices = [UnpaidInvoice(**row._asdict()) for row in unpaid_rows]
     
     return MonthlyReport(
         month=month,
@@ -115,6 +146,31 @@ def get_monthly_report(
         total_pending=total_pending,
         total_expense=total_expense,
         net_income=net_income,
-        unpaid_invoices=unpaid_invoices
+        unpaid_invoices=unpaid_invoices,
+        locations=[
+            LocationSummary.model_validate(summary).model_copy(update={"location_name": name})
+            for summary, name in summaries
+        ]
     )
 
+
+
+@router.get("/range", response_model=RangeReport, dependencies=[Depends(DASHBOARD_ETAG)])
+def get_range_report(
+    from_month: int = Query(..., ge=1, le=12, description="Từ tháng"),
+    from_year: int = Query(..., ge=2000, le=2100, description="Từ năm"),
+    to_month: int = Query(..., ge=1, le=12, description="Đến tháng"),
+    to_year: int = Query(..., ge=2000, le=2100, description="Đến năm"),
+    location_id: Optional[int] = Query(None, description="Khu trọ"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Báo cáo xu hướng nhiều tháng (thu, tỷ lệ thu, chi theo loại, doanh thu từng phòng)"""
+    months = len(period_list((from_month, from_year), (to_month, to_year)))
+    if months == 0 or months > MAX_REPORT_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Khoảng tháng không hợp lệ (tối đa {MAX_REPORT_MONTHS} tháng)",
+        )
+    
+    return range_report(db, (from_month, from_year), (to_month, to_year), location_id)
@@ -5,19 +5,17 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.denylist import token_denylist
 from app.core.security import decode_access_token
+from app.core.user_cache import CurrentUser, user_cache
 from app.models.user import User
 
 security = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+def _verify_access_token(credentials: HTTPAuthorizationCredentials) -> dict:
+    """Claims của access token: chữ ký, hạn và denylist, không chạm CSDL"""
+    payload = decode_access_token(credentials.credentials)
     
     if payload is None:
         raise HTTPException(
@@ -26,14 +24,40 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user_id = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token không hợp lệ",
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    if token_denylist.is_denied(payload):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Phiên đăng nhập đã bị thu hồi",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+async def require_auth(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Yêu cầu access token hợp lệ (chạy trên event loop, không cần luồng hay CSDL)"""
+    return _verify_access_token(credentials)
+
+
+def get_current_user(
+    claims: dict = Depends(require_auth),
+    db: Session = Depends(get_db)
+) -> CurrentUser:
+    """Get current authenticated user (từ cache, chỉ đọc CSDL khi hết hạn)
+
+    Chỉ dùng cho API cần thông tin người dùng; các API khác dùng require_auth.
+    """
+    user_id = int(claims["sub"])
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -46,5 +70,6 @@ def get_current_user(
             detail="Tài khoản đã bị khóa",
         )
     
-    return user
-
+    current = CurrentUser.from_user(user)
+    user_cache.put(current)
+    return current
@@ -1,26 +1,31 @@
 """
 Expense API - Quản lý chi tiêu
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy import extract, func
 from typing import List, Optional
 from datetime import date
 from app.core.database import get_db
 from app.models.expense import Expense, ExpenseCategory
-from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
-from app.api.deps import get_current_user
+from app.schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse, ExpenseMonthTotal
+from app.services.monthly_summary import expense_key, month_range, refresh_summaries
+from app.api.deps import require_auth
+from app.api.pagination import PageParams, paginate
 
 router = APIRouter(prefix="/expenses", tags=["Chi tiêu"])
 
 
 @router.get("", response_model=List[ExpenseResponse])
 def get_expenses(
+    response: Response,
     location_id: Optional[int] = Query(None, description="Lọc theo khu"),
     category: Optional[ExpenseCategory] = Query(None, description="Lọc theo loại"),
     month: Optional[int] = Query(None, description="Tháng"),
     year: Optional[int] = Query(None, description="Năm"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách chi tiêu"""
     query = db.query(Expense)
@@ -29,29 +34,79 @@ def get_expenses(
         query = query.filter(Expense.location_id == location_id)
     if category:
         query = query.filter(Expense.category == category)
+    # Half-open date ranges so the expense_date indexes can be used
     if month and year:
-        from sqlalchemy import extract
-        query = query.filter(
-            extract('month', Expense.expense_date) == month,
-            extract('year', Expense.expense_date) == year
-        )
+        start, end = month_range(month, year)
+        query = query.filter(Expense.expense_date >= start, Expense.expense_date < end)
     elif year:
-        from sqlalchemy import extract
-        query = query.filter(extract('year', Expense.expense_date) == year)
+        query = query.filter(Expense.expense_date >= date(year, 1, 1), Expense.expense_date < date(year + 1, 1, 1))
+    
+    return paginate(
+        query, Expense, ExpenseResponse,
+        sort_keys=[(Expense.expense_date, True), (Expense.id, True)],
+        page=page,
+        response=response,
+    )
+
+
+@router.get("/summary", response_model=List[ExpenseMonthTotal])
+def get_expense_summary(
+    date_from: date = Query(..., description="Từ ngày (tính cả ngày này)"),
+    date_to: date = Query(..., description="Đến ngày (không tính ngày này)"),
+    location_id: Optional[int] = Query(None, description="Lọc theo khu"),
+    category: Optional[ExpenseCategory] = Query(None, description="Lọc theo loại"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Tổng chi theo tháng và loại trong khoảng ngày [date_from, date_to)"""
+    if date_to <= date_from:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ngày kết thúc phải sau ngày bắt đầu",
+        )
+    
+    expense_year = extract('year', Expense.expense_date)
+    expense_month = extract('month', Expense.expense_date)
+    query = db.query(
+        expense_year,
+        expense_month,
+        Expense.category,
+        func.count(Expense.id),
+        func.sum(Expense.amount),
+    ).filter(
+        Expense.expense_date >= date_from,
+        Expense.expense_date < date_to
+    )
+    if location_id:
+        query = query.filter(Expense.location_id == location_id)
+    if category:
+        query = query.filter(Expense.category == category)
     
-    expenses = query.order_by(Expense.expense_date.desc()).all()
-    return expenses
+    rows = query.group_by(expense_year, expense_month, Expense.category).order_by(
+        expense_year, expense_month, Expense.category
+    )
+    return [
+        ExpenseMonthTotal(
+            year=int(year),
+            month=int(month),
+            category=row_category or ExpenseCategory.OTHER,
+            count=count,
+            total=total or 0,
+        )
+        for year, month, row_category, count, total in rows
+    ]
 
 
 @router.post("", response_model=ExpenseResponse, status_code=status.HTTP_201_CREATED)
 def create_expense(
     expense_in: ExpenseCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm khoản chi"""
     expense = Expense(**expense_in.model_dump())
     db.add(expense)
+    refresh_summaries(db, [expense_key(expense)])
     db.commit()
     db.refresh(expense)
     
@@ -62,7 +117,7 @@ def create_expense(
 def get_expense(
     expense_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết khoản chi"""
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
@@ -81,7 +136,7 @@ def update_expense(
     expense_id: int,
     expense_in: ExpenseUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật khoản chi"""
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
@@ -91,10 +146,12 @@ def update_expense(
             detail="Không tìm thấy khoản chi",
         )
     
+    old_key = expense_key(expense)
     update_data = expense_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(expense, field, value)
     
+    refresh_summaries(db, {old_key, expense_key(expense)})
     db.commit()
     db.refresh(expense)
     
@@ -105,7 +162,7 @@ def update_expense(
 def delete_expense(
     expense_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Xóa khoản chi"""
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
@@ -116,5 +173,6 @@ def delete_expense(
         )
     
     db.delete(expense)
+    refresh_summaries(db, [expense_key(expense)])
     db.commit()
 
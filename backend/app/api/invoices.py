@@ -1,195 +1,260 @@
 """
 Invoice API - Quản lý hóa đơn
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from decimal import Decimal
 from datetime import date
-from app.core.database import get_db
+import json
+from app.core.async_database import get_async_db
+from app.core.database import get_db, session_factory_for
+from app.core.jobs import job_runner
 from app.models.invoice import Invoice, InvoiceStatus
-from app.models.room import Room, RoomStatus
 from app.models.location import Location
-from app.models.meter import Meter, MeterReading, MeterType
-from app.schemas.invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceGenerate
-from app.api.deps import get_current_user
+from app.models.room import Room
+from app.schemas.invoice import (
+    InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceGenerate,
+    InvoicePreviewItem, InvoicePreviewDiff, InvoicePreviewTotals
+)
+from app.schemas.job import JobSubmitted
+from app.services.invoice_generator import (
+    InvoicePlan, generate_month, generate_per_location, generation_result, plan_invoices
+)
+from app.services.export import ExportFormat, export_response
+from app.services.invoice_recalc import apply_totals
+from app.services.ledger import sync_invoice_balance
+from app.services.monthly_summary import refresh_invoice_summaries
+from app.api.deps import require_auth
+from app.api.pagination import PageParams, paginate, paginate_async
 
 router = APIRouter(prefix="/invoices", tags=["Hóa đơn"])
+# Bản async của các API đọc, chỉ được gắn khi DB_ASYNC bật (xem app.main)
+async_router = APIRouter(prefix="/invoices", tags=["Hóa đơn"], include_in_schema=False)
 
+INVOICE_SORT_KEYS = [(Invoice.year, True), (Invoice.month, True), (Invoice.id, True)]
 
-def get_previous_invoice(db: Session, room_id: int, month: int, year: int) -> Optional[Invoice]:
-    """Lấy hóa đơn tháng trước"""
-    prev_month = month - 1
-    prev_year = year
-    if prev_month < 1:
-        prev_month = 12
-        prev_year -= 1
+INVOICE_EXPORT_COLUMNS = [
+    ("Mã HĐ", Invoice.id),
+    ("Khu trọ", Location.name),
+    ("Phòng", Room.room_code),
+    ("Tháng", Invoice.month),
+    ("Năm", Invoice.year),
+    ("Tiền phòng", Invoice.room_fee),
+    ("Ngày vắng", Invoice.absent_days),
+    ("Trừ vắng", Invoice.absent_deduction),
+    ("Tiền điện", Invoice.electric_fee),
+    ("Tiền nước", Invoice.water_fee),
+    ("Tiền rác", Invoice.garbage_fee),
+    ("Wifi", Invoice.wifi_fee),
+    ("TV", Invoice.tv_fee),
+    ("Giặt", Invoice.laundry_fee),
+    ("Phụ thu", Invoice.other_fee),
+    ("Nợ cũ", Invoice.previous_debt),
+    ("Thừa cũ", Invoice.previous_credit),
+    ("Tổng cộng", Invoice.total),
+    ("Đã nộp", Invoice.paid_amount),
+    ("Còn nợ", Invoice.remaining_debt),
+    ("Còn thừa", Invoice.remaining_credit),
+    ("Trạng thái", Invoice.status),
+    ("Ngày nộp", Invoice.payment_date),
+]
+
+PREVIEW_CHUNK_SIZE = 200  # Số phòng mỗi lần ghi ra luồng JSON
+
+
+def _stream_preview(plan: InvoicePlan):
+    """Ghi kết quả xem trước ra JSON theo từng khối"""
+    totals = {
+        "room_fee": Decimal("0"),
+        "electric_fee": Decimal("0"),
+        "water_fee": Decimal("0"),
+        "fixed_fees": Decimal("0"),
+        "previous_debt": Decimal("0"),
+        "previous_credit": Decimal("0"),
+        "total": Decimal("0"),
+    }
+    
+    yield f'{{"month": {plan.month}, "year": {plan.year}, "items": ['
+    chunk = []
+    for index, (room, values) in enumerate(plan.items):
+        item = InvoicePreviewItem(room_code=room.room_code, location_id=room.location_id, **values)
+        chunk.append(item.model_dump_json())
+        
+        totals["room_fee"] += item.room_fee
+        totals["electric_fee"] += item.electric_fee
+        totals["water_fee"] += item.water_fee
+        totals["fixed_fees"] += item.garbage_fee + item.wifi_fee + item.tv_fee + item.laundry_fee
+        totals["previous_debt"] += item.previous_debt
+        totals["previous_credit"] += item.previous_credit
+        totals["total"] += item.total
+        
+        if len(chunk) == PREVIEW_CHUNK_SIZE:
+            yield ("," if index >= PREVIEW_CHUNK_SIZE else "") + ",".join(chunk)
+            chunk = []
+    if chunk:
+        yield ("," if len(plan.items) > len(chunk) else "") + ",".join(chunk)
     
-    return db.query(Invoice).filter(
-        Invoice.room_id == room_id,
-        Invoice.month == prev_month,
-        Invoice.year == prev_year
-    ).first()
+    yield '], "skipped": ' + json.dumps(plan.skipped, ensure_ascii=False) + ', "diffs": ['
+    diffs = []
+    for room, values, invoice_id, current_total in plan.diffs:
+        diff = InvoicePreviewDiff(
+            room_code=room.room_code,
+            location_id=room.location_id,
+            invoice_id=invoice_id,
+            current_total=current_total,
+            difference=values["total"] - current_total,
+            **values
+        )
+        diffs.append(diff.model_dump_json())
+    yield ",".join(diffs)
+    
+    summary = InvoicePreviewTotals(count=len(plan.items), **totals)
+    yield '], "totals": ' + summary.model_dump_json() + "}"
+
+
+def _filter_invoices(query, month, year, location_id, invoice_status):
+    """Bộ lọc dùng chung cho danh sách và xuất file (Room phải được join khi lọc theo khu)
+
+    Nhận cả Query lẫn select() (cả hai đều có where).
+    """
+    if month:
+        query = query.where(Invoice.month == month)
+    if year:
+        query = query.where(Invoice.year == year)
+    if location_id:
+        query = query.where(Room.location_id == location_id)
+    if invoice_status:
+        query = query.where(Invoice.status == invoice_status)
+    return query
 
 
 @router.get("", response_model=List[InvoiceResponse])
 def get_invoices(
+    response: Response,
     month: Optional[int] = Query(None, description="Tháng"),
     year: Optional[int] = Query(None, description="Năm"),
     location_id: Optional[int] = Query(None, description="Khu trọ"),
     status: Optional[InvoiceStatus] = Query(None, description="Trạng thái"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách hóa đơn"""
-    query = db.query(Invoice).options(joinedload(Invoice.room))
+    query = db.query(Invoice)
+    if location_id:
+        query = query.join(Room)
+    query = _filter_invoices(query, month, year, location_id, status)
     
-    if month:
-        query = query.filter(Invoice.month == month)
-    if year:
-        query = query.filter(Invoice.year == year)
+    return paginate(
+        query, Invoice, InvoiceResponse,
+        sort_keys=INVOICE_SORT_KEYS,
+        page=page,
+        response=response,
+        options=[joinedload(Invoice.room)],
+    )
+
+
+@async_router.get("", response_model=List[InvoiceResponse])
+async def get_invoices_async(
+    response: Response,
+    month: Optional[int] = Query(None, description="Tháng"),
+    year: Optional[int] = Query(None, description="Năm"),
+    location_id: Optional[int] = Query(None, description="Khu trọ"),
+    status: Optional[InvoiceStatus] = Query(None, description="Trạng thái"),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách hóa đơn (AsyncSession)"""
+    stmt = select(Invoice)
     if location_id:
-        query = query.join(Room).filter(Room.location_id == location_id)
-    if status:
-        query = query.filter(Invoice.status == status)
+        stmt = stmt.join(Room)
+    stmt = _filter_invoices(stmt, month, year, location_id, status)
     
-    invoices = query.order_by(Invoice.year.desc(), Invoice.month.desc()).all()
-    return invoices
+    return await paginate_async(
+        db, stmt, Invoice, InvoiceResponse,
+        sort_keys=INVOICE_SORT_KEYS,
+        page=page,
+        response=response,
+        options=[joinedload(Invoice.room)],
+    )
 
 
 @router.post("/generate", status_code=status.HTTP_201_CREATED)
 def generate_invoices(
     invoice_gen: InvoiceGenerate,
+    response: Response,
+    background: bool = Query(False, description="Chạy nền, trả về mã tác vụ ngay"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Tạo hóa đơn tháng tự động"""
-    # Get rooms to generate invoices for
-    query = db.query(Room).filter(Room.status == RoomStatus.OCCUPIED)
-    if invoice_gen.location_id:
-        query = query.filter(Room.location_id == invoice_gen.location_id)
+    if background:
+        job = job_runner.submit(db, "generate_invoices", invoice_gen.model_dump())
+        response.status_code = status.HTTP_202_ACCEPTED
+        return JobSubmitted(job_id=job.id, status=job.status)
     
-    rooms = query.options(
-        joinedload(Room.location),
-        joinedload(Room.room_type)
-    ).all()
+    if not invoice_gen.location_id:
+        return generate_per_location(db, invoice_gen.month, invoice_gen.year)
     
-    created = []
-    skipped = []
-    
-    for room in rooms:
-        # Check if invoice already exists
-        existing = db.query(Invoice).filter(
-            Invoice.room_id == room.id,
-            Invoice.month == invoice_gen.month,
-            Invoice.year == invoice_gen.year
-        ).first()
-        
-        if existing:
-            skipped.append(room.room_code)
-            continue
-        
-        location = room.location
-        
-        # Calculate room fee
-        room_fee = room.price if room.price else (room.room_type.price if room.room_type else Decimal("0"))
-        
-        # Get meter readings for this month
-        electric_fee = Decimal("0")
-        water_fee = Decimal("0")
-        
-        # Electric
-        electric_meter = db.query(Meter).filter(
-            Meter.room_id == room.id,
-            Meter.meter_type == MeterType.ELECTRIC
-        ).first()
-        if electric_meter:
-            reading = db.query(MeterReading).filter(
-                MeterReading.meter_id == electric_meter.id,
-                MeterReading.month == invoice_gen.month,
-                MeterReading.year == invoice_gen.year
-            ).first()
-            if reading and reading.consumption:
-                electric_fee = reading.consumption * location.electric_price
-        
-        # Water
-        water_meter = db.query(Meter).filter(
-            Meter.room_id == room.id,
-            Meter.meter_type == MeterType.WATER
-        ).first()
-        if water_meter:
-            reading = db.query(MeterReading).filter(
-                MeterReading.meter_id == water_meter.id,
-                MeterReading.month == invoice_gen.month,
-                MeterReading.year == invoice_gen.year
-            ).first()
-            if reading and reading.consumption:
-                water_fee = reading.consumption * location.water_price
-        
-        # Get previous invoice for debt/credit transfer
-        previous_debt = Decimal("0")
-        previous_credit = Decimal("0")
-        prev_invoice = get_previous_invoice(db, room.id, invoice_gen.month, invoice_gen.year)
-        if prev_invoice:
-            previous_debt = prev_invoice.remaining_debt or Decimal("0")
-            previous_credit = prev_invoice.remaining_credit or Decimal("0")
-        
-        # Fixed fees from location
-        garbage_fee = location.garbage_fee or Decimal("0")
-        wifi_fee = location.wifi_fee or Decimal("0")
-        tv_fee = location.tv_fee or Decimal("0")
-        laundry_fee = location.laundry_fee or Decimal("0")
-        
-        # Calculate total
-        total = (
-            room_fee +
-            electric_fee +
-            water_fee +
-            garbage_fee +
-            wifi_fee +
-            tv_fee +
-            laundry_fee +
-            previous_debt -
-            previous_credit
-        )
-        
-        # Create invoice
-        invoice = Invoice(
-            room_id=room.id,
-            month=invoice_gen.month,
-            year=invoice_gen.year,
-            room_fee=room_fee,
-            absent_days=0,
-            absent_deduction=Decimal("0"),
-            electric_fee=electric_fee,
-            water_fee=water_fee,
-            garbage_fee=garbage_fee,
-            wifi_fee=wifi_fee,
-            tv_fee=tv_fee,
-            laundry_fee=laundry_fee,
-            other_fee=Decimal("0"),
-            previous_debt=previous_debt,
-            previous_credit=previous_credit,
-            total=total
+    try:
+        plan = generate_month(db, invoice_gen.month, invoice_gen.year, invoice_gen.location_id)
+    except IntegrityError:
+        # Another run inserted some of the same (room, month) invoices first
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Hóa đơn tháng này đang được tạo bởi yêu cầu khác, vui lòng thử lại",
         )
-        db.add(invoice)
-        created.append(room.room_code)
-    
-    db.commit()
+    return generation_result(plan)
+
+
+@router.get("/export")
+def export_invoices(
+    format: ExportFormat = Query(ExportFormat.CSV, description="Định dạng file: csv hoặc xlsx"),
+    month: Optional[int] = Query(None, description="Tháng"),
+    year: Optional[int] = Query(None, description="Năm"),
+    location_id: Optional[int] = Query(None, description="Khu trọ"),
+    status: Optional[InvoiceStatus] = Query(None, description="Trạng thái"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Xuất danh sách hóa đơn ra file CSV/Excel"""
+    def build_query(export_db: Session):
+        query = export_db.query(Invoice).join(Room).join(Location)
+        query = _filter_invoices(query, month, year, location_id, status)
+        return query.order_by(Invoice.year.desc(), Invoice.month.desc(), Location.id, Room.room_code)
     
-    return {
-        "message": f"Đã tạo {len(created)} hóa đơn",
-        "created": created,
-        "skipped": skipped
-    }
+    filename = "hoa_don" + (f"_{year}" if year else "") + (f"_{month:02d}" if month else "")
+    return export_response(
+        session_factory_for(db), build_query, INVOICE_EXPORT_COLUMNS, format, filename, "Hóa đơn"
+    )
+
+
+@router.post("/generate/preview")
+def preview_invoices(
+    invoice_gen: InvoiceGenerate,
+    diff: bool = Query(False, description="So sánh với hóa đơn đã có"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Xem trước hóa đơn tháng (không ghi dữ liệu)"""
+    plan = plan_invoices(
+        db, invoice_gen.month, invoice_gen.year, invoice_gen.location_id, with_diff=diff
+    )
+    return StreamingResponse(_stream_preview(plan), media_type="application/json")
 
 
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 def get_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết hóa đơn"""
     invoice = db.query(Invoice).options(joinedload(Invoice.room)).filter(Invoice.id == invoice_id).first()
@@ -208,7 +273,7 @@ def update_invoice(
     invoice_id: int,
     invoice_in: InvoiceUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật hóa đơn"""
     invoice = db.query(Invoice).options(joinedload(Invoice.room)).filter(Invoice.id == invoice_id).first()
@@ -222,29 +287,11 @@ def update_invoice(
     for field, value in update_data.items():
         setattr(invoice, field, value)
     
-    # Recalculate total
-    room_after_deduction = invoice.room_fee - invoice.absent_deduction
-    invoice.total = (
-        room_after_deduction +
-        invoice.electric_fee +
-        invoice.water_fee +
-        invoice.garbage_fee +
-        invoice.wifi_fee +
-        invoice.tv_fee +
-        invoice.laundry_fee +
-        invoice.other_fee +
-        invoice.previous_debt -
-        invoice.previous_credit
-    )
-    
-    # Calculate remaining debt/credit
-    if invoice.paid_amount >= invoice.total:
-        invoice.remaining_credit = invoice.paid_amount - invoice.total
-        invoice.remaining_debt = Decimal("0")
-    else:
-        invoice.remaining_debt = invoice.total - invoice.paid_amount
-        invoice.remaining_credit = Decimal("0")
+    # Recalculate total, remaining debt/credit and status
+    apply_totals(invoice)
     
+    sync_invoice_balance(db, invoice)
+    refresh_invoice_summaries(db, [invoice.room_id], invoice.month, invoice.year)
     db.commit()
     db.refresh(invoice)
     
@@ -256,7 +303,7 @@ def pay_invoice(
     invoice_id: int,
     amount: Optional[Decimal] = Query(None, description="Số tiền nộp (nếu không có thì nộp đủ)"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thu tiền hóa đơn"""
     invoice = db.query(Invoice).options(joinedload(Invoice.room)).filter(Invoice.id == invoice_id).first()
@@ -282,6 +329,8 @@ def pay_invoice(
         invoice.remaining_debt = invoice.total - invoice.paid_amount
         invoice.remaining_credit = Decimal("0")
     
+    sync_invoice_balance(db, invoice)
+    refresh_invoice_summaries(db, [invoice.room_id], invoice.month, invoice.year)
     db.commit()
     db.refresh(invoice)
     
@@ -293,7 +342,7 @@ def update_absent_days(
     invoice_id: int,
     absent_days: int = Query(..., description="Số ngày vắng"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật số ngày vắng và tính tiền trừ"""
     invoice = db.query(Invoice).options(
@@ -314,34 +363,11 @@ def update_absent_days(
     invoice.absent_days = absent_days
     invoice.absent_deduction = daily_deduction * absent_days
     
-    # Recalculate total
-    room_after_deduction = invoice.room_fee - invoice.absent_deduction
-    invoice.total = (
-        room_after_deduction +
-        invoice.electric_fee +
-        invoice.water_fee +
-        invoice.garbage_fee +
-        invoice.wifi_fee +
-        invoice.tv_fee +
-        invoice.laundry_fee +
-        invoice.other_fee +
-        invoice.previous_debt -
-        invoice.previous_credit
-    )
-    
-    # Recalculate remaining
-    if invoice.paid_amount >= invoice.total:
-        invoice.remaining_credit = invoice.paid_amount - invoice.total
-        invoice.remaining_debt = Decimal("0")
-        invoice.status = InvoiceStatus.PAID
-    elif invoice.paid_amount > 0:
-        invoice.remaining_debt = invoice.total - invoice.paid_amount
-        invoice.remaining_credit = Decimal("0")
-        invoice.status = InvoiceStatus.PARTIAL
-    else:
-        invoice.remaining_debt = invoice.total
-        invoice.remaining_credit = Decimal("0")
+    # Recalculate total, remaining debt/credit and status
+    apply_totals(invoice)
     
+    sync_invoice_balance(db, invoice)
+    refresh_invoice_summaries(db, [invoice.room_id], invoice.month, invoice.year)
     db.commit()
     db.refresh(invoice)
     
@@ -0,0 +1,105 @@
+"""
+Job API - Theo dõi tác vụ nền
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+import time
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.jobs import job_runner
+from app.models.job import Job, JobStatus
+from app.schemas.job import JobResponse
+from app.api.deps import require_auth
+
+router = APIRouter(prefix="/jobs", tags=["Tác vụ nền"])
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+def _job_response(job: Job) -> JobResponse:
+    """Chuyển bản ghi tác vụ sang response, kèm tiến độ đang chạy (nếu có)"""
+    job_data = JobResponse.model_validate(job)
+    progress = job_runner.progress(job.id)
+    if progress is not None:
+        job_data.progress_done, job_data.progress_total = progress
+    return job_data
+
+
+@router.get("", response_model=List[JobResponse])
+def get_jobs(
+    job_type: Optional[str] = Query(None, description="Lọc theo loại tác vụ"),
+    status: Optional[JobStatus] = Query(None, description="Lọc theo trạng thái"),
+    limit: int = Query(50, ge=1, le=200, description="Số tác vụ tối đa"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách tác vụ gần đây"""
+    query = db.query(Job)
+    
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    if status:
+        query = query.filter(Job.status == status)
+    
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return [_job_response(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy trạng thái tác vụ"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy tác vụ",
+        )
+    
+    return _job_response(job)
+
+
+@router.get("/{job_id}/events")
+def stream_job_events(
+    job_id: int,
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Theo dõi tiến độ tác vụ (Server-Sent Events)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy tác vụ",
+        )
+    
+    def events():
+        last_payload = None
+        # Bounded so a stuck job cannot hold a connection forever; EventSource reconnects
+        deadline = time.monotonic() + settings.JOB_EVENTS_MAX_SECONDS
+        while True:
+            # Fresh short-lived session per poll, the request session is already closed
+            poll_db = job_runner.session_factory()
+            try:
+                current = poll_db.query(Job).filter(Job.id == job_id).first()
+                if current is None:
+                    break
+                payload = _job_response(current).model_dump_json()
+                finished = current.status in FINISHED_STATUSES
+            finally:
+                poll_db.close()
+            
+            if payload != last_payload:
+                yield f"data: {payload}\n\n"
+                last_payload = payload
+            if finished or time.monotonic() >= deadline:
+                break
+            time.sleep(settings.JOB_POLL_INTERVAL)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
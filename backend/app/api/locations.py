@@ -3,47 +3,58 @@ Location API - Quản lý khu trọ
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import case, func
+from typing import Dict, List, Optional, Tuple
 from app.core.database import get_db
 from app.models.location import Location
 from app.models.room import Room, RoomStatus
 from app.models.room_type import RoomType
 from app.schemas.location import LocationCreate, LocationUpdate, LocationResponse
-from app.api.deps import get_current_user
+from app.api.conditional import ConditionalGet
+from app.api.deps import require_auth
 
 router = APIRouter(prefix="/locations", tags=["Khu trọ"])
 
+# Khu trọ kèm loại phòng và số phòng
+LOCATIONS_ETAG = ConditionalGet(Location, RoomType, Room)
 
-@router.get("", response_model=List[LocationResponse])
+
+def _room_counts(db: Session, location_id: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+    """Số phòng và số phòng đang thuê theo khu trọ (một truy vấn gộp)"""
+    query = db.query(
+        Room.location_id,
+        func.count(Room.id),
+        func.count(case((Room.status == RoomStatus.OCCUPIED, Room.id))),
+    )
+    if location_id is not None:
+        query = query.filter(Room.location_id == location_id)
+    rows = query.group_by(Room.location_id).all()
+    return {loc_id: (room_count, occupied_count) for loc_id, room_count, occupied_count in rows}
+
+
+def _location_response(location: Location, counts: Dict[int, Tuple[int, int]]) -> LocationResponse:
+    loc_data = LocationResponse.model_validate(location)
+    loc_data.room_count, loc_data.occupied_count = counts.get(location.id, (0, 0))
+    return loc_data
+
+
+@router.get("", response_model=List[LocationResponse], dependencies=[Depends(LOCATIONS_ETAG)])
 def get_locations(
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách khu trọ"""
     locations = db.query(Location).options(joinedload(Location.room_types)).all()
+    counts = _room_counts(db)
     
-    result = []
-    for loc in locations:
-        room_count = db.query(Room).filter(Room.location_id == loc.id).count()
-        occupied_count = db.query(Room).filter(
-            Room.location_id == loc.id,
-            Room.status == RoomStatus.OCCUPIED
-        ).count()
-        
-        loc_data = LocationResponse.model_validate(loc)
-        loc_data.room_count = room_count
-        loc_data.occupied_count = occupied_count
-        result.append(loc_data)
-    
-    return result
+    return [_location_response(loc, counts) for loc in locations]
 
 
 @router.post("", response_model=LocationResponse, status_code=status.HTTP_201_CREATED)
 def create_location(
     location_in: LocationCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm khu trọ mới"""
     location = Location(**location_in.model_dump())
@@ -62,7 +73,7 @@ def create_location(
 def get_location(
     location_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết khu trọ"""
     location = db.query(Location).options(
@@ -75,16 +86,7 @@ def get_location(
             detail="Không tìm thấy khu trọ",
         )
     
-    room_count = db.query(Room).filter(Room.location_id == location.id).count()
-    occupied_count = db.query(Room).filter(
-        Room.location_id == location.id,
-        Room.status == RoomStatus.OCCUPIED
-    ).count()
-    
-    loc_data = LocationResponse.model_validate(location)
-    loc_data.room_count = room_count
-    loc_data.occupied_count = occupied_count
-    return loc_data
+    return _location_response(location, _room_counts(db, location.id))
 
 
 @router.put("/{location_id}", response_model=LocationResponse)
@@ -92,7 +94,7 @@ def update_location(
     location_id: int,
     location_in: LocationUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật khu trọ"""
     location = db.query(Location).options(
@@ -112,23 +114,14 @@ def update_location(
     db.commit()
     db.refresh(location)
     
-    room_count = db.query(Room).filter(Room.location_id == location.id).count()
-    occupied_count = db.query(Room).filter(
-        Room.location_id == location.id,
-        Room.status == RoomStatus.OCCUPIED
-    ).count()
-    
-    loc_data = LocationResponse.model_validate(location)
-    loc_data.room_count = room_count
-    loc_data.occupied_count = occupied_count
-    return loc_data
+    return _location_response(location, _room_counts(db, location.id))
 
 
 @router.delete("/{location_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_location(
     location_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Xóa khu trọ"""
     location = db.query(Location).filter(Location.id == location_id).first()
@@ -1,59 +1,102 @@
 """
 Meter API - Quản lý điện nước
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from decimal import Decimal
-from app.core.database import get_db
+from app.core.async_database import get_async_db
+from app.core.database import get_db, session_factory_for
+from app.core.jobs import job_runner
 from app.models.meter import Meter, MeterReading, MeterType
 from app.models.room import Room
 from app.schemas.meter import (
     MeterCreate, MeterReadingCreate, MeterReadingUpdate,
-    MeterResponse, MeterReadingResponse, MeterReadingBatch
+    MeterResponse, MeterReadingResponse, MeterReadingBatch, MeterReadingUpdateResponse,
+    MeterReadingCreateResponse, ReadingChainMismatch
 )
-from app.api.deps import get_current_user
+from app.schemas.invoice import InvoiceRecalculation
+from app.schemas.job import JobSubmitted
+from app.services.export import ExportFormat, export_response
+from app.services.invoice_recalc import recalculate_meter_fees
+from app.services.meter_readings import (
+    chain_mismatch, latest_readings, latest_readings_statement, previous_readings, save_readings_batch
+)
+from app.api.deps import require_auth
+from app.api.pagination import PageParams, paginate
 
 router = APIRouter(prefix="/meters", tags=["Điện nước"])
+# Bản async của các API đọc, chỉ được gắn khi DB_ASYNC bật (xem app.main)
+async_router = APIRouter(prefix="/meters", tags=["Điện nước"], include_in_schema=False)
 
+READING_EXPORT_COLUMNS = [
+    ("Phòng", Room.room_code),
+    ("Loại", Meter.meter_type),
+    ("Tháng", MeterReading.month),
+    ("Năm", MeterReading.year),
+    ("Chỉ số cũ", MeterReading.old_reading),
+    ("Chỉ số mới", MeterReading.new_reading),
+    ("Tiêu thụ", MeterReading.consumption),
+]
 
-@router.get("", response_model=List[MeterResponse])
-def get_meters(
-    room_id: Optional[int] = Query(None, description="Lọc theo phòng"),
-    meter_type: Optional[MeterType] = Query(None, description="Lọc theo loại"),
-    db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
-):
-    """Lấy danh sách đồng hồ"""
-    query = db.query(Meter)
+
+def _meters_statement(room_id: Optional[int], meter_type: Optional[MeterType]):
+    stmt = select(Meter)
     
     if room_id:
-        query = query.filter(Meter.room_id == room_id)
+        stmt = stmt.where(Meter.room_id == room_id)
     if meter_type:
-        query = query.filter(Meter.meter_type == meter_type)
-    
-    meters = query.all()
+        stmt = stmt.where(Meter.meter_type == meter_type)
     
+    return stmt
+
+
+def _meter_responses(meters: List[Meter], latest: dict) -> List[MeterResponse]:
     result = []
     for meter in meters:
-        # Get latest reading
-        latest = db.query(MeterReading).filter(
-            MeterReading.meter_id == meter.id
-        ).order_by(MeterReading.year.desc(), MeterReading.month.desc()).first()
-        
         meter_data = MeterResponse.model_validate(meter)
-        meter_data.latest_reading = latest.new_reading if latest else None
+        meter_data.latest_reading = latest.get(meter.id)
         result.append(meter_data)
     
     return result
 
 
+@router.get("", response_model=List[MeterResponse])
+def get_meters(
+    room_id: Optional[int] = Query(None, description="Lọc theo phòng"),
+    meter_type: Optional[MeterType] = Query(None, description="Lọc theo loại"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách đồng hồ"""
+    meters = db.execute(_meters_statement(room_id, meter_type)).scalars().all()
+    return _meter_responses(meters, latest_readings(db, [meter.id for meter in meters]))
+
+
+@async_router.get("", response_model=List[MeterResponse])
+async def get_meters_async(
+    room_id: Optional[int] = Query(None, description="Lọc theo phòng"),
+    meter_type: Optional[MeterType] = Query(None, description="Lọc theo loại"),
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách đồng hồ (AsyncSession)"""
+    meters = (await db.execute(_meters_statement(room_id, meter_type))).scalars().all()
+    latest = {}
+    if meters:
+        rows = await db.execute(latest_readings_statement(db.bind.dialect.name, [meter.id for meter in meters]))
+        latest = dict(rows.all())
+    return _meter_responses(meters, latest)
+
+
 @router.post("", response_model=MeterResponse, status_code=status.HTTP_201_CREATED)
 def create_meter(
     meter_in: MeterCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm đồng hồ mới"""
     # Check room exists
@@ -64,55 +107,84 @@ def create_meter(
             detail="Không tìm thấy phòng",
         )
     
-    # Check if meter type already exists for room
-    existing = db.query(Meter).filter(
-        Meter.room_id == meter_in.room_id,
-        Meter.meter_type == meter_in.meter_type
-    ).first()
-    if existing:
+    meter = Meter(**meter_in.model_dump())
+    db.add(meter)
+    # One meter per type and room (uq_meters_room_type)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Phòng đã có đồng hồ {'điện' if meter_in.meter_type == MeterType.ELECTRIC else 'nước'}",
         )
-    
-    meter = Meter(**meter_in.model_dump())
-    db.add(meter)
-    db.commit()
     db.refresh(meter)
     
     return meter
 
 
+def _filter_readings(query, month, year, room_id, meter_type):
+    """Bộ lọc dùng chung cho danh sách và xuất file (Meter phải được join)"""
+    if month:
+        query = query.filter(MeterReading.month == month)
+    if year:
+        query = query.filter(MeterReading.year == year)
+    if room_id:
+        query = query.filter(Meter.room_id == room_id)
+    if meter_type:
+        query = query.filter(Meter.meter_type == meter_type)
+    return query
+
+
 @router.get("/readings", response_model=List[MeterReadingResponse])
 def get_readings(
+    response: Response,
     month: Optional[int] = Query(None, description="Tháng"),
     year: Optional[int] = Query(None, description="Năm"),
     room_id: Optional[int] = Query(None, description="Phòng"),
     meter_type: Optional[MeterType] = Query(None, description="Loại đồng hồ"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách chỉ số"""
-    query = db.query(MeterReading).join(Meter)
+    query = _filter_readings(db.query(MeterReading).join(Meter), month, year, room_id, meter_type)
     
-    if month:
-        query = query.filter(MeterReading.month == month)
-    if year:
-        query = query.filter(MeterReading.year == year)
-    if room_id:
-        query = query.filter(Meter.room_id == room_id)
-    if meter_type:
-        query = query.filter(Meter.meter_type == meter_type)
+    return paginate(
+        query, MeterReading, MeterReadingResponse,
+        sort_keys=[(MeterReading.year, True), (MeterReading.month, True), (MeterReading.id, True)],
+        page=page,
+        response=response,
+    )
+
+
+@router.get("/readings/export")
+def export_readings(
+    format: ExportFormat = Query(ExportFormat.CSV, description="Định dạng file: csv hoặc xlsx"),
+    month: Optional[int] = Query(None, description="Tháng"),
+    year: Optional[int] = Query(None, description="Năm"),
+    room_id: Optional[int] = Query(None, description="Phòng"),
+    meter_type: Optional[MeterType] = Query(None, description="Loại đồng hồ"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Xuất chỉ số đồng hồ ra file CSV/Excel"""
+    def build_query(export_db: Session):
+        query = export_db.query(MeterReading).join(Meter).join(Room)
+        query = _filter_readings(query, month, year, room_id, meter_type)
+        return query.order_by(MeterReading.year.desc(), MeterReading.month.desc(), Room.room_code, Meter.meter_type)
     
-    readings = query.order_by(MeterReading.year.desc(), MeterReading.month.desc()).all()
-    return readings
+    filename = "chi_so" + (f"_{year}" if year else "") + (f"_{month:02d}" if month else "")
+    return export_response(
+        session_factory_for(db), build_query, READING_EXPORT_COLUMNS, format, filename, "Chỉ số"
+    )
 
 
-@router.post("/readings", response_model=MeterReadingResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/readings", response_model=MeterReadingCreateResponse, status_code=status.HTTP_201_CREATED)
 def create_reading(
     reading_in: MeterReadingCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Ghi chỉ số mới"""
     # Check meter exists
@@ -123,20 +195,22 @@ def create_reading(
             detail="Không tìm thấy đồng hồ",
         )
     
-    # Check if reading for this month already exists
-    existing = db.query(MeterReading).filter(
-        MeterReading.meter_id == reading_in.meter_id,
-        MeterReading.month == reading_in.month,
-        MeterReading.year == reading_in.year
-    ).first()
-    if existing:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Đã có chỉ số cho tháng này",
-        )
+    # Old reading defaults to the previous period's new reading
+    previous = previous_readings(db, [meter.id], reading_in.month, reading_in.year).get(meter.id)
+    old_reading = reading_in.old_reading
+    mismatch = None
+    if old_reading is None:
+        if previous is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Chưa có chỉ số kỳ trước, cần nhập chỉ số cũ",
+            )
+        old_reading = previous
+    else:
+        mismatch = chain_mismatch(meter.id, meter.room_id, meter.meter_type, old_reading, previous)
     
     # Calculate consumption
-    consumption = reading_in.new_reading - reading_in.old_reading
+    consumption = reading_in.new_reading - old_reading
     if consumption < 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -144,80 +218,51 @@ def create_reading(
         )
     
     reading = MeterReading(
-        **reading_in.model_dump(),
+        **reading_in.model_dump(exclude={"old_reading"}),
+        old_reading=old_reading,
         consumption=consumption
     )
     db.add(reading)
-    db.commit()
+    # One reading per meter and month (uq_meter_readings_meter_period)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Đã có chỉ số cho tháng này",
+        )
     db.refresh(reading)
     
-    return reading
+    result = MeterReadingCreateResponse.model_validate(reading)
+    if mismatch:
+        result.mismatch = ReadingChainMismatch(**mismatch)
+    return result
 
 
 @router.post("/readings/batch", status_code=status.HTTP_201_CREATED)
 def create_readings_batch(
     batch: MeterReadingBatch,
+    response: Response,
+    background: bool = Query(False, description="Chạy nền, trả về mã tác vụ ngay"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Ghi chỉ số hàng loạt"""
-    created = []
-    errors = []
-    
-    for item in batch.readings:
-        # Find meter
-        meter = db.query(Meter).filter(
-            Meter.room_id == item.room_id,
-            Meter.meter_type == item.meter_type
-        ).first()
-        
-        if not meter:
-            errors.append(f"Không tìm thấy đồng hồ cho phòng {item.room_id}")
-            continue
-        
-        # Check if reading exists
-        existing = db.query(MeterReading).filter(
-            MeterReading.meter_id == meter.id,
-            MeterReading.month == batch.month,
-            MeterReading.year == batch.year
-        ).first()
-        
-        if existing:
-            # Update existing
-            existing.old_reading = item.old_reading
-            existing.new_reading = item.new_reading
-            existing.consumption = item.new_reading - item.old_reading
-            created.append(existing.id)
-        else:
-            # Create new
-            consumption = item.new_reading - item.old_reading
-            reading = MeterReading(
-                meter_id=meter.id,
-                month=batch.month,
-                year=batch.year,
-                old_reading=item.old_reading,
-                new_reading=item.new_reading,
-                consumption=consumption
-            )
-            db.add(reading)
-            db.flush()
-            created.append(reading.id)
-    
-    db.commit()
+    if background:
+        job = job_runner.submit(db, "import_readings", batch.model_dump(mode="json"))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return JobSubmitted(job_id=job.id, status=job.status)
     
-    return {
-        "message": f"Đã ghi {len(created)} chỉ số",
-        "created_ids": created,
-        "errors": errors
-    }
+    return save_readings_batch(db, batch.month, batch.year, batch.readings)
 
 
-@router.put("/readings/{reading_id}", response_model=MeterReadingResponse)
+@router.put("/readings/{reading_id}", response_model=MeterReadingUpdateResponse)
 def update_reading(
     reading_id: int,
     reading_in: MeterReadingUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật chỉ số"""
     reading = db.query(MeterReading).filter(MeterReading.id == reading_id).first()
@@ -233,9 +278,15 @@ def update_reading(
     
     # Recalculate consumption
     reading.consumption = reading.new_reading - reading.old_reading
+    db.flush()
+    
+    # Recalculate the invoice of that month (and carried balances of later months)
+    recalculated = recalculate_meter_fees(db, [reading.meter.room_id], reading.month, reading.year)
     
     db.commit()
     db.refresh(reading)
     
-    return reading
+    reading_data = MeterReadingUpdateResponse.model_validate(reading)
+    reading_data.recalculated = [InvoiceRecalculation(**change) for change in recalculated]
+    return reading_data
 
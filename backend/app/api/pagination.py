@@ -0,0 +1,212 @@
+"""
+Keyset pagination and field projection for list endpoints
+
+Trang tiếp theo được lấy bằng con trỏ (giá trị khóa sắp xếp của dòng cuối),
+trả về trong header X-Next-Cursor, nên danh sách vẫn là một mảng JSON như cũ.
+
+Khi bật FAST_JSON_RESPONSES, danh sách được kiểm tra bằng một TypeAdapter dựng
+sẵn cho mỗi schema rồi ghi thẳng ra bytes (model_dump_json của Pydantic), thay
+vì qua dict trung gian và json.dumps của FastAPI. Kết quả JSON giống hệt.
+"""
+import base64
+import json
+from datetime import date
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple, Type
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+SortKey = Tuple[Any, bool]  # (cột, giảm dần?)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Mã hóa giá trị khóa sắp xếp thành con trỏ"""
+    payload = [value.isoformat() if isinstance(value, date) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_keys: Sequence[SortKey]) -> List[Any]:
+    """Giải mã con trỏ theo kiểu của các cột sắp xếp"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError
+        decoded = []
+        for value, (column, _) in zip(values, sort_keys):
+            if column.type.python_type is date:
+                value = date.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Con trỏ phân trang không hợp lệ",
+        )
+
+
+def keyset_condition(sort_keys: Sequence[SortKey], values: Sequence[Any]):
+    """Điều kiện "đứng sau con trỏ" theo thứ tự sắp xếp"""
+    clauses = []
+    for index, (column, descending) in enumerate(sort_keys):
+        equal = [sort_keys[j][0] == values[j] for j in range(index)]
+        compare = column < values[index] if descending else column > values[index]
+        clauses.append(and_(*equal, compare))
+    return or_(*clauses)
+
+
+class PageParams:
+    """Tham số phân trang và chọn trường dùng chung cho các API danh sách"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(
+            None, ge=1, le=settings.MAX_PAGE_SIZE, description="Số dòng mỗi trang (bỏ trống = lấy hết)"
+        ),
+        cursor: Optional[str] = Query(None, description="Con trỏ trang tiếp theo (header X-Next-Cursor)"),
+        fields: Optional[str] = Query(None, description="Chỉ lấy các trường này, phân cách bằng dấu phẩy"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+
+    @property
+    def page_size(self) -> Optional[int]:
+        if self.limit is None and self.cursor:
+            return settings.DEFAULT_PAGE_SIZE
+        return self.limit
+
+    def field_names(self, model, schema: Type[BaseModel]) -> List[str]:
+        """Các trường được yêu cầu (chỉ cho phép cột của bảng có trong schema)"""
+        if not self.fields:
+            return []
+        allowed = set(schema.model_fields) & set(model.__table__.columns.keys())
+        names = [name.strip() for name in self.fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Trường không hợp lệ: {', '.join(unknown)}",
+            )
+        return names
+
+
+def _order_by(sort_keys: Sequence[SortKey]) -> list:
+    return [column.desc() if descending else column.asc() for column, descending in sort_keys]
+
+
+def _projection(model, names: List[str], sort_keys: Sequence[SortKey]) -> list:
+    """Cột được chọn, kèm các cột sắp xếp cần cho con trỏ"""
+    columns = [getattr(model, name) for name in names]
+    return columns + [column for column, _ in sort_keys if column.key not in names]
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter List[schema], dựng một lần cho mỗi schema"""
+    return TypeAdapter(List[schema])
+
+
+@lru_cache(maxsize=None)
+def _fields_schema(schema: Type[BaseModel], names: Tuple[str, ...]) -> Type[BaseModel]:
+    """Schema con chỉ gồm các trường được chọn (giữ kiểu và cách xuất JSON, vd. Money)"""
+    fields = {name: (schema.model_fields[name].rebuild_annotation(), ...) for name in names}
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **fields,
+    )
+
+
+def json_list_response(schema: Type[BaseModel], rows: Sequence[Any]) -> Response:
+    """Kiểm tra rows theo schema và ghi thẳng ra JSON bytes"""
+    adapter = list_adapter(schema)
+    content = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return Response(content=content, media_type="application/json")
+
+
+def _page_result(
+    rows: list,
+    schema: Type[BaseModel],
+    names: List[str],
+    limit: Optional[int],
+    sort_keys: Sequence[SortKey],
+    response: Response,
+):
+    """Cắt trang, gắn con trỏ tiếp theo và dựng kết quả trả về"""
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in sort_keys])
+
+    direct = bool(names) or settings.FAST_JSON_RESPONSES
+    if names:
+        response = json_list_response(_fields_schema(schema, tuple(names)), rows)
+    elif direct:
+        response = json_list_response(schema, rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response if direct else rows
+
+
+def paginate(
+    query: OrmQuery,
+    model,
+    schema: Type[BaseModel],
+    sort_keys: Sequence[SortKey],
+    page: PageParams,
+    response: Response,
+    options: Sequence[Any] = (),
+):
+    """Áp dụng con trỏ, sắp xếp, giới hạn và chọn trường cho một truy vấn danh sách
+
+    Trả về list đối tượng ORM (để FastAPI kiểm tra theo response_model), hoặc
+    Response JSON dựng sẵn khi có tham số fields hay khi bật FAST_JSON_RESPONSES.
+    """
+    if page.cursor:
+        query = query.filter(keyset_condition(sort_keys, decode_cursor(page.cursor, sort_keys)))
+    query = query.order_by(*_order_by(sort_keys))
+
+    names = page.field_names(model, schema)
+    if names:
+        query = query.with_entities(*_projection(model, names, sort_keys))
+    elif options:
+        query = query.options(*options)
+
+    limit = page.page_size
+    rows = query.limit(limit + 1).all() if limit else query.all()
+    return _page_result(rows, schema, names, limit, sort_keys, response)
+
+
+async def paginate_async(
+    db: AsyncSession,
+    stmt: Select,
+    model,
+    schema: Type[BaseModel],
+    sort_keys: Sequence[SortKey],
+    page: PageParams,
+    response: Response,
+    options: Sequence[Any] = (),
+):
+    """Như paginate, cho câu select() chạy trên AsyncSession"""
+    if page.cursor:
+        stmt = stmt.where(keyset_condition(sort_keys, decode_cursor(page.cursor, sort_keys)))
+    stmt = stmt.order_by(*_order_by(sort_keys))
+
+    names = page.field_names(model, schema)
+    if names:
+        stmt = stmt.with_only_columns(*_projection(model, names, sort_keys))
+    elif options:
+        stmt = stmt.options(*options)
+
+    limit = page.page_size
+    if limit:
+        stmt = stmt.limit(limit + 1)
+    result = await db.execute(stmt)
+    rows = result.all() if names else result.scalars().all()
+    return _page_result(list(rows), schema, names, limit, sort_keys, response)
@@ -9,7 +9,9 @@ from app.core.database import get_db
 from app.models.payment import Payment
 from app.models.invoice import Invoice, InvoiceStatus
 from app.schemas.payment import PaymentCreate, PaymentResponse
-from app.api.deps import get_current_user
+from app.services.ledger import sync_invoice_balance
+from app.services.monthly_summary import refresh_invoice_summaries
+from app.api.deps import require_auth
 
 router = APIRouter(prefix="/payments", tags=["Thanh toán"])
 
@@ -18,7 +20,7 @@ router = APIRouter(prefix="/payments", tags=["Thanh toán"])
 def get_payments(
     invoice_id: Optional[int] = Query(None, description="Lọc theo hóa đơn"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách thanh toán"""
     query = db.query(Payment)
@@ -34,7 +36,7 @@ def get_payments(
 def create_payment(
     payment_in: PaymentCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Ghi nhận thanh toán"""
     # Check invoice exists
@@ -53,9 +55,15 @@ def create_payment(
     
     if invoice.paid_amount >= invoice.total:
         invoice.status = InvoiceStatus.PAID
+        invoice.remaining_credit = invoice.paid_amount - invoice.total
+        invoice.remaining_debt = Decimal("0")
     elif invoice.paid_amount > 0:
         invoice.status = InvoiceStatus.PARTIAL
+        invoice.remaining_debt = invoice.total - invoice.paid_amount
+        invoice.remaining_credit = Decimal("0")
     
+    sync_invoice_balance(db, invoice)
+    refresh_invoice_summaries(db, [invoice.room_id], invoice.month, invoice.year)
     db.commit()
     db.refresh(payment)
     
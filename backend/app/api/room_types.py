@@ -8,16 +8,19 @@ from app.core.database import get_db
 from app.models.room_type import RoomType
 from app.models.location import Location
 from app.schemas.room_type import RoomTypeCreate, RoomTypeUpdate, RoomTypeResponse
-from app.api.deps import get_current_user
+from app.api.conditional import ConditionalGet
+from app.api.deps import require_auth
 
 router = APIRouter(prefix="/room-types", tags=["Loại phòng"])
 
+ROOM_TYPES_ETAG = ConditionalGet(RoomType)
 
-@router.get("", response_model=List[RoomTypeResponse])
+
+@router.get("", response_model=List[RoomTypeResponse], dependencies=[Depends(ROOM_TYPES_ETAG)])
 def get_room_types(
     location_id: Optional[int] = Query(None, description="Lọc theo khu trọ"),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách loại phòng"""
     query = db.query(RoomType)
@@ -33,7 +36,7 @@ def get_room_types(
 def create_room_type(
     room_type_in: RoomTypeCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm loại phòng mới"""
     # Check location exists
@@ -67,7 +70,7 @@ def create_room_type(
 def get_room_type(
     room_type_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết loại phòng"""
     room_type = db.query(RoomType).filter(RoomType.id == room_type_id).first()
@@ -86,7 +89,7 @@ def update_room_type(
     room_type_id: int,
     room_type_in: RoomTypeUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật loại phòng"""
     room_type = db.query(RoomType).filter(RoomType.id == room_type_id).first()
@@ -124,7 +127,7 @@ def update_room_type(
 def delete_room_type(
     room_type_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Xóa loại phòng"""
     room_type = db.query(RoomType).filter(RoomType.id == room_type_id).first()
@@ -2,44 +2,52 @@
 Room API - Quản lý phòng trọ
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from app.core.async_database import get_async_db
 from app.core.database import get_db
 from app.models.room import Room, RoomStatus
 from app.models.location import Location
 from app.models.room_type import RoomType
 from app.models.tenant import Tenant
 from app.models.meter import Meter, MeterType
-from app.schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomWithDetails
-from app.api.deps import get_current_user
+from app.schemas.room import RoomCreate, RoomUpdate, RoomResponse, RoomWithDetails, RoomBalanceResponse
+from app.services.ledger import get_balance
+from app.services.monthly_summary import refresh_summaries, room_keys, tenant_keys
+from app.api.conditional import AsyncConditionalGet, ConditionalGet
+from app.api.deps import require_auth
 
 router = APIRouter(prefix="/rooms", tags=["Phòng trọ"])
+# Bản async của các API đọc, chỉ được gắn khi DB_ASYNC bật (xem app.main)
+async_router = APIRouter(prefix="/rooms", tags=["Phòng trọ"], include_in_schema=False)
 
+# Danh sách phòng gồm khu, loại phòng và người đang thuê
+ROOMS_ETAG = ConditionalGet(Room, Location, RoomType, Tenant)
+ROOMS_ETAG_ASYNC = AsyncConditionalGet(Room, Location, RoomType, Tenant)
 
-@router.get("", response_model=List[RoomWithDetails])
-def get_rooms(
-    location_id: Optional[int] = Query(None, description="Lọc theo khu trọ"),
-    room_type_id: Optional[int] = Query(None, description="Lọc theo loại phòng"),
-    status: Optional[RoomStatus] = Query(None, description="Lọc theo trạng thái"),
-    db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
-):
-    """Lấy danh sách phòng"""
-    query = db.query(Room).options(
+
+def _rooms_statement(location_id: Optional[int], room_type_id: Optional[int], status: Optional[RoomStatus]):
+    """Truy vấn danh sách phòng (dùng chung cho bản đồng bộ và async)"""
+    stmt = select(Room).options(
         joinedload(Room.location),
         joinedload(Room.room_type),
         joinedload(Room.tenants)
     )
     
     if location_id:
-        query = query.filter(Room.location_id == location_id)
+        stmt = stmt.where(Room.location_id == location_id)
     if room_type_id:
-        query = query.filter(Room.room_type_id == room_type_id)
+        stmt = stmt.where(Room.room_type_id == room_type_id)
     if status:
-        query = query.filter(Room.status == status)
-    
-    rooms = query.order_by(Room.location_id, Room.room_code).all()
+        stmt = stmt.where(Room.status == status)
     
+    return stmt.order_by(Room.location_id, Room.room_code)
+
+
+def _room_details(rooms: List[Room]) -> List[RoomWithDetails]:
     result = []
     for room in rooms:
         active_tenants = [t for t in room.tenants if t.is_active]
@@ -52,11 +60,37 @@ def get_rooms(
     return result
 
 
+@router.get("", response_model=List[RoomWithDetails], dependencies=[Depends(ROOMS_ETAG)])
+def get_rooms(
+    location_id: Optional[int] = Query(None, description="Lọc theo khu trọ"),
+    room_type_id: Optional[int] = Query(None, description="Lọc theo loại phòng"),
+    status: Optional[RoomStatus] = Query(None, description="Lọc theo trạng thái"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách phòng"""
+    rooms = db.execute(_rooms_statement(location_id, room_type_id, status)).unique().scalars().all()
+    return _room_details(rooms)
+
+
+@async_router.get("", response_model=List[RoomWithDetails], dependencies=[Depends(ROOMS_ETAG_ASYNC)])
+async def get_rooms_async(
+    location_id: Optional[int] = Query(None, description="Lọc theo khu trọ"),
+    room_type_id: Optional[int] = Query(None, description="Lọc theo loại phòng"),
+    status: Optional[RoomStatus] = Query(None, description="Lọc theo trạng thái"),
+    db: AsyncSession = Depends(get_async_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy danh sách phòng (AsyncSession)"""
+    result = await db.execute(_rooms_statement(location_id, room_type_id, status))
+    return _room_details(result.unique().scalars().all())
+
+
 @router.post("", response_model=RoomResponse, status_code=status.HTTP_201_CREATED)
 def create_room(
     room_in: RoomCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm phòng mới"""
     # Check location exists
@@ -79,31 +113,27 @@ def create_room(
                 detail="Không tìm thấy loại phòng trong khu này",
             )
     
-    # Check room_code unique in location
-    existing = db.query(Room).filter(
-        Room.location_id == room_in.location_id,
-        Room.room_code == room_in.room_code
-    ).first()
-    if existing:
+    room = Room(**room_in.model_dump())
+    db.add(room)
+    # room_code is unique per location (uq_rooms_location_code)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Mã phòng đã tồn tại trong khu này",
         )
     
-    room = Room(**room_in.model_dump())
-    db.add(room)
-    db.commit()
-    db.refresh(room)
-    
     # Auto create meters for room
     electric_meter = Meter(room_id=room.id, meter_type=MeterType.ELECTRIC)
     water_meter = Meter(room_id=room.id, meter_type=MeterType.WATER)
     db.add(electric_meter)
     db.add(water_meter)
+    refresh_summaries(db, tenant_keys(db, [room.id]))
     db.commit()
     
     # Load relationships
-    db.refresh(room)
     room = db.query(Room).options(
         joinedload(Room.location),
         joinedload(Room.room_type)
@@ -116,7 +146,7 @@ def create_room(
 def get_room(
     room_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết phòng"""
     room = db.query(Room).options(
@@ -138,12 +168,34 @@ def get_room(
     return room_data
 
 
+@router.get("/{room_id}/balance", response_model=RoomBalanceResponse)
+def get_room_balance(
+    room_id: int,
+    month: int = Query(..., description="Tháng"),
+    year: int = Query(..., description="Năm"),
+    db: Session = Depends(get_db),
+    _: None = Depends(require_auth)
+):
+    """Lấy số dư công nợ của phòng tại một tháng"""
+    room = db.query(Room).filter(Room.id == room_id).first()
+    if not room:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy phòng",
+        )
+    
+    balance = get_balance(db, room_id, month, year)
+    if balance is None:
+        return RoomBalanceResponse(room_id=room_id, month=month, year=year)
+    return balance
+
+
 @router.put("/{room_id}", response_model=RoomResponse)
 def update_room(
     room_id: int,
     room_in: RoomUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật phòng"""
     room = db.query(Room).options(
@@ -159,19 +211,6 @@ def update_room(
     
     update_data = room_in.model_dump(exclude_unset=True)
     
-    # Check room_code unique if updating
-    if "room_code" in update_data:
-        existing = db.query(Room).filter(
-            Room.location_id == room.location_id,
-            Room.room_code == update_data["room_code"],
-            Room.id != room_id
-        ).first()
-        if existing:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Mã phòng đã tồn tại trong khu này",
-            )
-    
     # Check room_type if updating
     if "room_type_id" in update_data and update_data["room_type_id"]:
         room_type = db.query(RoomType).filter(
@@ -187,7 +226,16 @@ def update_room(
     for field, value in update_data.items():
         setattr(room, field, value)
     
-    db.commit()
+    try:
+        if "status" in update_data:
+            refresh_summaries(db, tenant_keys(db, [room.id]))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Mã phòng đã tồn tại trong khu này",
+        )
     db.refresh(room)
     
     return room
@@ -197,7 +245,7 @@ def update_room(
 def delete_room(
     room_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Xóa phòng"""
     room = db.query(Room).filter(Room.id == room_id).first()
@@ -218,5 +266,8 @@ def delete_room(
             detail="Không thể xóa phòng đang có người thuê",
         )
     
+    # Hóa đơn bị xóa theo phòng: tính lại mọi tháng có hóa đơn và số phòng tháng này
+    keys = room_keys(db, [room.id])
     db.delete(room)
+    refresh_summaries(db, keys)
     db.commit()
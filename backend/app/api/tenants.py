@@ -1,7 +1,7 @@
 """
 Tenant API - Quản lý người thuê
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import date
@@ -9,35 +9,44 @@ from app.core.database import get_db
 from app.models.tenant import Tenant
 from app.models.room import Room, RoomStatus
 from app.schemas.tenant import TenantCreate, TenantUpdate, TenantResponse
-from app.api.deps import get_current_user
+from app.services.monthly_summary import refresh_summaries, tenant_keys
+from app.api.deps import require_auth
+from app.api.pagination import PageParams, paginate
 
 router = APIRouter(prefix="/tenants", tags=["Người thuê"])
 
 
 @router.get("", response_model=List[TenantResponse])
 def get_tenants(
+    response: Response,
     room_id: Optional[int] = Query(None, description="Lọc theo phòng"),
     is_active: Optional[bool] = Query(None, description="Lọc theo trạng thái"),
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy danh sách người thuê"""
-    query = db.query(Tenant).options(joinedload(Tenant.room))
+    query = db.query(Tenant)
     
     if room_id:
         query = query.filter(Tenant.room_id == room_id)
     if is_active is not None:
         query = query.filter(Tenant.is_active == is_active)
     
-    tenants = query.order_by(Tenant.full_name).all()
-    return tenants
+    return paginate(
+        query, Tenant, TenantResponse,
+        sort_keys=[(Tenant.full_name, False), (Tenant.id, False)],
+        page=page,
+        response=response,
+        options=[joinedload(Tenant.room)],
+    )
 
 
 @router.post("", response_model=TenantResponse, status_code=status.HTTP_201_CREATED)
 def create_tenant(
     tenant_in: TenantCreate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Thêm người thuê mới"""
     # Check room exists
@@ -54,6 +63,7 @@ def create_tenant(
     # Update room status to occupied
     room.status = RoomStatus.OCCUPIED
     
+    refresh_summaries(db, tenant_keys(db, [room.id]))
     db.commit()
     db.refresh(tenant)
     
@@ -67,7 +77,7 @@ def create_tenant(
 def get_tenant(
     tenant_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Lấy chi tiết người thuê"""
     tenant = db.query(Tenant).options(joinedload(Tenant.room)).filter(Tenant.id == tenant_id).first()
@@ -86,7 +96,7 @@ def update_tenant(
     tenant_id: int,
     tenant_in: TenantUpdate,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Cập nhật người thuê"""
     tenant = db.query(Tenant).options(joinedload(Tenant.room)).filter(Tenant.id == tenant_id).first()
@@ -118,9 +128,11 @@ def update_tenant(
         if other_tenants == 0:
             old_room.status = RoomStatus.VACANT
     
+    old_room_id = tenant.room_id
     for field, value in update_data.items():
         setattr(tenant, field, value)
     
+    refresh_summaries(db, tenant_keys(db, [old_room_id, tenant.room_id]))
     db.commit()
     db.refresh(tenant)
     
@@ -132,7 +144,7 @@ def move_out_tenant(
     tenant_id: int,
     move_out_date: Optional[date] = None,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Đánh dấu người thuê trả phòng"""
     tenant = db.query(Tenant).options(joinedload(Tenant.room)).filter(Tenant.id == tenant_id).first()
@@ -155,6 +167,7 @@ def move_out_tenant(
     if other_tenants == 0:
         room.status = RoomStatus.VACANT
     
+    refresh_summaries(db, tenant_keys(db, [room.id]))
     db.commit()
     db.refresh(tenant)
     
@@ -165,7 +178,7 @@ def move_out_tenant(
 def delete_tenant(
     tenant_id: int,
     db: Session = Depends(get_db),
-    _: None = Depends(get_current_user)
+    _: None = Depends(require_auth)
 ):
     """Xóa người thuê"""
     tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
@@ -188,6 +201,7 @@ def delete_tenant(
         ).count()
         if other_tenants == 0:
             room.status = RoomStatus.VACANT
+        refresh_summaries(db, tenant_keys(db, [room.id]))
     
     db.commit()
 
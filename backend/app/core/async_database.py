@@ -0,0 +1,54 @@
+"""
+Async database stack - AsyncSession cho các API đọc nhiều (bật bằng DB_ASYNC)
+
+Engine async chỉ được tạo khi dùng tới, nên khi DB_ASYNC tắt ứng dụng không
+cần asyncpg/aiosqlite. Dùng chung Settings về pool với engine đồng bộ.
+"""
+from typing import AsyncIterator, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.core.config import settings
+from app.core.database import engine_options
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def async_database_url(url: str) -> str:
+    """URL async tương ứng với DATABASE_URL (postgresql → asyncpg, sqlite → aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    global _engine, _session_factory
+    if _engine is None:
+        url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+        _engine = create_async_engine(url, **engine_options(url))
+        _session_factory = async_sessionmaker(_engine, autoflush=False, expire_on_commit=False)
+    return _engine
+
+
+def async_session_factory() -> async_sessionmaker:
+    get_async_engine()
+    return _session_factory
+
+
+async def dispose_async_engine() -> None:
+    """Đóng pool async (gọi khi tắt ứng dụng)"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        _session_factory = None
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Dependency to get an AsyncSession"""
+    async with async_session_factory()() as db:
+        yield db
@@ -1,17 +1,163 @@
 """
 Database configuration and session management
 """
-from sqlalchemy import create_engine
+import logging
+import threading
+import time
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVER_NAMES = ("asyncpg", "aiosqlite")
+
+
+class CheckoutStats:
+    """Thống kê thời gian chờ lấy kết nối từ pool (an toàn luồng)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.slow = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait * 1000 >= settings.DB_SLOW_CHECKOUT_MS:
+                self.slow += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            average = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow,
+                "avg_wait_ms": round(average * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+checkout_stats = CheckoutStats()
+
+
+class TimedPoolMixin:
+    """Đo thời gian chờ mỗi lần lấy kết nối từ pool vào checkout_stats
+
+    Đo ngay trong pool (không lấy kết nối sớm trong get_db) để request chỉ giữ
+    kết nối từ truy vấn đầu tiên, như trước.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            checkout_stats.record_timeout()
+            logger.error("Database pool exhausted after %.1fs: %s", time.perf_counter() - started, self.status())
+            raise
+        wait = time.perf_counter() - started
+        checkout_stats.record(wait)
+        if wait * 1000 >= settings.DB_SLOW_CHECKOUT_MS:
+            logger.warning("Slow database checkout: %.1f ms (%s)", wait * 1000, self.status())
+        return connection
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str) -> dict:
+    """Tham số create_engine theo Settings (pool, pre-ping, timeout, PgBouncer)
+
+    Pool được đo thời gian chờ (TimedQueuePool); SQLite trong bộ nhớ giữ mặc định
+    của SQLAlchemy. Ở chế độ PgBouncer (transaction pooling) ứng dụng không giữ
+    pool riêng, không gửi tham số khởi động `options` (PgBouncer từ chối) và tắt
+    prepared statement phía server của driver; statement_timeout khi đó cần đặt
+    trên role hoặc trong PgBouncer.
+    """
+    parsed = make_url(url)
+    driver = parsed.get_driver_name()
+    poolclass = TimedAsyncQueuePool if driver in ASYNC_DRIVER_NAMES else TimedQueuePool
+
+    if parsed.get_backend_name() == "sqlite":
+        in_memory = parsed.database in (None, "", ":memory:") or parsed.query.get("mode") == "memory"
+        return {} if in_memory else {"poolclass": poolclass}
+    if parsed.get_backend_name() != "postgresql":
+        return {}
+
+    connect_args = {}
+    if driver in ("psycopg2", "psycopg"):
+        connect_args["application_name"] = settings.DB_APPLICATION_NAME
+    elif driver == "asyncpg":
+        connect_args["server_settings"] = {"application_name": settings.DB_APPLICATION_NAME}
+
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "connect_args": connect_args}
+
+    if settings.DB_PGBOUNCER:
+        options["poolclass"] = NullPool
+        if driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+        elif driver == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_cache_size"] = 0
+        return options
+
+    options.update(
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        if driver == "asyncpg":
+            connect_args["server_settings"]["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        else:
+            connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
+def pool_status() -> dict:
+    """Trạng thái pool hiện tại kèm thống kê chờ kết nối (cho /health/db)"""
+    pool = engine.pool
+    state = {"pool": type(pool).__name__, **checkout_stats.snapshot()}
+    for name in ("size", "checkedout", "overflow"):
+        value = getattr(pool, name, None)
+        if callable(value):
+            state[name] = value()
+    return state
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -20,3 +166,42 @@ def get_db():
     finally:
         db.close()
 
+
+def warm_pool(connections: int = None) -> int:
+    """Mở sẵn vài kết nối để request đầu tiên không phải chờ bắt tay với CSDL
+
+    Không tạo hay sửa schema (việc đó thuộc bước manage.py migrate). Lỗi kết nối
+    chỉ được ghi log: ứng dụng vẫn khởi động và /health vẫn trả lời.
+    Trả về số kết nối đã mở thành công.
+    """
+    if connections is None:
+        connections = settings.DB_WARM_CONNECTIONS
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        logger.warning("Database pool warm-up failed: %s", exc)
+    finally:
+        for conn in opened:
+            conn.close()
+    return len(opened)
+
+
+def session_factory_for(db: Session) -> sessionmaker:
+    """Session factory on the same engine as db (for work that outlives the request session)"""
+    return sessionmaker(autocommit=False, autoflush=False, bind=db.get_bind())
+
+
+# INSERT ... ON CONFLICT DO UPDATE, for dialects that support it
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(db: Session):
+    """insert() hỗ trợ on_conflict_do_update của CSDL đang dùng, None nếu không có"""
+    return UPSERT_DIALECTS.get(db.get_bind().dialect.name)
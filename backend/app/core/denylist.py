@@ -0,0 +1,134 @@
+"""
+Token denylist - Danh sách phiên/người dùng bị chặn, giữ trong bộ nhớ
+
+Access token chỉ được kiểm tra chữ ký và hạn; để đăng xuất hoặc khóa tài khoản
+có hiệu lực trước khi token hết hạn, mỗi tiến trình giữ tập các phiên bị thu
+hồi (trong khoảng ACCESS_TOKEN_EXPIRE_MINUTES gần nhất) và người dùng bị khóa.
+Một luồng nền nạp lại hai tập này sau mỗi TOKEN_DENYLIST_REFRESH_SECONDS;
+thay đổi trong chính tiến trình được áp dụng ngay.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, FrozenSet, Optional
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.services.auth_tokens import revoked_sessions_since
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "denylist_users"
+
+
+class TokenDenylist:
+    """Tập phiên và người dùng bị chặn; đọc không cần khóa (thay cả tập khi cập nhật)"""
+
+    def __init__(self, session_factory: Callable[[], Session], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._sessions: FrozenSet[str] = frozenset()
+        self._users: FrozenSet[int] = frozenset()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshed_at: Optional[float] = None
+        self.failures = 0
+
+    def configure(self, session_factory: Optional[Callable[[], Session]] = None) -> None:
+        """Đổi session factory (dùng cho test hoặc CLI)"""
+        if session_factory is not None:
+            self.session_factory = session_factory
+
+    def is_denied(self, claims: dict) -> bool:
+        if claims.get("sid") in self._sessions:
+            return True
+        try:
+            return int(claims["sub"]) in self._users
+        except (KeyError, TypeError, ValueError):
+            return True
+
+    def deny_session(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions = self._sessions | {session_id}
+
+    def set_user_active(self, user_id: int, is_active: bool) -> None:
+        with self._lock:
+            self._users = self._users - {user_id} if is_active else self._users | {user_id}
+
+    def refresh(self) -> bool:
+        """Nạp lại từ CSDL; lỗi thì giữ tập cũ và trả về False"""
+        since = datetime.now(timezone.utc) - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES + 1)
+        db = self.session_factory()
+        try:
+            sessions = frozenset(revoked_sessions_since(db, since))
+            users = frozenset(db.execute(select(User.id).where(User.is_active == False)).scalars())
+        except Exception as exc:
+            self.failures += 1
+            logger.warning("Token denylist refresh failed: %s", exc)
+            return False
+        finally:
+            db.close()
+        with self._lock:
+            self._sessions = sessions
+            self._users = users
+            self.refreshed_at = time.monotonic()
+        return True
+
+    def start(self) -> None:
+        """Nạp lần đầu và chạy luồng nạp lại định kỳ"""
+        if self._thread is not None:
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="token-denylist", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "users": len(self._users),
+            "refresh_interval_seconds": self.interval,
+            "seconds_since_refresh": (
+                round(time.monotonic() - self.refreshed_at, 1) if self.refreshed_at is not None else None
+            ),
+            "refresh_failures": self.failures,
+        }
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+token_denylist = TokenDenylist(SessionLocal, settings.TOKEN_DENYLIST_REFRESH_SECONDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_user_status(session: Session, flush_context) -> None:
+    changed: Dict[int, bool] = {
+        obj.id: bool(obj.is_active) for obj in session.dirty
+        if isinstance(obj, User) and obj.id is not None
+    }
+    changed.update({obj.id: False for obj in session.deleted if isinstance(obj, User)})
+    if changed:
+        session.info.setdefault(PENDING_KEY, {}).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_status(session: Session) -> None:
+    for user_id, is_active in session.info.pop(PENDING_KEY, {}).items():
+        token_denylist.set_user_active(user_id, is_active)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_user_status(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
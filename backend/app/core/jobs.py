@@ -0,0 +1,239 @@
+"""
+Background job runner - Chạy tác vụ dài (tạo hóa đơn, nhập chỉ số) ngoài request
+
+Tác vụ được lưu trong bảng jobs và chạy trên một pool luồng trong chính
+tiến trình API, không cần message broker. Mỗi tác vụ dùng session riêng.
+Mỗi tác vụ ghi worker_id của tiến trình nhận nó và heartbeat_at được cập nhật
+định kỳ; tác vụ chưa xong mà tiến trình giữ đã dừng (không còn heartbeat) bị
+đánh dấu lỗi (recover_stale) thay vì treo mãi ở trạng thái chờ/đang chạy.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+JobHandler = Callable[[Session, dict, ProgressCallback], dict]
+
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+def job_handler(job_type: str):
+    """Đăng ký hàm xử lý cho một loại tác vụ"""
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+class JobRunner:
+    """Pool luồng chạy tác vụ nền, theo dõi tiến độ trong bộ nhớ"""
+    
+    def __init__(self, session_factory: Callable[[], Session], max_workers: int):
+        self.session_factory = session_factory
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._progress: Dict[int, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+        # Định danh lần chạy này của tiến trình (pid có thể được dùng lại sau khi khởi động lại)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def configure(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """Đổi session factory / số luồng (dùng cho test hoặc CLI)"""
+        if session_factory is not None:
+            self.session_factory = session_factory
+        if max_workers is not None and max_workers != self.max_workers:
+            self.shutdown()
+            self.max_workers = max_workers
+    
+    def submit(self, db: Session, job_type: str, params: dict) -> Job:
+        """Tạo bản ghi tác vụ và đưa vào hàng đợi"""
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+        
+        job = Job(
+            job_type=job_type,
+            params=params,
+            status=JobStatus.PENDING,
+            worker_id=self.worker_id,
+            heartbeat_at=datetime.now(timezone.utc),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        if self.max_workers > 0:
+            self._get_executor().submit(self._run, job.id)
+        else:
+            self._run(job.id)
+            db.refresh(job)
+        return job
+    
+    def heartbeat(self) -> None:
+        """Báo các tác vụ chưa xong của tiến trình này vẫn còn người giữ"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.worker_id == self.worker_id, Job.status.in_(ACTIVE_STATUSES))
+                .values(heartbeat_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Job heartbeat failed: %s", exc)
+        finally:
+            db.close()
+    
+    def recover_stale(self) -> int:
+        """Đánh dấu lỗi các tác vụ chờ/đang chạy mà tiến trình giữ chúng đã mất
+
+        Tác vụ của tiến trình khác (nhiều worker, khởi động lại lần lượt) chỉ bị
+        coi là mồ côi khi không có heartbeat trong JOB_STALE_SECONDS. Không chạy
+        lại tự động vì tác vụ có thể đã ghi một phần; người dùng gửi lại khi cần.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        db = self.session_factory()
+        try:
+            stale = db.query(Job).filter(
+                Job.status.in_(ACTIVE_STATUSES),
+                or_(Job.worker_id.is_(None), Job.worker_id != self.worker_id),
+                or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff),
+            ).all()
+            for job in stale:
+                job.status = JobStatus.FAILED
+                job.error = "Tác vụ bị gián đoạn do tiến trình xử lý đã dừng"
+                job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception as exc:
+            # Schema chưa migrate hoặc CSDL chưa sẵn sàng: không chặn khởi động
+            db.rollback()
+            logger.warning("Recovering interrupted jobs failed: %s", exc)
+            return 0
+        finally:
+            db.close()
+        if stale:
+            logger.warning("Marked %d interrupted job(s) as failed", len(stale))
+        return len(stale)
+    
+    def start(self) -> None:
+        """Dọn tác vụ mồ côi và chạy luồng heartbeat/dọn định kỳ"""
+        if self._thread is not None:
+            return
+        self.recover_stale()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="job-heartbeat", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Dừng luồng heartbeat (gọi sau shutdown, khi không còn tác vụ chạy)"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+    
+    def _loop(self) -> None:
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            self.heartbeat()
+            self.recover_stale()
+    
+    def progress(self, job_id: int) -> Optional[Tuple[int, int]]:
+        """Tiến độ hiện tại (done, total) của tác vụ đang chạy trong tiến trình này"""
+        with self._lock:
+            return self._progress.get(job_id)
+    
+    def shutdown(self) -> None:
+        """Dừng pool, chờ các tác vụ đang chạy kết thúc"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        return self._executor
+    
+    def _set_progress(self, job_id: int, done: int, total: int) -> None:
+        with self._lock:
+            self._progress[job_id] = (done, total)
+    
+    def _finish(
+        self,
+        db: Session,
+        job_id: int,
+        job_status: JobStatus,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Ghi kết quả cuối của tác vụ; lỗi/thất bại thì bỏ mọi thay đổi chưa commit trước"""
+        if job_status == JobStatus.FAILED:
+            db.rollback()
+        job = db.query(Job).filter(Job.id == job_id).first()
+        job.status = job_status
+        job.result = result
+        job.error = error
+        done, total = self.progress(job_id) or (0, 0)
+        job.progress_done = done
+        job.progress_total = total
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    
+    def _run(self, job_id: int) -> None:
+        db = self.session_factory()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return
+            job.status = JobStatus.RUNNING
+            job.started_at = job.heartbeat_at = datetime.now(timezone.utc)
+            db.commit()
+            
+            job_type = job.job_type
+            handler = JOB_HANDLERS[job_type]
+            params = dict(job.params or {})
+            self._set_progress(job_id, 0, 0)
+            
+            try:
+                result = handler(db, params, lambda done, total: self._set_progress(job_id, done, total))
+                # jobs.result is a JSON column: money as strings, enums as values
+                result = jsonable_encoder(result, custom_encoder={Decimal: str})
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, job_type)
+                self._finish(db, job_id, JobStatus.FAILED, error=str(e))
+                return
+            
+            try:
+                self._finish(db, job_id, JobStatus.SUCCEEDED, result=result)
+            except Exception as e:
+                # The handler's own writes go in this commit too: record the failure instead
+                logger.exception("Job %s (%s) could not be saved", job_id, job_type)
+                self._finish(db, job_id, JobStatus.FAILED, error=str(e))
+        finally:
+            with self._lock:
+                self._progress.pop(job_id, None)
+            db.close()
+
+
+job_runner = JobRunner(SessionLocal, settings.JOB_WORKERS)
@@ -0,0 +1,46 @@
+"""
+Schema migrations - Chạy Alembic từ code (manage.py migrate, seed_data)
+
+Ứng dụng không tạo bảng khi import; schema chỉ thay đổi qua bước migrate
+chạy riêng trước khi khởi động các worker.
+"""
+import logging
+import os
+from typing import Optional
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BASELINE_REVISION = "0001_baseline"
+
+
+def alembic_config(database_url: Optional[str] = None, configure_logger: bool = True) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["database_url"] = database_url or settings.DATABASE_URL
+    config.attributes["configure_logger"] = configure_logger
+    return config
+
+
+def run_migrations(database_url: Optional[str] = None, configure_logger: bool = True) -> None:
+    """Nâng schema lên bản mới nhất
+
+    CSDL cũ được tạo bằng create_all (có bảng nhưng chưa có alembic_version)
+    được đánh dấu ở bản gốc trước khi nâng cấp.
+    """
+    config = alembic_config(database_url, configure_logger)
+    engine = create_engine(config.attributes["database_url"])
+    try:
+        with engine.connect() as conn:
+            tables = set(inspect(conn).get_table_names())
+    finally:
+        engine.dispose()
+
+    if "users" in tables and "alembic_version" not in tables:
+        logger.info("Existing schema without migration history, stamping %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
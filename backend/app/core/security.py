@@ -1,13 +1,111 @@
 """
 Security utilities - JWT tokens and password hashing
 """
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple, TypeVar
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Any hash made with a different cost is reported by needs_update / verify_and_update
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """Hàng đợi băm mật khẩu đã đầy"""
+
+
+class PasswordHasher:
+    """Chạy bcrypt trên pool luồng riêng, có giới hạn hàng đợi
+
+    bcrypt nhả GIL nên các luồng này chạy song song thật, nhưng không chiếm
+    threadpool của Starlette: đợt đăng nhập dồn dập chỉ xếp hàng ở đây, các API
+    khác vẫn có luồng để chạy.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.pending = 0
+            self.running = 0
+            self.completed = 0
+            self.rejected = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.total_run = 0.0
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """Chạy func(*args) trên pool băm; PasswordHasherBusy nếu hàng đợi đầy"""
+        with self._lock:
+            if self.pending >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.total_wait += started - submitted
+                self.max_wait = max(self.max_wait, started - submitted)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.pending -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), task)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(đúng mật khẩu?, hash mới nếu độ khó đã đổi)"""
+        return await self.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(pwd_context.hash, password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "queued": self.pending - self.running,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / self.completed * 1000, 3) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "avg_run_ms": round(self.total_run / self.completed * 1000, 3) if self.completed else 0.0,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -20,23 +118,47 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token"""
+    """Create a short-lived JWT access token (claims: sub, sid nếu có, type, exp)"""
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "type": ACCESS_TOKEN_TYPE})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token"""
+def create_refresh_token(user_id: int, session_id: str, jti: str, expires_at: datetime) -> str:
+    """Create a JWT refresh token; jti trỏ tới dòng trong bảng refresh_tokens"""
+    return jwt.encode(
+        {"sub": str(user_id), "sid": session_id, "jti": jti, "exp": expires_at, "type": REFRESH_TOKEN_TYPE},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+def _decode_token(token: str, token_type: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if payload.get("type") != token_type:
+        return None
+    return payload
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """Decode and verify an access token (chỉ kiểm tra chữ ký và hạn, không chạm CSDL)"""
+    return _decode_token(token, ACCESS_TOKEN_TYPE)
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    """Decode and verify a refresh token (trạng thái thu hồi nằm trong CSDL)"""
+    return _decode_token(token, REFRESH_TOKEN_TYPE)
 
@@ -1,17 +1,44 @@
 """
 Minh Rental API - Main Application
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import auth, locations, room_types, rooms, tenants, meters, invoices, payments, expenses, dashboard
+from app.core.compression import CompressionMiddleware
+from app.core.async_database import dispose_async_engine
+from app.core.database import pool_status, warm_pool
+from app.core.denylist import token_denylist
+from app.core.jobs import job_runner
+from app.core.security import password_hasher
+from app.core.user_cache import user_cache
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.api import auth, locations, room_types, rooms, tenants, meters, invoices, payments, expenses, dashboard, jobs
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Khởi động: làm ấm pool kết nối (schema do manage.py migrate quản lý),
+    nạp denylist token, đóng các tác vụ nền mồ côi và chạy heartbeat tác vụ
+
+    Tắt: chờ các tác vụ nền đang chạy kết thúc rồi dừng heartbeat.
+    """
+    warm_pool()
+    token_denylist.start()
+    job_runner.start()
+    yield
+    token_denylist.stop()
+    job_runner.shutdown()
+    job_runner.stop()
+    password_hasher.shutdown()
+    await dispose_async_engine()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="API quản lý nhà trọ Cô Minh - 68 Nguyễn Viết Xuân",
@@ -26,8 +53,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Response compression (outermost middleware: sees the final body and headers)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    """Hết DB_POOL_TIMEOUT mà chưa lấy được kết nối: trả 503 thay vì 500"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Hệ thống đang quá tải, vui lòng thử lại sau"},
+    )
+
+
+# Async read endpoints shadow their sync twins when enabled (registered first, same paths)
+if settings.DB_ASYNC:
+    for module in (rooms, invoices, dashboard, meters):
+        app.include_router(module.async_router, prefix="/api/v1")
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(dashboard.router, prefix="/api/v1")
@@ -39,6 +90,7 @@ app.include_router(meters.router, prefix="/api/v1")
 app.include_router(invoices.router, prefix="/api/v1")
 app.include_router(payments.router, prefix="/api/v1")
 app.include_router(expenses.router, prefix="/api/v1")
+app.include_router(jobs.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -55,3 +107,27 @@ def root():
 def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/health/db")
+def database_health():
+    """Trạng thái pool kết nối và thời gian chờ lấy kết nối trong get_db"""
+    return pool_status()
+
+
+@app.get("/health/cache")
+def cache_health():
+    """Số lần trúng/trượt của cache người dùng đã xác thực"""
+    return user_cache.stats()
+
+
+@app.get("/health/denylist")
+def denylist_health():
+    """Kích thước và độ tươi của denylist token trong tiến trình này"""
+    return token_denylist.stats()
+
+
+@app.get("/health/passwords")
+def password_hasher_health():
+    """Hàng đợi và thời gian chờ của pool băm mật khẩu"""
+    return password_hasher.stats()
@@ -8,8 +8,12 @@ from app.models.room import Room
 from app.models.tenant import Tenant
 from app.models.meter import Meter, MeterReading
 from app.models.invoice import Invoice
+from app.models.room_balance import RoomBalance
 from app.models.payment import Payment
 from app.models.expense import Expense
+from app.models.monthly_summary import MonthlySummary
+from app.models.job import Job
+from app.models.refresh_token import RefreshToken
 
 __all__ = [
     "User",
@@ -20,6 +24,10 @@ __all__ = [
     "Meter",
     "MeterReading",
     "Invoice",
+    "RoomBalance",
     "Payment",
-    "Expense"
+    "Expense",
+    "MonthlySummary",
+    "Job",
+    "RefreshToken"
 ]
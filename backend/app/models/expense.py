@@ -1,10 +1,11 @@
 """
 Expense model - Chi tiêu
 """
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Date, Enum
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Date, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 import enum
 
 
@@ -17,6 +18,11 @@ class ExpenseCategory(str, enum.Enum):
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        # Month/range filters per location; expense_date alone serves unscoped ranges
+        Index("ix_expenses_location_date", "location_id", "expense_date"),
+        Index("ix_expenses_expense_date", "expense_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     location_id = Column(Integer, ForeignKey("locations.id"))  # Khu trọ (có thể null nếu chi chung)
@@ -26,7 +32,7 @@ class Expense(Base):
     expense_date = Column(Date, nullable=False)  # Ngày chi
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     location = relationship("Location", back_populates="expenses")
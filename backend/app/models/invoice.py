@@ -1,10 +1,11 @@
 """
 Invoice model - Hóa đơn
 """
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Enum, Date
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Enum, Date, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 import enum
 
 
@@ -16,6 +17,9 @@ class InvoiceStatus(str, enum.Enum):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        UniqueConstraint("room_id", "year", "month", name="uq_invoices_room_period"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
@@ -55,7 +59,7 @@ class Invoice(Base):
     payment_date = Column(Date)  # Ngày nộp tiền
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     room = relationship("Room", back_populates="invoices")
@@ -0,0 +1,32 @@
+"""
+Job model - Tác vụ nền
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, JSON
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"  # Đang chờ
+    RUNNING = "running"  # Đang chạy
+    SUCCEEDED = "succeeded"  # Hoàn thành
+    FAILED = "failed"  # Lỗi
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)  # Loại tác vụ: "generate_invoices", "import_readings"
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, index=True)
+    params = Column(JSON)  # Tham số đầu vào
+    result = Column(JSON)  # Kết quả trả về khi hoàn thành
+    error = Column(Text)  # Thông báo lỗi
+    progress_done = Column(Integer, default=0)  # Số mục đã xử lý
+    progress_total = Column(Integer, default=0)  # Tổng số mục
+    worker_id = Column(String(64))  # Tiến trình đang giữ tác vụ (máy:pid:mã lần chạy)
+    heartbeat_at = Column(DateTime(timezone=True))  # Lần cuối tiến trình giữ tác vụ báo còn sống
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -5,6 +5,7 @@ from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 
 
 class Location(Base):
@@ -33,9 +34,10 @@ class Location(Base):
     
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     rooms = relationship("Room", back_populates="location", cascade="all, delete-orphan")
     room_types = relationship("RoomType", back_populates="location", cascade="all, delete-orphan")
     expenses = relationship("Expense", back_populates="location", cascade="all, delete-orphan")
+    summaries = relationship("MonthlySummary", back_populates="location", cascade="all, delete-orphan")
@@ -1,10 +1,11 @@
 """
 Meter and MeterReading models - Đồng hồ điện nước
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Numeric, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 import enum
 
 
@@ -15,6 +16,9 @@ class MeterType(str, enum.Enum):
 
 class Meter(Base):
     __tablename__ = "meters"
+    __table_args__ = (
+        UniqueConstraint("room_id", "meter_type", name="uq_meters_room_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
@@ -30,6 +34,9 @@ class Meter(Base):
 
 class MeterReading(Base):
     __tablename__ = "meter_readings"
+    __table_args__ = (
+        UniqueConstraint("meter_id", "year", "month", name="uq_meter_readings_meter_period"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     meter_id = Column(Integer, ForeignKey("meters.id"), nullable=False)
@@ -39,7 +46,7 @@ class MeterReading(Base):
     new_reading = Column(Numeric(10, 2), nullable=False)  # Chỉ số mới
     consumption = Column(Numeric(10, 2))  # Số tiêu thụ (tự tính)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     meter = relationship("Meter", back_populates="readings")
@@ -0,0 +1,33 @@
+"""
+MonthlySummary model - Số liệu tổng hợp theo khu trọ và tháng
+"""
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.timestamps import updated_now
+
+
+class MonthlySummary(Base):
+    """Bảng đọc cho dashboard; location_id null là chi tiêu chung không thuộc khu nào"""
+    __tablename__ = "monthly_summary"
+    __table_args__ = (
+        UniqueConstraint("location_id", "year", "month", name="uq_monthly_summary_location_period"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"))
+    month = Column(Integer, nullable=False)  # Tháng
+    year = Column(Integer, nullable=False)  # Năm
+    invoice_count = Column(Integer, nullable=False, default=0)  # Số hóa đơn
+    total_income = Column(Numeric(14, 0), nullable=False, default=0)  # Tổng phải thu
+    total_collected = Column(Numeric(14, 0), nullable=False, default=0)  # Đã thu
+    total_pending = Column(Numeric(14, 0), nullable=False, default=0)  # Còn phải thu
+    total_expense = Column(Numeric(14, 0), nullable=False, default=0)  # Chi tiêu
+    room_count = Column(Integer, nullable=False, default=0)  # Số phòng (ảnh chụp khi tháng còn hiện hành)
+    occupied_rooms = Column(Integer, nullable=False, default=0)  # Phòng đang thuê
+    active_tenants = Column(Integer, nullable=False, default=0)  # Người đang thuê
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=updated_now())
+    
+    # Relationships
+    location = relationship("Location", back_populates="summaries")
@@ -0,0 +1,21 @@
+"""
+RefreshToken model - Refresh token đã cấp (để xoay vòng và thu hồi)
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class RefreshToken(Base):
+    """Mỗi lần đăng nhập mở một phiên; refresh token được thay mới mỗi lần dùng
+    nhưng giữ nguyên session_id, access token mang session_id để thu hồi theo phiên"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jti = Column(String(32), unique=True, index=True, nullable=False)  # Mã của token (claim jti)
+    session_id = Column(String(32), index=True, nullable=False)  # Phiên đăng nhập (claim sid)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    replaced_at = Column(DateTime(timezone=True))  # Đã được đổi sang token mới
+    revoked_at = Column(DateTime(timezone=True), index=True)  # Phiên bị thu hồi (đăng xuất, token bị dùng lại)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,10 +1,11 @@
 """
 Room model - Phòng trọ
 """
-from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, ForeignKey, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 import enum
 
 
@@ -15,6 +16,10 @@ class RoomStatus(str, enum.Enum):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        UniqueConstraint("location_id", "room_code", name="uq_rooms_location_code"),
+        Index("ix_rooms_status", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
@@ -24,7 +29,7 @@ class Room(Base):
     status = Column(Enum(RoomStatus), default=RoomStatus.VACANT)
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     location = relationship("Location", back_populates="rooms")
@@ -32,6 +37,7 @@ class Room(Base):
     tenants = relationship("Tenant", back_populates="room", cascade="all, delete-orphan")
     meters = relationship("Meter", back_populates="room", cascade="all, delete-orphan")
     invoices = relationship("Invoice", back_populates="room", cascade="all, delete-orphan")
+    balances = relationship("RoomBalance", back_populates="room", cascade="all, delete-orphan")
     
     @property
     def effective_price(self):
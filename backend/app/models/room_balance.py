@@ -0,0 +1,30 @@
+"""
+RoomBalance model - Sổ công nợ theo phòng
+"""
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.timestamps import updated_now
+
+
+class RoomBalance(Base):
+    """Số dư lũy kế của phòng theo từng tháng (dương = nợ, âm = thừa)"""
+    __tablename__ = "room_balances"
+    __table_args__ = (
+        UniqueConstraint("room_id", "year", "month", name="uq_room_balances_room_period"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    month = Column(Integer, nullable=False)  # Tháng
+    year = Column(Integer, nullable=False)  # Năm
+    opening_balance = Column(Numeric(12, 0), nullable=False, default=0)  # Số dư đầu kỳ (chuyển từ tháng trước)
+    charges = Column(Numeric(12, 0), nullable=False, default=0)  # Phát sinh trong tháng (tổng hóa đơn trừ số dư đầu kỳ)
+    payments = Column(Numeric(12, 0), nullable=False, default=0)  # Đã thu trong tháng
+    closing_balance = Column(Numeric(12, 0), nullable=False, default=0)  # Số dư cuối kỳ = đầu kỳ + phát sinh - đã thu
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
+    
+    # Relationships
+    room = relationship("Room", back_populates="balances")
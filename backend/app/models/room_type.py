@@ -5,6 +5,7 @@ from sqlalchemy import Column, Integer, String, Text, Numeric, DateTime, Foreign
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 
 
 class RoomType(Base):
@@ -18,7 +19,7 @@ class RoomType(Base):
     daily_deduction = Column(Numeric(10, 0), default=0)  # Tiền trừ mỗi ngày nghỉ
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     location = relationship("Location", back_populates="room_types")
@@ -1,14 +1,18 @@
 """
 Tenant model - Người thuê trọ
 """
-from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Date, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.timestamps import updated_now
 
 
 class Tenant(Base):
     __tablename__ = "tenants"
+    __table_args__ = (
+        Index("ix_tenants_room_active", "room_id", "is_active"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
@@ -20,7 +24,7 @@ class Tenant(Base):
     is_active = Column(Boolean, default=True)  # Còn đang thuê không
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=updated_now())
     
     # Relationships
     room = relationship("Room", back_populates="tenants")
@@ -0,0 +1,29 @@
+"""
+Timestamps - Mốc thời gian sửa dòng (updated_at)
+
+updated_at là mốc thay đổi mà ETag của conditional GET dựa vào. now() của
+SQLite (CURRENT_TIMESTAMP) chỉ chính xác tới giây, nên hai lần sửa trong cùng
+một giây cho cùng ETag và client nhận 304 với dữ liệu cũ. updated_now() là
+now() trên mọi CSDL, riêng SQLite được dịch thành STRFTIME tới mili giây. Chỉ
+các cột/lệnh ghi updated_at dùng nó; func.now() ở chỗ khác không bị ảnh hưởng.
+"""
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import DateTime
+
+
+class updated_now(FunctionElement):
+    """Thời điểm hiện tại cho updated_at (mili giây cả trên SQLite)"""
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(updated_now)
+def _updated_now(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(updated_now, "sqlite")
+def _updated_now_sqlite(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
@@ -2,8 +2,9 @@
 Dashboard schemas - Thống kê
 """
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from decimal import Decimal
+from app.schemas.money import Money
 
 
 class DashboardStats(BaseModel):
@@ -11,28 +12,68 @@ class DashboardStats(BaseModel):
     occupied_rooms: int = 0
     vacant_rooms: int = 0
     total_tenants: int = 0
-    total_income_this_month: Decimal = Decimal("0")
-    total_paid_this_month: Decimal = Decimal("0")
-    total_unpaid_this_month: Decimal = Decimal("0")
-    total_expense_this_month: Decimal = Decimal("0")
+    total_income_this_month: Money = Decimal("0")
+    total_paid_this_month: Money = Decimal("0")
+    total_unpaid_this_month: Money = Decimal("0")
+    total_expense_this_month: Money = Decimal("0")
 
 
 class UnpaidInvoice(BaseModel):
     id: int
     room_code: str
     location_name: str
-    total: Decimal
-    paid_amount: Decimal
-    remaining: Decimal
+    total: Money
+    paid_amount: Money
+    remaining: Money
+
+
+class LocationSummary(BaseModel):
+    location_id: Optional[int] = None  # None = chi tiêu chung
+    location_name: Optional[str] = None
+    invoice_count: int = 0
+    total_income: Money = Decimal("0")
+    total_collected: Money = Decimal("0")
+    total_pending: Money = Decimal("0")
+    total_expense: Money = Decimal("0")
+    room_count: int = 0
+    occupied_rooms: int = 0
+    active_tenants: int = 0
+
+    class Config:
+        from_attributes = True
 
 
 class MonthlyReport(BaseModel):
     month: int
     year: int
-    total_income: Decimal = Decimal("0")
-    total_collected: Decimal = Decimal("0")
-    total_pending: Decimal = Decimal("0")
-    total_expense: Decimal = Decimal("0")
-    net_income: Decimal = Decimal("0")
+    total_income: Money = Decimal("0")
+    total_collected: Money = Decimal("0")
+    total_pending: Money = Decimal("0")
+    total_expense: Money = Decimal("0")
+    net_income: Money = Decimal("0")
     unpaid_invoices: List[UnpaidInvoice] = []
+    locations: List[LocationSummary] = []
+
+
+
+class RoomProfitColumns(BaseModel):
+    """Doanh thu theo phòng trong khoảng tháng, dạng cột (mỗi danh sách cùng độ dài)"""
+    room_id: List[int] = []
+    room_code: List[str] = []
+    location_name: List[str] = []
+    revenue: List[Money] = []  # Phát sinh (không tính nợ/thừa chuyển kỳ)
+    collected: List[Money] = []
+    invoiced_months: List[int] = []
+    vacant_months: List[int] = []  # Số tháng không có hóa đơn
+
 
+class RangeReport(BaseModel):
+    """Báo cáo nhiều tháng dạng cột: phần tử thứ i của mỗi danh sách ứng với periods[i]"""
+    periods: List[str] = []  # "YYYY-MM"
+    income: List[Money] = []  # Tiền phát sinh trong tháng, không tính nợ/thừa chuyển sang
+    collected: List[Money] = []
+    pending: List[Money] = []  # income - collected
+    collection_rate: List[Optional[float]] = []  # collected / income, None khi không có hóa đơn
+    expense: List[Money] = []
+    expense_by_category: Dict[str, List[Money]] = {}
+    rooms: RoomProfitColumns = RoomProfitColumns()
@@ -4,7 +4,7 @@ Expense schemas - Chi tiêu
 from pydantic import BaseModel
 from datetime import datetime, date
 from typing import Optional
-from decimal import Decimal
+from app.schemas.money import Money
 from app.models.expense import ExpenseCategory
 
 
@@ -12,7 +12,7 @@ class ExpenseBase(BaseModel):
     location_id: Optional[int] = None
     category: ExpenseCategory = ExpenseCategory.OTHER
     description: str
-    amount: Decimal
+    amount: Money
     expense_date: date
     notes: Optional[str] = None
 
@@ -25,7 +25,7 @@ class ExpenseUpdate(BaseModel):
     location_id: Optional[int] = None
     category: Optional[ExpenseCategory] = None
     description: Optional[str] = None
-    amount: Optional[Decimal] = None
+    amount: Optional[Money] = None
     expense_date: Optional[date] = None
     notes: Optional[str] = None
 
@@ -37,3 +37,12 @@ class ExpenseResponse(ExpenseBase):
     class Config:
         from_attributes = True
 
+
+
+class ExpenseMonthTotal(BaseModel):
+    """Tổng chi theo tháng và loại"""
+    year: int
+    month: int
+    category: ExpenseCategory
+    count: int
+    total: Money
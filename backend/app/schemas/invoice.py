@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from datetime import datetime, date
 from typing import Optional, List
 from decimal import Decimal
+from app.schemas.money import Money
 from app.models.invoice import InvoiceStatus
 
 
@@ -19,36 +20,36 @@ class InvoiceCreate(BaseModel):
     room_id: int
     month: int
     year: int
-    room_fee: Decimal
+    room_fee: Money
     absent_days: int = 0
-    absent_deduction: Decimal = Decimal("0")
-    electric_fee: Decimal = Decimal("0")
-    water_fee: Decimal = Decimal("0")
-    garbage_fee: Decimal = Decimal("0")
-    wifi_fee: Decimal = Decimal("0")
-    tv_fee: Decimal = Decimal("0")
-    laundry_fee: Decimal = Decimal("0")
-    other_fee: Decimal = Decimal("0")
+    absent_deduction: Money = Decimal("0")
+    electric_fee: Money = Decimal("0")
+    water_fee: Money = Decimal("0")
+    garbage_fee: Money = Decimal("0")
+    wifi_fee: Money = Decimal("0")
+    tv_fee: Money = Decimal("0")
+    laundry_fee: Money = Decimal("0")
+    other_fee: Money = Decimal("0")
     other_fee_note: Optional[str] = None
-    previous_debt: Decimal = Decimal("0")
-    previous_credit: Decimal = Decimal("0")
+    previous_debt: Money = Decimal("0")
+    previous_credit: Money = Decimal("0")
     notes: Optional[str] = None
 
 
 class InvoiceUpdate(BaseModel):
-    room_fee: Optional[Decimal] = None
+    room_fee: Optional[Money] = None
     absent_days: Optional[int] = None
-    absent_deduction: Optional[Decimal] = None
-    electric_fee: Optional[Decimal] = None
-    water_fee: Optional[Decimal] = None
-    garbage_fee: Optional[Decimal] = None
-    wifi_fee: Optional[Decimal] = None
-    tv_fee: Optional[Decimal] = None
-    laundry_fee: Optional[Decimal] = None
-    other_fee: Optional[Decimal] = None
+    absent_deduction: Optional[Money] = None
+    electric_fee: Optional[Money] = None
+    water_fee: Optional[Money] = None
+    garbage_fee: Optional[Money] = None
+    wifi_fee: Optional[Money] = None
+    tv_fee: Optional[Money] = None
+    laundry_fee: Optional[Money] = None
+    other_fee: Optional[Money] = None
     other_fee_note: Optional[str] = None
-    previous_debt: Optional[Decimal] = None
-    previous_credit: Optional[Decimal] = None
+    previous_debt: Optional[Money] = None
+    previous_credit: Optional[Money] = None
     status: Optional[InvoiceStatus] = None
     payment_date: Optional[date] = None
     notes: Optional[str] = None
@@ -68,23 +69,23 @@ class InvoiceResponse(BaseModel):
     room_id: int
     month: int
     year: int
-    room_fee: Decimal
+    room_fee: Money
     absent_days: int
-    absent_deduction: Decimal
-    electric_fee: Decimal
-    water_fee: Decimal
-    garbage_fee: Decimal
-    wifi_fee: Decimal
-    tv_fee: Decimal
-    laundry_fee: Decimal
-    other_fee: Decimal
+    absent_deduction: Money
+    electric_fee: Money
+    water_fee: Money
+    garbage_fee: Money
+    wifi_fee: Money
+    tv_fee: Money
+    laundry_fee: Money
+    other_fee: Money
     other_fee_note: Optional[str] = None
-    previous_debt: Decimal
-    previous_credit: Decimal
-    total: Decimal
-    paid_amount: Decimal
-    remaining_debt: Decimal
-    remaining_credit: Decimal
+    previous_debt: Money
+    previous_credit: Money
+    total: Money
+    paid_amount: Money
+    remaining_debt: Money
+    remaining_credit: Money
     status: InvoiceStatus
     payment_date: Optional[date] = None
     notes: Optional[str] = None
@@ -93,3 +94,54 @@ class InvoiceResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class InvoicePreviewItem(BaseModel):
+    """Bảng tính phí dự kiến của một phòng (xem trước, chưa ghi DB)"""
+    room_id: int
+    room_code: str
+    location_id: int
+    room_fee: Money
+    electric_fee: Money
+    water_fee: Money
+    garbage_fee: Money
+    wifi_fee: Money
+    tv_fee: Money
+    laundry_fee: Money
+    previous_debt: Money
+    previous_credit: Money
+    total: Money
+
+
+class InvoicePreviewDiff(InvoicePreviewItem):
+    """So sánh hóa đơn hiện có với kết quả tính lại (giữ ngày vắng và phí khác đã nhập)"""
+    absent_days: int = 0
+    absent_deduction: Money = Decimal("0")
+    other_fee: Money = Decimal("0")
+    invoice_id: int
+    current_total: Money
+    difference: Money
+
+
+class InvoicePreviewTotals(BaseModel):
+    count: int = 0
+    room_fee: Money = Decimal("0")
+    electric_fee: Money = Decimal("0")
+    water_fee: Money = Decimal("0")
+    fixed_fees: Money = Decimal("0")  # Rác + wifi + TV + giặt
+    previous_debt: Money = Decimal("0")
+    previous_credit: Money = Decimal("0")
+    total: Money = Decimal("0")
+
+
+class InvoiceRecalculation(BaseModel):
+    """Hóa đơn được tính lại sau khi sửa chỉ số"""
+    invoice_id: int
+    room_id: int
+    month: int
+    year: int
+    electric_fee: Money
+    water_fee: Money
+    old_total: Money
+    new_total: Money
+    later_invoices_updated: int = 0  # Số hóa đơn tháng sau được chuyển nợ lại
@@ -0,0 +1,28 @@
+"""
+Job schemas - Tác vụ nền
+"""
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any
+from app.models.job import JobStatus
+
+
+class JobSubmitted(BaseModel):
+    job_id: int
+    status: JobStatus
+
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: JobStatus
+    progress_done: int = 0
+    progress_total: int = 0
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
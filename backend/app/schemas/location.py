@@ -5,14 +5,15 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List
 from decimal import Decimal
+from app.schemas.money import Money
 
 
 class RoomTypeInLocation(BaseModel):
     id: int
     code: str
     name: Optional[str] = None
-    price: Decimal
-    daily_deduction: Decimal
+    price: Money
+    daily_deduction: Money
 
     class Config:
         from_attributes = True
@@ -24,11 +25,11 @@ class LocationBase(BaseModel):
     owner_name: Optional[str] = None
     owner_phone: Optional[str] = None
     electric_price: Decimal = Decimal("3500")
-    water_price: Decimal = Decimal("8000")
-    garbage_fee: Decimal = Decimal("30000")
-    wifi_fee: Decimal = Decimal("0")
-    tv_fee: Decimal = Decimal("0")
-    laundry_fee: Decimal = Decimal("0")
+    water_price: Money = Decimal("8000")
+    garbage_fee: Money = Decimal("30000")
+    wifi_fee: Money = Decimal("0")
+    tv_fee: Money = Decimal("0")
+    laundry_fee: Money = Decimal("0")
     payment_due_day: int = 5
     notes: Optional[str] = None
 
@@ -43,11 +44,11 @@ class LocationUpdate(BaseModel):
     owner_name: Optional[str] = None
     owner_phone: Optional[str] = None
     electric_price: Optional[Decimal] = None
-    water_price: Optional[Decimal] = None
-    garbage_fee: Optional[Decimal] = None
-    wifi_fee: Optional[Decimal] = None
-    tv_fee: Optional[Decimal] = None
-    laundry_fee: Optional[Decimal] = None
+    water_price: Optional[Money] = None
+    garbage_fee: Optional[Money] = None
+    wifi_fee: Optional[Money] = None
+    tv_fee: Optional[Money] = None
+    laundry_fee: Optional[Money] = None
     payment_due_day: Optional[int] = None
     notes: Optional[str] = None
 
@@ -6,6 +6,7 @@ from datetime import datetime
 from typing import Optional, List
 from decimal import Decimal
 from app.models.meter import MeterType
+from app.schemas.invoice import InvoiceRecalculation
 
 
 class MeterCreate(BaseModel):
@@ -19,14 +20,14 @@ class MeterReadingCreate(BaseModel):
     meter_id: int
     month: int
     year: int
-    old_reading: Decimal
+    old_reading: Optional[Decimal] = None  # Bỏ trống = lấy chỉ số mới của kỳ trước
     new_reading: Decimal
 
 
 class MeterReadingBatchItem(BaseModel):
     room_id: int
     meter_type: MeterType
-    old_reading: Decimal
+    old_reading: Optional[Decimal] = None  # Bỏ trống = lấy chỉ số mới của kỳ trước
     new_reading: Decimal
 
 
@@ -55,6 +56,23 @@ class MeterReadingResponse(BaseModel):
         from_attributes = True
 
 
+class ReadingChainMismatch(BaseModel):
+    """Chỉ số cũ gửi lên khác chỉ số mới của kỳ trước đã lưu"""
+    meter_id: int
+    room_id: int
+    meter_type: MeterType
+    old_reading: Decimal
+    previous_reading: Decimal
+
+
+class MeterReadingCreateResponse(MeterReadingResponse):
+    mismatch: Optional[ReadingChainMismatch] = None
+
+
+class MeterReadingUpdateResponse(MeterReadingResponse):
+    recalculated: List[InvoiceRecalculation] = []
+
+
 class MeterResponse(BaseModel):
     id: int
     room_id: int
@@ -0,0 +1,28 @@
+"""
+Money type - Kiểu tiền dùng chung cho các schema
+
+Mọi cột tiền là VND nguyên đồng (Numeric(x, 0)). Khi xuất JSON, số tiền luôn là
+chuỗi số nguyên ("1500000"), kể cả giá trị tính trong Python như
+Decimal("52500.00") hay Decimal("1.5E+6"); đầu vào vẫn nhận như Decimal. Phần
+lẻ được làm tròn nửa lên (ROUND_HALF_UP) như NUMERIC của PostgreSQL khi lưu, để
+số trả về khớp số được ghi.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from pydantic import PlainSerializer
+from typing_extensions import Annotated
+
+WHOLE = Decimal("1")
+
+
+def round_money(value: Decimal) -> Decimal:
+    """Làm tròn tới đồng, nửa đồng làm tròn lên (như Numeric(x, 0) khi lưu)"""
+    return value.quantize(WHOLE, rounding=ROUND_HALF_UP)
+
+
+def format_money(value: Decimal) -> str:
+    """Chuỗi số nguyên đồng, không mũ, không phần thập phân"""
+    # Số mũ 0 sau quantize nên str() không bao giờ ra dạng 1.5E+6
+    return str(round_money(value))
+
+
+Money = Annotated[Decimal, PlainSerializer(format_money, return_type=str, when_used="json")]
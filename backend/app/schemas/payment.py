@@ -4,12 +4,12 @@ Payment schemas - Thanh toán
 from pydantic import BaseModel
 from datetime import datetime, date
 from typing import Optional
-from decimal import Decimal
+from app.schemas.money import Money
 
 
 class PaymentCreate(BaseModel):
     invoice_id: int
-    amount: Decimal
+    amount: Money
     payment_date: date
     notes: Optional[str] = None
 
@@ -17,7 +17,7 @@ class PaymentCreate(BaseModel):
 class PaymentResponse(BaseModel):
     id: int
     invoice_id: int
-    amount: Decimal
+    amount: Money
     payment_date: date
     notes: Optional[str] = None
     created_at: datetime
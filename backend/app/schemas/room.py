@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional, List
 from decimal import Decimal
+from app.schemas.money import Money
 from app.models.room import RoomStatus
 
 
@@ -12,7 +13,7 @@ class RoomBase(BaseModel):
     location_id: int
     room_type_id: Optional[int] = None
     room_code: str
-    price: Optional[Decimal] = None  # Giá riêng (nếu khác loại phòng)
+    price: Optional[Money] = None  # Giá riêng (nếu khác loại phòng)
     notes: Optional[str] = None
 
 
@@ -23,7 +24,7 @@ class RoomCreate(RoomBase):
 class RoomUpdate(BaseModel):
     room_type_id: Optional[int] = None
     room_code: Optional[str] = None
-    price: Optional[Decimal] = None
+    price: Optional[Money] = None
     status: Optional[RoomStatus] = None
     notes: Optional[str] = None
 
@@ -42,8 +43,8 @@ class RoomTypeBrief(BaseModel):
     id: int
     code: str
     name: Optional[str] = None
-    price: Decimal
-    daily_deduction: Decimal
+    price: Money
+    daily_deduction: Money
 
     class Config:
         from_attributes = True
@@ -53,11 +54,11 @@ class LocationBrief(BaseModel):
     id: int
     name: str
     electric_price: Decimal
-    water_price: Decimal
-    garbage_fee: Decimal
-    wifi_fee: Decimal
-    tv_fee: Decimal
-    laundry_fee: Decimal
+    water_price: Money
+    garbage_fee: Money
+    wifi_fee: Money
+    tv_fee: Money
+    laundry_fee: Money
 
     class Config:
         from_attributes = True
@@ -69,7 +70,7 @@ class RoomResponse(RoomBase):
     created_at: datetime
     location: Optional[LocationBrief] = None
     room_type: Optional[RoomTypeBrief] = None
-    effective_price: Optional[Decimal] = None
+    effective_price: Optional[Money] = None
 
     class Config:
         from_attributes = True
@@ -80,3 +81,17 @@ class RoomWithDetails(RoomResponse):
 
     class Config:
         from_attributes = True
+
+
+class RoomBalanceResponse(BaseModel):
+    """Số dư công nợ của phòng (dương = nợ, âm = thừa)"""
+    room_id: int
+    month: int
+    year: int
+    opening_balance: Money = Decimal("0")
+    charges: Money = Decimal("0")
+    payments: Money = Decimal("0")
+    closing_balance: Money = Decimal("0")
+
+    class Config:
+        from_attributes = True
@@ -5,14 +5,15 @@ from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
 from decimal import Decimal
+from app.schemas.money import Money
 
 
 class RoomTypeBase(BaseModel):
     location_id: int
     code: str  # A, B, C, D, E, F, G, H
     name: Optional[str] = None
-    price: Decimal
-    daily_deduction: Decimal = Decimal("0")  # Tiền trừ/ngày nghỉ
+    price: Money
+    daily_deduction: Money = Decimal("0")  # Tiền trừ/ngày nghỉ
     description: Optional[str] = None
 
 
@@ -23,8 +24,8 @@ class RoomTypeCreate(RoomTypeBase):
 class RoomTypeUpdate(BaseModel):
     code: Optional[str] = None
     name: Optional[str] = None
-    price: Optional[Decimal] = None
-    daily_deduction: Optional[Decimal] = None
+    price: Optional[Money] = None
+    daily_deduction: Optional[Money] = None
     description: Optional[str] = None
 
 
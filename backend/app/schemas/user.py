@@ -30,6 +30,12 @@ class UserResponse(BaseModel):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
+    expires_in: int  # Số giây access token còn hiệu lực
     user: UserResponse
 
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
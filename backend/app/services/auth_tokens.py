@@ -0,0 +1,98 @@
+"""
+Auth tokens - Cấp, xoay vòng và thu hồi refresh token
+
+Access token sống ngắn (ACCESS_TOKEN_EXPIRE_MINUTES) và được kiểm tra hoàn
+toàn trong bộ nhớ; refresh token được lưu theo jti trong bảng refresh_tokens.
+Mỗi lần làm mới, token cũ bị đánh dấu đã thay và token mới giữ nguyên phiên
+(session_id). Một refresh token đã thay mà bị dùng lại nghĩa là token bị lộ:
+cả phiên bị thu hồi.
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def issue_tokens(db: Session, user: User, session_id: Optional[str] = None) -> Tuple[str, str]:
+    """Cấp cặp (access token, refresh token) mới (chưa commit)"""
+    session_id = session_id or uuid.uuid4().hex
+    jti = uuid.uuid4().hex
+    expires_at = _now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    db.add(RefreshToken(jti=jti, session_id=session_id, user_id=user.id, expires_at=expires_at))
+    access_token = create_access_token(data={"sub": str(user.id), "sid": session_id})
+    return access_token, create_refresh_token(user.id, session_id, jti, expires_at)
+
+
+def revoke_session(db: Session, session_id: str) -> int:
+    """Thu hồi mọi refresh token của một phiên (chưa commit); trả về số dòng"""
+    result = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.session_id == session_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_now())
+    )
+    return result.rowcount
+
+
+def rotate_refresh_token(db: Session, claims: dict) -> Optional[Tuple[User, str, str]]:
+    """Đổi refresh token hợp lệ lấy cặp token mới (chưa commit)
+
+    Trả về None nếu token không còn dùng được; token đã thay bị dùng lại thì
+    thu hồi cả phiên.
+    """
+    now = _now()
+    token = db.execute(
+        select(RefreshToken).where(RefreshToken.jti == claims.get("jti"))
+    ).scalar_one_or_none()
+    if token is None or token.revoked_at is not None:
+        return None
+    if token.replaced_at is not None:
+        revoke_session(db, token.session_id)
+        return None
+
+    # Expiry and the "not yet replaced" check in SQL: one atomic claim of the row,
+    # so two concurrent refreshes cannot both succeed
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == token.id,
+            RefreshToken.replaced_at.is_(None),
+            RefreshToken.expires_at > now,
+        )
+        .values(replaced_at=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        return None
+
+    user = db.get(User, token.user_id)
+    if user is None or not user.is_active:
+        revoke_session(db, token.session_id)
+        return None
+    access_token, refresh_token = issue_tokens(db, user, session_id=token.session_id)
+    return user, access_token, refresh_token
+
+
+def revoked_sessions_since(db: Session, since: datetime) -> set:
+    """Các phiên bị thu hồi từ thời điểm since (access token của chúng có thể còn hạn)"""
+    return set(db.execute(
+        select(RefreshToken.session_id).where(RefreshToken.revoked_at >= since).distinct()
+    ).scalars())
+
+
+def prune_refresh_tokens(db: Session) -> int:
+    """Xóa refresh token đã hết hạn, hoặc bị thu hồi lâu hơn thời hạn access token"""
+    cutoff = _now() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    result = db.execute(
+        delete(RefreshToken).where(or_(RefreshToken.expires_at < _now(), RefreshToken.revoked_at < cutoff))
+    )
+    db.commit()
+    return result.rowcount
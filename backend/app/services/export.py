@@ -0,0 +1,109 @@
+"""
+Export service - Xuất dữ liệu ra CSV/Excel theo luồng
+
+Dòng dữ liệu được đọc bằng server-side cursor (yield_per) và ghi ra từng
+khối, nên bộ nhớ không phụ thuộc số dòng xuất.
+"""
+import csv
+import enum
+import io
+import tempfile
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+EXPORT_BATCH_SIZE = 1000  # Số dòng mỗi lần đọc từ DB / ghi ra luồng
+FILE_CHUNK_SIZE = 64 * 1024
+
+ExportColumn = Tuple[str, Any]  # (tiêu đề cột, cột/biểu thức SQL)
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _iter_rows(
+    session_factory: Callable[[], Session],
+    build_query: Callable[[Session], Query],
+    columns: Sequence[ExportColumn],
+) -> Iterator[List[Any]]:
+    """Đọc dòng bằng session riêng (session của request đã đóng khi stream)"""
+    db = session_factory()
+    try:
+        query = build_query(db).with_entities(*[column for _, column in columns])
+        for row in query.yield_per(EXPORT_BATCH_SIZE):
+            yield [_cell(value) for value in row]
+    finally:
+        db.close()
+
+
+def _stream_csv(rows: Iterator[List[Any]], headers: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel opens UTF-8 (Vietnamese) text correctly
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _stream_xlsx(rows: Iterator[List[Any]], headers: List[str], sheet_name: str) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    # Write-only mode keeps rows on disk instead of in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def export_response(
+    session_factory: Callable[[], Session],
+    build_query: Callable[[Session], Query],
+    columns: Sequence[ExportColumn],
+    export_format: ExportFormat,
+    filename: str,
+    sheet_name: str,
+) -> StreamingResponse:
+    """Tạo response tải file CSV/XLSX từ một truy vấn"""
+    headers = [title for title, _ in columns]
+    rows = _iter_rows(session_factory, build_query, columns)
+    if export_format == ExportFormat.XLSX:
+        body = _stream_xlsx(rows, headers, sheet_name)
+    else:
+        body = _stream_csv(rows, headers)
+
+    return StreamingResponse(
+        body,
+        media_type=CONTENT_TYPES[export_format.value],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
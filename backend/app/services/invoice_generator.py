@@ -0,0 +1,372 @@
+"""
+Invoice generator - Tính hóa đơn tháng theo lô
+
+Toàn bộ dữ liệu cần thiết (phòng, đồng hồ, chỉ số, hóa đơn tháng trước,
+hóa đơn đã có) được nạp bằng vài truy vấn gộp, phí được tính trong bộ nhớ
+và hóa đơn mới được ghi bằng một lệnh INSERT hàng loạt.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Row, and_, insert, select
+from sqlalchemy.orm import Session, joinedload
+from app.core.config import settings
+from app.core.database import session_factory_for
+from app.core.jobs import ProgressCallback, job_handler
+from app.models.invoice import Invoice
+from app.models.location import Location
+from app.models.meter import Meter, MeterReading, MeterType
+from app.models.room import Room, RoomStatus
+from app.services.ledger import opening_balances, record_new_invoices, split_balance
+from app.services.monthly_summary import refresh_invoice_summaries
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InvoicePlan:
+    """Danh sách hóa đơn sẽ được tạo cho một tháng (chưa ghi DB)"""
+    month: int
+    year: int
+    items: List[Tuple[Room, dict]] = field(default_factory=list)  # (phòng, giá trị cột Invoice)
+    skipped: List[str] = field(default_factory=list)  # Mã phòng đã có hóa đơn
+    # (phòng, giá trị tính lại, id hóa đơn hiện có, tổng hiện có) - chỉ khi with_diff
+    diffs: List[Tuple[Room, dict, int, Decimal]] = field(default_factory=list)
+
+    @property
+    def created(self) -> List[str]:
+        return [room.room_code for room, _ in self.items]
+
+
+def get_room_fee(room: Room) -> Decimal:
+    """Giá phòng thực tế (ưu tiên giá riêng, không thì lấy giá từ loại phòng)"""
+    if room.price:
+        return room.price
+    if room.room_type:
+        return room.room_type.price
+    return Decimal("0")
+
+
+def meter_fee(consumption: Optional[Decimal], price: Optional[Decimal]) -> Decimal:
+    """Tiền điện/nước = số tiêu thụ x đơn giá"""
+    if consumption and price:
+        return consumption * price
+    return Decimal("0")
+
+
+def calculate_invoice_values(
+    room: Room,
+    location: Location,
+    month: int,
+    year: int,
+    electric_consumption: Optional[Decimal] = None,
+    water_consumption: Optional[Decimal] = None,
+    previous_debt: Decimal = Decimal("0"),
+    previous_credit: Decimal = Decimal("0"),
+    absent_days: int = 0,
+    absent_deduction: Decimal = Decimal("0"),
+    other_fee: Decimal = Decimal("0"),
+) -> dict:
+    """Tính các khoản phí của hóa đơn, trả về giá trị các cột Invoice
+
+    Hóa đơn mới không có ngày vắng hay phí khác; khi tính lại hóa đơn đã có để
+    so sánh, các khoản nhập tay này được giữ nguyên từ hóa đơn hiện tại.
+    """
+    room_fee = get_room_fee(room)
+
+    electric_fee = meter_fee(electric_consumption, location.electric_price)
+    water_fee = meter_fee(water_consumption, location.water_price)
+
+    # Fixed fees from location
+    garbage_fee = location.garbage_fee or Decimal("0")
+    wifi_fee = location.wifi_fee or Decimal("0")
+    tv_fee = location.tv_fee or Decimal("0")
+    laundry_fee = location.laundry_fee or Decimal("0")
+
+    total = (
+        room_fee -
+        absent_deduction +
+        electric_fee +
+        water_fee +
+        garbage_fee +
+        wifi_fee +
+        tv_fee +
+        laundry_fee +
+        other_fee +
+        previous_debt -
+        previous_credit
+    )
+
+    return {
+        "room_id": room.id,
+        "month": month,
+        "year": year,
+        "room_fee": room_fee,
+        "absent_days": absent_days,
+        "absent_deduction": absent_deduction,
+        "electric_fee": electric_fee,
+        "water_fee": water_fee,
+        "garbage_fee": garbage_fee,
+        "wifi_fee": wifi_fee,
+        "tv_fee": tv_fee,
+        "laundry_fee": laundry_fee,
+        "other_fee": other_fee,
+        "previous_debt": previous_debt,
+        "previous_credit": previous_credit,
+        "total": total,
+        "remaining_debt": max(total, Decimal("0")),
+        "remaining_credit": max(-total, Decimal("0")),
+    }
+
+
+def _room_filter(location_id: Optional[int]):
+    """Điều kiện lọc phòng đang thuê (dùng chung cho các truy vấn gộp)"""
+    conditions = [Room.status == RoomStatus.OCCUPIED]
+    if location_id:
+        conditions.append(Room.location_id == location_id)
+    return and_(*conditions)
+
+
+def load_consumptions(
+    db: Session,
+    room_filter,
+    month: int,
+    year: int,
+) -> Dict[Tuple[int, MeterType], Optional[Decimal]]:
+    """Số tiêu thụ trong tháng theo (phòng, loại đồng hồ), lấy đồng hồ đầu tiên mỗi loại"""
+    consumptions: Dict[Tuple[int, MeterType], Optional[Decimal]] = {}
+    meter_rows = db.execute(
+        select(Meter.room_id, Meter.meter_type, MeterReading.consumption)
+        .join(Room, Room.id == Meter.room_id)
+        .outerjoin(MeterReading, and_(
+            MeterReading.meter_id == Meter.id,
+            MeterReading.month == month,
+            MeterReading.year == year,
+        ))
+        .where(room_filter)
+        .order_by(Meter.id, MeterReading.id)
+    )
+    for room_id, meter_type, consumption in meter_rows:
+        consumptions.setdefault((room_id, meter_type), consumption)
+    return consumptions
+
+
+def plan_invoices(
+    db: Session,
+    month: int,
+    year: int,
+    location_id: Optional[int] = None,
+    with_diff: bool = False,
+) -> InvoicePlan:
+    """Tính hóa đơn tháng cho các phòng đang thuê mà không ghi DB
+
+    Với with_diff, các phòng đã có hóa đơn cũng được tính lại để so sánh
+    với tổng tiền hiện có.
+    """
+    room_filter = _room_filter(location_id)
+
+    rooms = db.execute(
+        select(Room)
+        .options(joinedload(Room.location), joinedload(Room.room_type))
+        .where(room_filter)
+        .order_by(Room.id)
+    ).scalars().all()
+
+    plan = InvoicePlan(month=month, year=year)
+    if not rooms:
+        return plan
+
+    # Rooms that already have an invoice for this month (with the manually entered fees)
+    existing: Dict[int, Row] = {}
+    existing_rows = db.execute(
+        select(
+            Invoice.room_id, Invoice.id, Invoice.total, Invoice.absent_days,
+            Invoice.absent_deduction, Invoice.other_fee,
+        )
+        .join(Room, Room.id == Invoice.room_id)
+        .where(room_filter, Invoice.month == month, Invoice.year == year)
+        .order_by(Invoice.id)
+    )
+    for row in existing_rows:
+        existing.setdefault(row.room_id, row)
+
+    consumptions = load_consumptions(db, room_filter, month, year)
+
+    # Debt/credit carried forward from the room balance ledger
+    balances = opening_balances(db, room_filter, month, year)
+
+    for room in rooms:
+        is_existing = room.id in existing
+        if is_existing:
+            plan.skipped.append(room.room_code)
+            if not with_diff:
+                continue
+
+        previous_debt, previous_credit = split_balance(balances.get(room.id, Decimal("0")))
+        manual_fees = {}
+        if is_existing:
+            current = existing[room.id]
+            manual_fees = {
+                "absent_days": current.absent_days or 0,
+                "absent_deduction": current.absent_deduction or Decimal("0"),
+                "other_fee": current.other_fee or Decimal("0"),
+            }
+        values = calculate_invoice_values(
+            room,
+            room.location,
+            month,
+            year,
+            electric_consumption=consumptions.get((room.id, MeterType.ELECTRIC)),
+            water_consumption=consumptions.get((room.id, MeterType.WATER)),
+            previous_debt=previous_debt,
+            previous_credit=previous_credit,
+            **manual_fees,
+        )
+        if is_existing:
+            plan.diffs.append((room, values, current.id, current.total))
+        else:
+            plan.items.append((room, values))
+
+    return plan
+
+
+def apply_plan(db: Session, plan: InvoicePlan) -> None:
+    """Ghi các hóa đơn của plan bằng một lệnh INSERT hàng loạt (chưa commit)"""
+    if plan.items:
+        rows = [values for _, values in plan.items]
+        db.execute(insert(Invoice), rows)
+        record_new_invoices(db, rows)
+        refresh_invoice_summaries(db, [values["room_id"] for values in rows], plan.month, plan.year)
+
+
+def generate_month(
+    db: Session,
+    month: int,
+    year: int,
+    location_id: Optional[int] = None,
+) -> InvoicePlan:
+    """Tính và ghi hóa đơn tháng, commit một lần"""
+    plan = plan_invoices(db, month, year, location_id)
+    apply_plan(db, plan)
+    db.commit()
+    return plan
+
+
+def _generate_location(
+    session_factory: Callable[[], Session],
+    location_id: int,
+    location_name: str,
+    month: int,
+    year: int,
+) -> dict:
+    """Tạo hóa đơn cho một khu trọ trong session/transaction riêng"""
+    started = time.perf_counter()
+    result = {
+        "location_id": location_id,
+        "location_name": location_name,
+        "created": [],
+        "skipped": [],
+        "error": None,
+    }
+    db = session_factory()
+    try:
+        plan = generate_month(db, month, year, location_id)
+        result["created"] = plan.created
+        result["skipped"] = plan.skipped
+    except Exception as e:
+        logger.exception("Invoice generation failed for location %s", location_id)
+        db.rollback()
+        result["error"] = str(e)
+    finally:
+        db.close()
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def generate_per_location(
+    db: Session,
+    month: int,
+    year: int,
+    max_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> dict:
+    """Tạo hóa đơn cho tất cả khu trọ, mỗi khu là một đơn vị độc lập
+
+    Lỗi ở một khu chỉ rollback khu đó. Trên SQLite (một writer tại một thời
+    điểm) các khu được xử lý lần lượt.
+    """
+    started = time.perf_counter()
+    locations = db.execute(select(Location.id, Location.name).order_by(Location.id)).all()
+    # Release the caller's connection before the units check out their own
+    db.rollback()
+
+    engine = db.get_bind()
+    session_factory = session_factory_for(db)
+    workers = max_workers or settings.INVOICE_GENERATION_WORKERS
+    if engine.dialect.name == "sqlite":
+        workers = 1
+
+    total = len(locations)
+    if progress:
+        progress(0, total)
+
+    results = []
+    if workers <= 1 or total <= 1:
+        for location_id, location_name in locations:
+            results.append(_generate_location(session_factory, location_id, location_name, month, year))
+            if progress:
+                progress(len(results), total)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, total), thread_name_prefix="invoice-gen") as executor:
+            futures = [
+                executor.submit(_generate_location, session_factory, location_id, location_name, month, year)
+                for location_id, location_name in locations
+            ]
+            for future in futures:
+                results.append(future.result())
+                if progress:
+                    progress(len(results), total)
+
+    created = [code for result in results for code in result["created"]]
+    skipped = [code for result in results for code in result["skipped"]]
+    failed = sum(1 for result in results if result["error"])
+
+    message = f"Đã tạo {len(created)} hóa đơn"
+    if failed:
+        message += f", {failed} khu bị lỗi"
+
+    return {
+        "message": message,
+        "created": created,
+        "skipped": skipped,
+        "locations": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def generation_result(plan: InvoicePlan) -> dict:
+    """Kết quả trả về cho client sau khi tạo hóa đơn"""
+    created = plan.created
+    return {
+        "message": f"Đã tạo {len(created)} hóa đơn",
+        "created": created,
+        "skipped": plan.skipped
+    }
+
+
+@job_handler("generate_invoices")
+def generate_invoices_job(db: Session, params: dict, progress: ProgressCallback) -> dict:
+    """Tác vụ nền: tạo hóa đơn tháng"""
+    if not params.get("location_id"):
+        return generate_per_location(db, params["month"], params["year"], progress=progress)
+    
+    plan = plan_invoices(db, params["month"], params["year"], params["location_id"])
+    total = len(plan.items)
+    progress(0, total)
+    apply_plan(db, plan)
+    db.commit()
+    progress(total, total)
+    return generation_result(plan)
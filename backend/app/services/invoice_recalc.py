@@ -0,0 +1,104 @@
+"""
+Invoice recalculation - Tính lại hóa đơn khi chỉ số điện nước bị sửa
+
+Chỉ các hóa đơn của phòng/tháng có chỉ số thay đổi được tính lại; phần
+chênh lệch được chuyển xuống các tháng sau qua sổ công nợ.
+"""
+from decimal import Decimal
+from typing import Iterable, List
+from sqlalchemy.orm import Session, joinedload
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.meter import MeterType
+from app.models.room import Room
+from app.schemas.money import round_money
+from app.services.invoice_generator import load_consumptions, meter_fee
+from app.services.ledger import sync_invoice_balance
+from app.services.monthly_summary import refresh_invoice_summaries
+
+
+def apply_totals(invoice: Invoice) -> None:
+    """Tính lại tổng tiền, nợ/thừa và trạng thái của hóa đơn từ các khoản phí
+
+    Dùng chung cho mọi thao tác sửa hóa đơn (sửa phí, ngày vắng, chỉ số).
+    """
+    room_after_deduction = invoice.room_fee - invoice.absent_deduction
+    invoice.total = (
+        room_after_deduction +
+        invoice.electric_fee +
+        invoice.water_fee +
+        invoice.garbage_fee +
+        invoice.wifi_fee +
+        invoice.tv_fee +
+        invoice.laundry_fee +
+        invoice.other_fee +
+        invoice.previous_debt -
+        invoice.previous_credit
+    )
+    
+    if invoice.paid_amount >= invoice.total:
+        invoice.remaining_credit = invoice.paid_amount - invoice.total
+        invoice.remaining_debt = Decimal("0")
+        invoice.status = InvoiceStatus.PAID
+    elif invoice.paid_amount > 0:
+        invoice.remaining_debt = invoice.total - invoice.paid_amount
+        invoice.remaining_credit = Decimal("0")
+        invoice.status = InvoiceStatus.PARTIAL
+    else:
+        invoice.remaining_debt = invoice.total
+        invoice.remaining_credit = Decimal("0")
+        invoice.status = InvoiceStatus.UNPAID
+
+
+def recalculate_meter_fees(db: Session, room_ids: Iterable[int], month: int, year: int) -> List[dict]:
+    """Tính lại tiền điện/nước của hóa đơn tháng cho các phòng (chưa commit)
+
+    Chỉ số mới phải được flush trước khi gọi. Trả về danh sách hóa đơn đã thay đổi.
+    """
+    room_ids = list(set(room_ids))
+    if not room_ids:
+        return []
+    
+    invoices = db.query(Invoice).options(
+        joinedload(Invoice.room).joinedload(Room.location)
+    ).filter(
+        Invoice.room_id.in_(room_ids),
+        Invoice.month == month,
+        Invoice.year == year
+    ).all()
+    if not invoices:
+        return []
+    
+    consumptions = load_consumptions(db, Room.id.in_(room_ids), month, year)
+    
+    changes = []
+    for invoice in invoices:
+        location = invoice.room.location
+        electric_fee = round_money(meter_fee(
+            consumptions.get((invoice.room_id, MeterType.ELECTRIC)), location.electric_price
+        ))
+        water_fee = round_money(meter_fee(
+            consumptions.get((invoice.room_id, MeterType.WATER)), location.water_price
+        ))
+        if electric_fee == invoice.electric_fee and water_fee == invoice.water_fee:
+            continue
+        
+        old_total = invoice.total
+        invoice.electric_fee = electric_fee
+        invoice.water_fee = water_fee
+        apply_totals(invoice)
+        later_updated = sync_invoice_balance(db, invoice)
+        
+        changes.append({
+            "invoice_id": invoice.id,
+            "room_id": invoice.room_id,
+            "month": invoice.month,
+            "year": invoice.year,
+            "electric_fee": electric_fee,
+            "water_fee": water_fee,
+            "old_total": old_total,
+            "new_total": invoice.total,
+            "later_invoices_updated": later_updated,
+        })
+    
+    refresh_invoice_summaries(db, [change["room_id"] for change in changes], month, year)
+    return changes
@@ -0,0 +1,230 @@
+"""
+Room balance ledger - Sổ công nợ chuyển kỳ theo phòng
+
+Mỗi hóa đơn có một dòng room_balances cùng (phòng, tháng, năm) lưu số dư
+đầu kỳ, phát sinh, đã thu và số dư cuối kỳ. Số dư của một tháng bất kỳ là
+một lần tra theo chỉ mục; khi sửa hóa đơn cũ, chênh lệch được cộng dồn vào
+các tháng sau bằng hai lệnh UPDATE thay vì sửa tay từng tháng.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, delete, func, insert, inspect, literal, or_, select, update
+from sqlalchemy.orm import Session
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.room import Room
+from app.models.room_balance import RoomBalance
+
+
+def previous_period(month: int, year: int) -> Tuple[int, int]:
+    """Tháng/năm liền trước"""
+    if month == 1:
+        return 12, year - 1
+    return month - 1, year
+
+
+def period_after(model, month: int, year: int):
+    """Điều kiện (year, month) > tháng cho trước, dùng được chỉ mục"""
+    return or_(model.year > year, and_(model.year == year, model.month > month))
+
+
+def period_before(model, month: int, year: int):
+    """Điều kiện (year, month) < tháng cho trước"""
+    return or_(model.year < year, and_(model.year == year, model.month < month))
+
+
+def period_between(model, start: Tuple[int, int], end: Tuple[int, int]):
+    """Điều kiện start <= (year, month) <= end, với start/end là (tháng, năm)"""
+    (start_month, start_year), (end_month, end_year) = start, end
+    return and_(
+        or_(model.year > start_year, and_(model.year == start_year, model.month >= start_month)),
+        or_(model.year < end_year, and_(model.year == end_year, model.month <= end_month)),
+    )
+
+
+def split_balance(balance: Decimal) -> Tuple[Decimal, Decimal]:
+    """Tách số dư thành (nợ, thừa) không âm"""
+    if balance > 0:
+        return balance, Decimal("0")
+    return Decimal("0"), -balance
+
+
+def opening_balances(db: Session, room_filter, month: int, year: int) -> Dict[int, Decimal]:
+    """Số dư cuối kỳ gần nhất trước tháng cho trước của các phòng (một truy vấn)"""
+    period = RoomBalance.year * 12 + RoomBalance.month
+    latest = (
+        select(RoomBalance.room_id, func.max(period).label("period"))
+        .join(Room, Room.id == RoomBalance.room_id)
+        .where(room_filter, period_before(RoomBalance, month, year))
+        .group_by(RoomBalance.room_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(RoomBalance.room_id, RoomBalance.closing_balance)
+        .join(latest, and_(RoomBalance.room_id == latest.c.room_id, period == latest.c.period))
+    )
+    return {room_id: closing or Decimal("0") for room_id, closing in rows}
+
+
+def get_balance(db: Session, room_id: int, month: int, year: int) -> Optional[RoomBalance]:
+    """Dòng sổ công nợ có hiệu lực tại tháng cho trước (tháng đó hoặc gần nhất trước đó)"""
+    return db.query(RoomBalance).filter(
+        RoomBalance.room_id == room_id,
+        or_(
+            RoomBalance.year < year,
+            and_(RoomBalance.year == year, RoomBalance.month <= month)
+        )
+    ).order_by(RoomBalance.year.desc(), RoomBalance.month.desc()).first()
+
+
+def _saved_value(invoice: Invoice, key: str):
+    """Giá trị cột trong CSDL trước thay đổi chưa flush của hóa đơn"""
+    history = inspect(invoice).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(invoice, key)
+
+
+def cascade_delta(db: Session, room_id: int, month: int, year: int, delta: Decimal) -> int:
+    """Cộng chênh lệch số dư vào mọi tháng sau của phòng (sổ công nợ và hóa đơn)
+
+    Trả về số hóa đơn được cập nhật.
+    """
+    if not delta:
+        return 0
+
+    db.execute(
+        update(RoomBalance)
+        .where(RoomBalance.room_id == room_id, period_after(RoomBalance, month, year))
+        .values(
+            opening_balance=RoomBalance.opening_balance + delta,
+            closing_balance=RoomBalance.closing_balance + delta,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    status_type = Invoice.__table__.c.status.type
+    opening = Invoice.previous_debt - Invoice.previous_credit + delta
+    total = Invoice.total + delta
+    remaining = total - Invoice.paid_amount
+    result = db.execute(
+        update(Invoice)
+        .where(Invoice.room_id == room_id, period_after(Invoice, month, year))
+        .values(
+            previous_debt=case((opening > 0, opening), else_=0),
+            previous_credit=case((opening < 0, -opening), else_=0),
+            total=total,
+            remaining_debt=case((remaining > 0, remaining), else_=0),
+            remaining_credit=case((remaining < 0, -remaining), else_=0),
+            status=case(
+                (Invoice.paid_amount >= total, literal(InvoiceStatus.PAID, status_type)),
+                (Invoice.paid_amount > 0, literal(InvoiceStatus.PARTIAL, status_type)),
+                else_=literal(InvoiceStatus.UNPAID, status_type),
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def sync_invoice_balance(db: Session, invoice: Invoice) -> int:
+    """Cập nhật sổ công nợ sau khi tổng tiền/đã thu của hóa đơn thay đổi (chưa commit)
+
+    Trả về số hóa đơn tháng sau được tính lại.
+    """
+    opening = (invoice.previous_debt or Decimal("0")) - (invoice.previous_credit or Decimal("0"))
+    paid = invoice.paid_amount or Decimal("0")
+    closing = invoice.total - paid
+    # Read before the query below autoflushes the edit and clears the history
+    saved_closing = _saved_value(invoice, "total") - (_saved_value(invoice, "paid_amount") or Decimal("0"))
+
+    row = db.query(RoomBalance).filter(
+        RoomBalance.room_id == invoice.room_id,
+        RoomBalance.month == invoice.month,
+        RoomBalance.year == invoice.year
+    ).first()
+
+    if row is None:
+        # Invoice from before the ledger: later invoices carried its saved remaining amount
+        old_closing = saved_closing
+        row = RoomBalance(room_id=invoice.room_id, month=invoice.month, year=invoice.year)
+        db.add(row)
+    else:
+        old_closing = row.closing_balance
+
+    row.opening_balance = opening
+    row.charges = invoice.total - opening
+    row.payments = paid
+    row.closing_balance = closing
+
+    return cascade_delta(db, invoice.room_id, invoice.month, invoice.year, closing - old_closing)
+
+
+def record_new_invoices(db: Session, rows: List[dict]) -> None:
+    """Ghi dòng sổ công nợ cho các hóa đơn vừa tạo hàng loạt (chưa commit)
+
+    rows là giá trị cột Invoice đã được chèn; với hóa đơn tạo bù cho tháng cũ,
+    phần phát sinh được cộng dồn vào các tháng sau.
+    """
+    if not rows:
+        return
+
+    entries = []
+    for values in rows:
+        opening = values["previous_debt"] - values["previous_credit"]
+        entries.append({
+            "room_id": values["room_id"],
+            "month": values["month"],
+            "year": values["year"],
+            "opening_balance": opening,
+            "charges": values["total"] - opening,
+            "payments": Decimal("0"),
+            "closing_balance": values["total"],
+        })
+    db.execute(insert(RoomBalance), entries)
+
+    month, year = rows[0]["month"], rows[0]["year"]
+    room_ids = [values["room_id"] for values in rows]
+    later = set(db.execute(
+        select(RoomBalance.room_id)
+        .where(RoomBalance.room_id.in_(room_ids), period_after(RoomBalance, month, year))
+        .distinct()
+    ).scalars())
+    for entry in entries:
+        if entry["room_id"] in later:
+            cascade_delta(db, entry["room_id"], month, year, entry["charges"])
+
+
+def rebuild_balances(db: Session, room_id: Optional[int] = None) -> int:
+    """Dựng lại sổ công nợ từ hóa đơn hiện có (khi cần đối soát; migrate đã ghi các dòng còn thiếu)
+
+    Trả về số dòng đã ghi.
+    """
+    stmt = delete(RoomBalance)
+    query = select(
+        Invoice.room_id, Invoice.month, Invoice.year, Invoice.total,
+        Invoice.paid_amount, Invoice.previous_debt, Invoice.previous_credit
+    ).order_by(Invoice.room_id, Invoice.year, Invoice.month, Invoice.id)
+    if room_id is not None:
+        stmt = stmt.where(RoomBalance.room_id == room_id)
+        query = query.where(Invoice.room_id == room_id)
+    db.execute(stmt)
+
+    entries = []
+    seen = set()
+    for inv_room_id, month, year, total, paid, previous_debt, previous_credit in db.execute(query):
+        if (inv_room_id, year, month) in seen:
+            continue
+        seen.add((inv_room_id, year, month))
+        opening = (previous_debt or Decimal("0")) - (previous_credit or Decimal("0"))
+        paid = paid or Decimal("0")
+        entries.append({
+            "room_id": inv_room_id,
+            "month": month,
+            "year": year,
+            "opening_balance": opening,
+            "charges": total - opening,
+            "payments": paid,
+            "closing_balance": total - paid,
+        })
+    if entries:
+        db.execute(insert(RoomBalance), entries)
+    db.commit()
+    return len(entries)
@@ -0,0 +1,243 @@
+"""
+Meter readings service - Ghi chỉ số điện nước hàng loạt
+
+Một lô chỉ số được ghi bằng một truy vấn tra đồng hồ, một truy vấn tra chỉ
+số đã có của tháng, một truy vấn lấy chỉ số kỳ trước (để điền chỉ số cũ còn
+trống) và một lệnh INSERT ... ON CONFLICT DO UPDATE (PostgreSQL và SQLite),
+thay vì vài truy vấn cho mỗi phòng.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.timestamps import updated_now
+from app.core.database import upsert_insert
+from app.core.jobs import ProgressCallback, job_handler
+from app.models.meter import Meter, MeterReading, MeterType
+from app.schemas.meter import MeterReadingBatch, MeterReadingBatchItem
+from app.services.invoice_recalc import recalculate_meter_fees
+from app.services.ledger import period_before
+
+PROGRESS_EVERY = 50  # Báo tiến độ sau mỗi N chỉ số
+UPSERT_CHUNK_SIZE = 500  # Số dòng mỗi lệnh INSERT (giới hạn tham số của SQLite)
+
+
+def load_meters(db: Session, room_ids: List[int]) -> Dict[Tuple[int, MeterType], int]:
+    """Id đồng hồ theo (phòng, loại), lấy đồng hồ đầu tiên mỗi loại (một truy vấn)"""
+    meters: Dict[Tuple[int, MeterType], int] = {}
+    rows = db.execute(
+        select(Meter.room_id, Meter.meter_type, Meter.id)
+        .where(Meter.room_id.in_(room_ids))
+        .order_by(Meter.id)
+    )
+    for room_id, meter_type, meter_id in rows:
+        meters.setdefault((room_id, meter_type), meter_id)
+    return meters
+
+
+def previous_readings(db: Session, meter_ids: List[int], month: int, year: int) -> Dict[int, Decimal]:
+    """Chỉ số mới của kỳ gần nhất trước tháng cho trước theo đồng hồ (một truy vấn)"""
+    if not meter_ids:
+        return {}
+    period = MeterReading.year * 12 + MeterReading.month
+    latest = (
+        select(MeterReading.meter_id, func.max(period).label("period"))
+        .where(MeterReading.meter_id.in_(meter_ids), period_before(MeterReading, month, year))
+        .group_by(MeterReading.meter_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(MeterReading.meter_id, MeterReading.new_reading)
+        .join(latest, and_(MeterReading.meter_id == latest.c.meter_id, period == latest.c.period))
+    )
+    return dict(rows.all())
+
+
+def latest_readings_statement(dialect_name: str, meter_ids: List[int]):
+    """Câu truy vấn (meter_id, chỉ số mới nhất) của các đồng hồ
+
+    PostgreSQL dùng DISTINCT ON; các CSDL khác nối với kỳ lớn nhất mỗi đồng hồ.
+    """
+    if dialect_name == "postgresql":
+        return (
+            select(MeterReading.meter_id, MeterReading.new_reading)
+            .where(MeterReading.meter_id.in_(meter_ids))
+            .distinct(MeterReading.meter_id)
+            .order_by(MeterReading.meter_id, MeterReading.year.desc(), MeterReading.month.desc())
+        )
+    
+    period = MeterReading.year * 12 + MeterReading.month
+    latest = (
+        select(MeterReading.meter_id, func.max(period).label("period"))
+        .where(MeterReading.meter_id.in_(meter_ids))
+        .group_by(MeterReading.meter_id)
+        .subquery()
+    )
+    return (
+        select(MeterReading.meter_id, MeterReading.new_reading)
+        .join(latest, and_(MeterReading.meter_id == latest.c.meter_id, period == latest.c.period))
+    )
+
+
+def latest_readings(db: Session, meter_ids: List[int]) -> Dict[int, Decimal]:
+    """Chỉ số mới nhất theo đồng hồ (một truy vấn)"""
+    if not meter_ids:
+        return {}
+    rows = db.execute(latest_readings_statement(db.get_bind().dialect.name, meter_ids))
+    return dict(rows.all())
+
+
+def chain_mismatch(
+    meter_id: int,
+    room_id: int,
+    meter_type: MeterType,
+    old_reading: Decimal,
+    previous: Optional[Decimal],
+) -> Optional[dict]:
+    """Cảnh báo khi chỉ số cũ gửi lên không nối tiếp chỉ số kỳ trước đã lưu
+
+    Giá trị dạng JSON (chuỗi số, tên loại đồng hồ) vì cảnh báo còn được lưu vào
+    jobs.result khi nhập nền.
+    """
+    if previous is None or old_reading == previous:
+        return None
+    return {
+        "meter_id": meter_id,
+        "room_id": room_id,
+        "meter_type": meter_type.value,
+        "old_reading": str(old_reading),
+        "previous_reading": str(previous),
+    }
+
+
+def upsert_readings(db: Session, rows: List[dict], existing: Dict[int, int]) -> Dict[int, int]:
+    """Ghi chỉ số theo (đồng hồ, tháng, năm), cập nhật nếu đã có (chưa commit)
+
+    existing là id chỉ số đã có theo meter_id; trả về id chỉ số theo meter_id.
+    """
+    ids = dict(existing)
+    if not rows:
+        return ids
+    dialect_insert = upsert_insert(db)
+    
+    if dialect_insert is None:
+        # Other databases: plain bulk insert for new rows, bulk update by id for the rest
+        new_rows = [row for row in rows if row["meter_id"] not in existing]
+        changed = [
+            {"id": existing[row["meter_id"]], **row} for row in rows if row["meter_id"] in existing
+        ]
+        if changed:
+            db.execute(update(MeterReading), changed)
+        if new_rows:
+            db.execute(insert(MeterReading), new_rows)
+            ids.update(db.execute(
+                select(MeterReading.meter_id, MeterReading.id).where(
+                    MeterReading.meter_id.in_([row["meter_id"] for row in new_rows]),
+                    MeterReading.month == rows[0]["month"],
+                    MeterReading.year == rows[0]["year"]
+                )
+            ).all())
+        return ids
+    
+    for offset in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = dialect_insert(MeterReading).values(rows[offset:offset + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MeterReading.meter_id, MeterReading.year, MeterReading.month],
+            set_={
+                "old_reading": stmt.excluded.old_reading,
+                "new_reading": stmt.excluded.new_reading,
+                "consumption": stmt.excluded.consumption,
+                "updated_at": updated_now(),
+            },
+        ).returning(MeterReading.meter_id, MeterReading.id)
+        ids.update(db.execute(stmt).all())
+    return ids
+
+
+def save_readings_batch(
+    db: Session,
+    month: int,
+    year: int,
+    readings: List[MeterReadingBatchItem],
+    progress: Optional[ProgressCallback] = None,
+) -> dict:
+    """Ghi (hoặc cập nhật) chỉ số của một tháng cho nhiều phòng, commit một lần"""
+    errors = []
+    total = len(readings)
+    if progress:
+        progress(0, total)
+    
+    meters = load_meters(db, list({item.room_id for item in readings}))
+    previous = previous_readings(db, list(set(meters.values())), month, year)
+    
+    # Resolve meters; a later item for the same meter replaces an earlier one
+    rows: Dict[int, dict] = {}
+    order: List[int] = []
+    mismatches = []
+    for index, item in enumerate(readings):
+        if progress and index and index % PROGRESS_EVERY == 0:
+            progress(index, total)
+        
+        meter_id = meters.get((item.room_id, item.meter_type))
+        if meter_id is None:
+            errors.append(f"Không tìm thấy đồng hồ cho phòng {item.room_id}")
+            continue
+        
+        old_reading = item.old_reading
+        if old_reading is None:
+            old_reading = previous.get(meter_id)
+            if old_reading is None:
+                errors.append(f"Chưa có chỉ số kỳ trước cho phòng {item.room_id}, cần nhập chỉ số cũ")
+                continue
+        else:
+            mismatch = chain_mismatch(meter_id, item.room_id, item.meter_type, old_reading, previous.get(meter_id))
+            if mismatch:
+                mismatches.append(mismatch)
+        
+        rows[meter_id] = {
+            "meter_id": meter_id,
+            "month": month,
+            "year": year,
+            "old_reading": old_reading,
+            "new_reading": item.new_reading,
+            "consumption": item.new_reading - old_reading,
+        }
+        order.append(meter_id)
+    
+    existing: Dict[int, int] = {}
+    if rows:
+        existing = dict(db.execute(
+            select(MeterReading.meter_id, MeterReading.id)
+            .where(
+                MeterReading.meter_id.in_(list(rows)),
+                MeterReading.month == month,
+                MeterReading.year == year
+            )
+        ).all())
+    
+    ids = upsert_readings(db, list(rows.values()), existing)
+    created = [ids[meter_id] for meter_id in order]
+    
+    # Invoices already issued for this month follow the corrected readings
+    room_by_meter = {meter_id: room_id for (room_id, _), meter_id in meters.items()}
+    updated_room_ids = list({room_by_meter[meter_id] for meter_id in existing})
+    recalculated = recalculate_meter_fees(db, updated_room_ids, month, year)
+    
+    db.commit()
+    if progress:
+        progress(total, total)
+    
+    return {
+        "message": f"Đã ghi {len(created)} chỉ số",
+        "created_ids": created,
+        "errors": errors,
+        "mismatches": mismatches,
+        "recalculated_invoice_ids": [change["invoice_id"] for change in recalculated]
+    }
+
+
+@job_handler("import_readings")
+def import_readings_job(db: Session, params: dict, progress: ProgressCallback) -> dict:
+    """Tác vụ nền: nhập chỉ số hàng loạt"""
+    batch = MeterReadingBatch.model_validate(params)
+    return save_readings_batch(db, batch.month, batch.year, batch.readings, progress)
@@ -0,0 +1,293 @@
+"""
+Monthly summary - Bảng tổng hợp theo (khu trọ, năm, tháng) cho dashboard
+
+Mỗi thao tác ghi hóa đơn, chi tiêu hoặc người thuê chỉ tính lại các dòng
+(khu, tháng) bị ảnh hưởng bằng truy vấn gộp theo chỉ mục, nên dashboard đọc
+một dòng mỗi khu thay vì quét bảng hóa đơn/chi tiêu. Số liệu phòng và người
+thuê là ảnh chụp trạng thái hiện tại, chỉ được ghi cho tháng hiện hành.
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import and_, case, extract, false, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from app.models.timestamps import updated_now
+from app.core.database import upsert_insert
+from app.models.expense import Expense
+from app.models.invoice import Invoice
+from app.models.monthly_summary import MonthlySummary
+from app.models.room import Room, RoomStatus
+from app.models.tenant import Tenant
+from app.services.ledger import period_after
+
+SummaryKey = Tuple[Optional[int], int, int]  # (location_id, year, month)
+
+MONEY_FIELDS = ("invoice_count", "total_income", "total_collected", "total_pending", "total_expense")
+OCCUPANCY_FIELDS = ("room_count", "occupied_rooms", "active_tenants")
+KEY_FIELDS = ("location_id", "year", "month")
+UPSERT_CHUNK_SIZE = 500  # Số dòng mỗi lệnh INSERT (giới hạn tham số của SQLite)
+
+
+def month_range(month: int, year: int) -> Tuple[date, date]:
+    """Khoảng ngày [đầu tháng, đầu tháng sau) của một tháng"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def current_period() -> Tuple[int, int]:
+    today = date.today()
+    return today.year, today.month
+
+
+def invoice_keys(db: Session, room_ids: Iterable[int], month: int, year: int) -> Set[SummaryKey]:
+    """Các dòng tổng hợp chịu ảnh hưởng khi hóa đơn tháng của các phòng thay đổi
+
+    Gồm tháng đó và mọi tháng sau có hóa đơn (nợ/thừa được chuyển xuống qua sổ công nợ).
+    """
+    room_ids = list(set(room_ids))
+    if not room_ids:
+        return set()
+    rows = db.execute(
+        select(Room.location_id, Invoice.year, Invoice.month)
+        .join(Room, Room.id == Invoice.room_id)
+        .where(
+            Invoice.room_id.in_(room_ids),
+            or_(
+                and_(Invoice.year == year, Invoice.month == month),
+                period_after(Invoice, month, year),
+            )
+        )
+        .distinct()
+    )
+    return {(location_id, inv_year, inv_month) for location_id, inv_year, inv_month in rows}
+
+
+def expense_key(expense: Expense) -> SummaryKey:
+    return (expense.location_id, expense.expense_date.year, expense.expense_date.month)
+
+
+def tenant_keys(db: Session, room_ids: Iterable[int]) -> Set[SummaryKey]:
+    """Dòng tháng hiện hành của các khu có phòng vừa đổi người thuê"""
+    room_ids = list(set(room_ids))
+    if not room_ids:
+        return set()
+    year, month = current_period()
+    location_ids = db.execute(
+        select(Room.location_id).where(Room.id.in_(room_ids)).distinct()
+    ).scalars()
+    return {(location_id, year, month) for location_id in location_ids}
+
+
+def room_keys(db: Session, room_ids: Iterable[int]) -> Set[SummaryKey]:
+    """Mọi dòng có hóa đơn của các phòng, cùng dòng tháng hiện hành (khi xóa phòng)"""
+    room_ids = list(set(room_ids))
+    if not room_ids:
+        return set()
+    rows = db.execute(
+        select(Room.location_id, Invoice.year, Invoice.month)
+        .join(Room, Room.id == Invoice.room_id)
+        .where(Invoice.room_id.in_(room_ids))
+        .distinct()
+    )
+    keys = {(location_id, inv_year, inv_month) for location_id, inv_year, inv_month in rows}
+    return keys | tenant_keys(db, room_ids)
+
+
+def _key_condition(location_column, year_column, month_column, keys: Iterable[SummaryKey]):
+    conditions = []
+    for location_id, year, month in keys:
+        location_match = location_column.is_(None) if location_id is None else location_column == location_id
+        conditions.append(and_(location_match, year_column == year, month_column == month))
+    return or_(false(), *conditions)
+
+
+def _money_totals(db: Session, keys: Optional[Set[SummaryKey]] = None) -> Dict[SummaryKey, dict]:
+    """Số liệu tiền theo (khu, năm, tháng); keys = None là toàn bộ"""
+    totals: Dict[SummaryKey, dict] = {}
+
+    def entry(key: SummaryKey) -> dict:
+        return totals.setdefault(key, {
+            "invoice_count": 0,
+            "total_income": Decimal("0"),
+            "total_collected": Decimal("0"),
+            "total_expense": Decimal("0"),
+        })
+
+    invoice_query = (
+        select(
+            Room.location_id, Invoice.year, Invoice.month,
+            func.count(Invoice.id), func.sum(Invoice.total), func.sum(Invoice.paid_amount),
+        )
+        .join(Room, Room.id == Invoice.room_id)
+        .group_by(Room.location_id, Invoice.year, Invoice.month)
+    )
+    expense_year = extract("year", Expense.expense_date)
+    expense_month = extract("month", Expense.expense_date)
+    expense_query = (
+        select(Expense.location_id, expense_year, expense_month, func.sum(Expense.amount))
+        .group_by(Expense.location_id, expense_year, expense_month)
+    )
+
+    if keys is not None:
+        location_keys = [key for key in keys if key[0] is not None]
+        invoice_query = invoice_query.where(
+            _key_condition(Room.location_id, Invoice.year, Invoice.month, location_keys)
+        )
+        # Date ranges instead of EXTRACT so the filter can use the expense_date index
+        expense_conditions = []
+        for location_id, year, month in keys:
+            start, end = month_range(month, year)
+            expense_conditions.append(and_(
+                Expense.location_id.is_(None) if location_id is None else Expense.location_id == location_id,
+                Expense.expense_date >= start,
+                Expense.expense_date < end,
+            ))
+        expense_query = expense_query.where(or_(*expense_conditions))
+    else:
+        location_keys = None
+
+    if location_keys is None or location_keys:
+        for location_id, year, month, count, income, collected in db.execute(invoice_query):
+            values = entry((location_id, year, month))
+            values["invoice_count"] = count
+            values["total_income"] = income or Decimal("0")
+            values["total_collected"] = collected or Decimal("0")
+
+    for location_id, year, month, amount in db.execute(expense_query):
+        entry((location_id, int(year), int(month)))["total_expense"] = amount or Decimal("0")
+
+    for values in totals.values():
+        values["total_pending"] = values["total_income"] - values["total_collected"]
+    return totals
+
+
+def _occupancy(db: Session, location_ids: List[int]) -> Dict[int, Tuple[int, int, int]]:
+    """(số phòng, phòng đang thuê, người đang thuê) hiện tại theo khu"""
+    if not location_ids:
+        return {}
+    rooms = db.execute(
+        select(
+            Room.location_id,
+            func.count(Room.id),
+            func.count(case((Room.status == RoomStatus.OCCUPIED, Room.id))),
+        )
+        .where(Room.location_id.in_(location_ids))
+        .group_by(Room.location_id)
+    )
+    tenants = dict(db.execute(
+        select(Room.location_id, func.count(Tenant.id))
+        .join(Room, Room.id == Tenant.room_id)
+        .where(Room.location_id.in_(location_ids), Tenant.is_active == True)
+        .group_by(Room.location_id)
+    ).all())
+    return {
+        location_id: (room_count, occupied, tenants.get(location_id, 0))
+        for location_id, room_count, occupied in rooms
+    }
+
+
+def _summary_rows(db: Session, keys: Set[SummaryKey], totals: Dict[SummaryKey, dict]) -> List[dict]:
+    """Giá trị cột của các dòng tổng hợp; số liệu phòng chỉ có ở dòng tháng hiện hành"""
+    year, month = current_period()
+    occupancy = _occupancy(db, [key[0] for key in keys if key[0] is not None and key[1:] == (year, month)])
+
+    empty = {field: 0 for field in MONEY_FIELDS}
+    rows = []
+    for key in keys:
+        row = {"location_id": key[0], "year": key[1], "month": key[2], **totals.get(key, empty)}
+        if key[0] is not None and key[1:] == (year, month):
+            row.update(zip(OCCUPANCY_FIELDS, occupancy.get(key[0], (0, 0, 0))))
+        rows.append(row)
+    return rows
+
+
+def _upsert_rows(db: Session, rows: List[dict], dialect_insert) -> None:
+    """INSERT ... ON CONFLICT (khu, năm, tháng) DO UPDATE, mỗi nhóm cột một lệnh"""
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    for columns, group in groups.items():
+        for offset in range(0, len(group), UPSERT_CHUNK_SIZE):
+            stmt = dialect_insert(MonthlySummary).values(group[offset:offset + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[MonthlySummary.location_id, MonthlySummary.year, MonthlySummary.month],
+                set_={
+                    **{column: stmt.excluded[column] for column in columns if column not in KEY_FIELDS},
+                    "updated_at": updated_now(),
+                },
+            )
+            db.execute(stmt)
+
+
+def _lookup_and_write_rows(db: Session, rows: List[dict]) -> None:
+    """Tra dòng đã có rồi UPDATE theo id hoặc INSERT (CSDL không có upsert, hoặc location_id null)"""
+    keys = {(row["location_id"], row["year"], row["month"]) for row in rows}
+    existing = {
+        (location_id, year, month): summary_id
+        for summary_id, location_id, year, month in db.execute(
+            select(MonthlySummary.id, MonthlySummary.location_id, MonthlySummary.year, MonthlySummary.month)
+            .where(_key_condition(MonthlySummary.location_id, MonthlySummary.year, MonthlySummary.month, keys))
+        )
+    }
+    changed, new_rows = [], []
+    for row in rows:
+        summary_id = existing.get((row["location_id"], row["year"], row["month"]))
+        if summary_id is None:
+            new_rows.append(row)
+        else:
+            changed.append({"id": summary_id, **row})
+    if changed:
+        db.execute(update(MonthlySummary), changed)
+    if new_rows:
+        db.execute(insert(MonthlySummary), new_rows)
+
+
+def _write_rows(db: Session, keys: Set[SummaryKey], totals: Dict[SummaryKey, dict]) -> int:
+    """Ghi các dòng tổng hợp (chưa commit)
+
+    Dùng upsert để hai giao dịch cùng tạo một dòng lần đầu (vd. các luồng tạo
+    hóa đơn theo khu, hai worker) không làm bên sau lỗi ràng buộc duy nhất. Dòng
+    location_id null không được ràng buộc đó bảo vệ (NULL khác NULL) nên vẫn tra rồi ghi.
+    """
+    rows = _summary_rows(db, keys, totals)
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is None:
+        _lookup_and_write_rows(db, rows)
+        return len(rows)
+    _upsert_rows(db, [row for row in rows if row["location_id"] is not None], dialect_insert)
+    unowned = [row for row in rows if row["location_id"] is None]
+    if unowned:
+        _lookup_and_write_rows(db, unowned)
+    return len(rows)
+
+
+def refresh_summaries(db: Session, keys: Iterable[SummaryKey]) -> None:
+    """Tính lại các dòng tổng hợp cho trước (chưa commit)"""
+    keys = set(keys)
+    if not keys:
+        return
+    # Pending ORM changes must be visible to the aggregates (sessions use autoflush=False)
+    db.flush()
+    _write_rows(db, keys, _money_totals(db, keys))
+
+
+def refresh_invoice_summaries(db: Session, room_ids: Iterable[int], month: int, year: int) -> None:
+    """Tính lại tổng hợp sau khi hóa đơn tháng của các phòng thay đổi (chưa commit)"""
+    db.flush()
+    refresh_summaries(db, invoice_keys(db, room_ids, month, year))
+
+
+def rebuild_summaries(db: Session) -> int:
+    """Dựng lại toàn bộ bảng tổng hợp từ hóa đơn và chi tiêu (chạy khi nâng cấp hoặc đối soát)
+
+    Số liệu phòng/người thuê của các tháng cũ được giữ nguyên. Trả về số dòng đã ghi.
+    """
+    totals = _money_totals(db)
+    existing = db.execute(select(MonthlySummary.location_id, MonthlySummary.year, MonthlySummary.month))
+    year, month = current_period()
+    location_ids = db.execute(select(Room.location_id).distinct()).scalars()
+    keys = set(totals) | set(map(tuple, existing)) | {(location_id, year, month) for location_id in location_ids}
+    count = _write_rows(db, keys, totals)
+    db.commit()
+    return count
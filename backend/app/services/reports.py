@@ -0,0 +1,125 @@
+"""
+Range reports - Báo cáo xu hướng nhiều tháng
+
+Cả khoảng tháng được tính bằng ba truy vấn gộp (thu theo tháng, chi tiêu
+theo loại, doanh thu theo phòng) và trả về dạng cột để JSON gọn.
+
+Thu của một tháng là tiền phát sinh trong tháng (MONTH_CHARGES: tổng hóa đơn
+trừ nợ cũ, cộng tiền thừa chuyển sang), giống doanh thu từng phòng, để nợ chưa
+trả không bị cộng lại ở mỗi tháng sau. Vì vậy tổng thu theo tháng bằng tổng
+doanh thu các phòng. Đã thu là số tiền trả vào hóa đơn của tháng, có thể gồm
+cả nợ cũ, nên tỷ lệ thu một tháng có thể lớn hơn 1 và còn nợ có thể âm.
+"""
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, extract, func, select
+from sqlalchemy.orm import Session
+from app.models.expense import Expense, ExpenseCategory
+from app.models.invoice import Invoice
+from app.models.location import Location
+from app.models.room import Room
+from app.schemas.dashboard import RangeReport, RoomProfitColumns
+from app.services.ledger import period_between
+from app.services.monthly_summary import month_range
+
+Period = Tuple[int, int]  # (tháng, năm)
+
+ZERO = Decimal("0")
+
+# Tiền phát sinh trong tháng của hóa đơn, không tính nợ/thừa chuyển từ tháng trước
+MONTH_CHARGES = Invoice.total - Invoice.previous_debt + Invoice.previous_credit
+
+
+def period_list(start: Period, end: Period) -> List[Tuple[int, int]]:
+    """Các (năm, tháng) từ start đến end, tính cả hai đầu"""
+    (month, year), (end_month, end_year) = start, end
+    periods = []
+    while (year, month) <= (end_year, end_month):
+        periods.append((year, month))
+        month, year = (1, year + 1) if month == 12 else (month + 1, year)
+    return periods
+
+
+def range_report(db: Session, start: Period, end: Period, location_id: Optional[int] = None) -> RangeReport:
+    """Thu, tỷ lệ thu, chi theo loại và doanh thu từng phòng cho các tháng từ start đến end"""
+    periods = period_list(start, end)
+    index = {period: i for i, period in enumerate(periods)}
+    size = len(periods)
+
+    # Month charges and collection per month
+    income_query = (
+        select(Invoice.year, Invoice.month, func.sum(MONTH_CHARGES), func.sum(Invoice.paid_amount))
+        .where(period_between(Invoice, start, end))
+        .group_by(Invoice.year, Invoice.month)
+    )
+    if location_id:
+        income_query = income_query.join(Room, Room.id == Invoice.room_id).where(Room.location_id == location_id)
+
+    income = [ZERO] * size
+    collected = [ZERO] * size
+    for year, month, month_income, month_collected in db.execute(income_query):
+        income[index[(year, month)]] = month_income or ZERO
+        collected[index[(year, month)]] = month_collected or ZERO
+
+    # Expenses by category, on a half-open date range
+    expense_year = extract("year", Expense.expense_date)
+    expense_month = extract("month", Expense.expense_date)
+    expense_query = (
+        select(expense_year, expense_month, Expense.category, func.sum(Expense.amount))
+        .where(
+            Expense.expense_date >= month_range(*start)[0],
+            Expense.expense_date < month_range(*end)[1],
+        )
+        .group_by(expense_year, expense_month, Expense.category)
+    )
+    if location_id:
+        expense_query = expense_query.where(Expense.location_id == location_id)
+
+    by_category: Dict[str, List[Decimal]] = {category.value: [ZERO] * size for category in ExpenseCategory}
+    expense = [ZERO] * size
+    for year, month, category, amount in db.execute(expense_query):
+        i = index[(int(year), int(month))]
+        category = (category or ExpenseCategory.OTHER).value
+        by_category[category][i] += amount or ZERO
+        expense[i] += amount or ZERO
+
+    # Per-room revenue (same month charges as the income series) and vacancy
+    invoice_join = and_(Invoice.room_id == Room.id, period_between(Invoice, start, end))
+    room_query = (
+        select(
+            Room.id, Room.room_code, Location.name,
+            func.sum(MONTH_CHARGES),
+            func.sum(Invoice.paid_amount),
+            func.count(Invoice.id),
+        )
+        .join(Location, Location.id == Room.location_id)
+        .outerjoin(Invoice, invoice_join)
+        .group_by(Room.id, Room.room_code, Location.name)
+        .order_by(Location.name, Room.room_code)
+    )
+    if location_id:
+        room_query = room_query.where(Room.location_id == location_id)
+
+    rooms = RoomProfitColumns()
+    for room_id, room_code, location_name, revenue, room_collected, invoiced in db.execute(room_query):
+        rooms.room_id.append(room_id)
+        rooms.room_code.append(room_code)
+        rooms.location_name.append(location_name)
+        rooms.revenue.append(revenue or ZERO)
+        rooms.collected.append(room_collected or ZERO)
+        rooms.invoiced_months.append(invoiced)
+        rooms.vacant_months.append(max(size - invoiced, 0))
+
+    return RangeReport(
+        periods=[f"{year}-{month:02d}" for year, month in periods],
+        income=income,
+        collected=collected,
+        pending=[month_income - month_collected for month_income, month_collected in zip(income, collected)],
+        collection_rate=[
+            round(float(month_collected / month_income), 4) if month_income else None
+            for month_income, month_collected in zip(income, collected)
+        ],
+        expense=expense,
+        expense_by_category=by_category,
+        rooms=rooms,
+    )
@@ -0,0 +1,3 @@
+"""
+Benchmarks - Đo hiệu năng, chạy tay (không thuộc bộ test)
+"""
@@ -0,0 +1,141 @@
+"""
+Benchmark: tải đồng thời lên các API đọc nhiều, chế độ đồng bộ so với DB_ASYNC
+
+Khởi động uvicorn hai lần trên cùng một CSDL đã seed (mặc định SQLite tạm,
+dữ liệu từ seed_data.py), mỗi lần bắn --concurrency request song song trong
+--duration giây xoay vòng qua /rooms, /invoices, /dashboard/stats, /meters,
+rồi in số request/giây và độ trễ p50/p99.
+
+    python -m benchmarks.async_load [--concurrency 64] [--duration 10] [--url postgresql://...]
+
+Với --url, CSDL phải đã được migrate và seed sẵn (manage.py migrate, seed_data.py).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from sqlalchemy import create_engine, text
+from app.core.security import create_access_token
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ["/api/v1/rooms", "/api/v1/invoices", "/api/v1/dashboard/stats", "/api/v1/meters"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def prepare(url: str, seed: bool) -> str:
+    """Seed CSDL (nếu cần) và trả về access token của người dùng đầu tiên"""
+    if seed:
+        env = dict(os.environ, DATABASE_URL=url)
+        subprocess.run([sys.executable, "seed_data.py"], cwd=BACKEND_DIR, env=env, check=True, capture_output=True)
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        user_id = conn.execute(text("SELECT min(id) FROM users")).scalar()
+    engine.dispose()
+    if user_id is None:
+        raise SystemExit("No users in database; run seed_data.py first")
+    return create_access_token(data={"sub": str(user_id)})
+
+
+def start_server(url: str, port: int, **overrides: str) -> subprocess.Popen:
+    """uvicorn một worker trên CSDL cho trước, overrides là biến môi trường Settings"""
+    env = dict(os.environ, DATABASE_URL=url, JOB_WORKERS="0", **overrides)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("Server did not start")
+
+
+async def drive(port: int, token: str, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", headers=headers, limits=limits, timeout=60) as client:
+        # Warm-up: one pass over every endpoint
+        for path in PATHS:
+            (await client.get(path)).raise_for_status()
+
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset: int):
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(PATHS[index % len(PATHS)])
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+                index += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--url", default=None, help="Database URL (default: temporary seeded SQLite file)")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'async_load.db')}"
+    token = prepare(url, seed=tmpdir is not None)
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per mode")
+    print(f"{'mode':<6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for async_mode in (False, True):
+        port = free_port()
+        server = start_server(url, port, DB_ASYNC=str(async_mode).lower())
+        try:
+            result = asyncio.run(drive(port, token, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        mode = "async" if async_mode else "sync"
+        print(
+            f"{mode:<6} {result['requests']:>9} {result['errors']:>7} {result['rps']:>8.1f} "
+            f"{result['p50']:>8.1f} {result['p99']:>8.1f}"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: thời gian khởi động nguội của API
+
+Mỗi lần đo chạy một tiến trình Python mới và ghi lại: thời gian import
+app.main, thời gian chạy lifespan (làm ấm pool) và độ trễ của request đầu tiên
+có chạm CSDL (GET /api/v1/rooms). CSDL được migrate trước, ngoài phần đo,
+giống cách triển khai thật (manage.py migrate rồi mới khởi động server).
+
+    python -m benchmarks.cold_start [--runs 5] [--url postgresql://...] [--budget-ms 3000]
+
+Với --budget-ms, lệnh thoát mã 1 nếu trung vị tổng thời gian vượt ngân sách
+(dùng được trong CI).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from sqlalchemy import create_engine, text
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ("import", "startup", "first_request")
+
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    t2 = time.perf_counter()
+    response = client.get("/api/v1/rooms", headers={"Authorization": "Bearer " + sys.argv[1]})
+    t3 = time.perf_counter()
+    assert response.status_code == 200, response.text
+print(json.dumps({"import": t1 - t0, "startup": t2 - t1, "first_request": t3 - t2}))
+"""
+
+
+def prepare(url: str) -> str:
+    """Migrate CSDL, tạo một người dùng và trả về access token"""
+    from app.core.migrations import run_migrations
+    from app.core.security import create_access_token
+
+    run_migrations(url)
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        user_id = conn.execute(text("SELECT id FROM users WHERE email = 'bench@example.com'")).scalar()
+        if user_id is None:
+            conn.execute(text(
+                "INSERT INTO users (email, hashed_password, full_name, is_active) "
+                "VALUES ('bench@example.com', '-', 'Benchmark', :active)"
+            ), {"active": True})
+            user_id = conn.execute(text("SELECT id FROM users WHERE email = 'bench@example.com'")).scalar()
+    engine.dispose()
+    return create_access_token(data={"sub": str(user_id)})
+
+
+def measure(url: str, token: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=url, JOB_WORKERS="0")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, token],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", default=None, help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if median total exceeds this")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'cold_start.db')}"
+
+    token = prepare(url)
+    samples = [measure(url, token) for _ in range(args.runs)]
+
+    print(f"Cold start over {args.runs} runs (median / max, ms)")
+    for phase in PHASES:
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"  {phase:<14} {statistics.median(values):8.1f} / {max(values):8.1f}")
+    totals = [sum(sample.values()) * 1000 for sample in samples]
+    total = statistics.median(totals)
+    print(f"  {'total':<14} {total:8.1f} / {max(totals):8.1f}")
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    if args.budget_ms is not None:
+        if total > args.budget_ms:
+            print(f"FAIL: median cold start {total:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+            return 1
+        print(f"OK: within budget {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
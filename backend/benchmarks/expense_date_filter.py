@@ -0,0 +1,124 @@
+"""
+Benchmark: lọc chi tiêu theo tháng bằng EXTRACT so với khoảng ngày nửa mở
+
+Tạo bảng expenses riêng (mặc định SQLite tạm, ~1 triệu dòng), in kế hoạch
+truy vấn và thời gian của hai cách lọc một tháng của một khu.
+
+    python -m benchmarks.expense_date_filter [--rows 1000000] [--url postgresql://...]
+
+Lưu ý: với --url, bảng locations/expenses của CSDL đó sẽ bị xóa và tạo lại.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, extract, func, select, text
+from app.core.database import Base
+from app.models import Expense, Location
+from app.models.expense import ExpenseCategory
+from app.services.monthly_summary import month_range
+
+LOCATIONS = 20
+YEARS = 5
+BATCH = 20000
+
+
+def seed(engine, rows: int) -> None:
+    tables = [Location.__table__, Expense.__table__]
+    Base.metadata.drop_all(engine, tables=tables)
+    Base.metadata.create_all(engine, tables=tables)
+
+    random.seed(42)
+    start = date(2022, 1, 1)
+    categories = list(ExpenseCategory)
+    with engine.begin() as conn:
+        conn.execute(Location.__table__.insert(), [{"name": f"Khu {i}"} for i in range(1, LOCATIONS + 1)])
+        for offset in range(0, rows, BATCH):
+            conn.execute(Expense.__table__.insert(), [
+                {
+                    "location_id": random.randint(1, LOCATIONS),
+                    "category": random.choice(categories),
+                    "description": "benchmark",
+                    "amount": random.randint(1, 500) * 10000,
+                    "expense_date": start + timedelta(days=random.randrange(365 * YEARS)),
+                }
+                for _ in range(min(BATCH, rows - offset))
+            ])
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("ANALYZE expenses"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN ANALYZE {compiled}"))
+        return "\n".join(row[0] for row in rows)
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+    return "\n".join(row[-1] for row in rows)
+
+
+def timed(conn, stmt, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(stmt).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--url", default=None, help="Database URL (default: temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    url = args.url
+    if url is None:
+        tmp_dir = tempfile.mkdtemp()
+        url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    engine = create_engine(url)
+
+    print(f"Seeding {args.rows:,} expenses into {engine.dialect.name}...")
+    started = time.perf_counter()
+    seed(engine, args.rows)
+    print(f"  done in {time.perf_counter() - started:.1f}s\n")
+
+    month, year, location_id = 6, 2024, 7
+    start, end = month_range(month, year)
+    total = func.sum(Expense.amount)
+    queries = {
+        "extract (before)": select(total).where(
+            Expense.location_id == location_id,
+            extract("month", Expense.expense_date) == month,
+            extract("year", Expense.expense_date) == year,
+        ),
+        "half-open range (after)": select(total).where(
+            Expense.location_id == location_id,
+            Expense.expense_date >= start,
+            Expense.expense_date < end,
+        ),
+    }
+
+    with engine.connect() as conn:
+        results = {name: conn.execute(stmt).scalar() for name, stmt in queries.items()}
+        assert len(set(results.values())) == 1, f"Filters disagree: {results}"
+        for name, stmt in queries.items():
+            print(f"== {name}")
+            print(explain(conn, stmt))
+            print(f"median {timed(conn, stmt, args.repeat):.2f} ms over {args.repeat} runs\n")
+
+    engine.dispose()
+    if tmp_dir:
+        os.remove(os.path.join(tmp_dir, "bench.db"))
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: thông lượng /auth/login khi đăng nhập dồn dập
+
+Khởi động uvicorn trên CSDL đã seed, bắn --concurrency request đăng nhập song
+song trong --duration giây, đồng thời một client thăm dò gọi GET /api/v1/rooms
+liên tục để đo độ trễ của các API khác trong lúc bcrypt đang bận. Chạy lần
+lượt với từng số luồng băm trong --workers.
+
+    python -m benchmarks.login_throughput [--concurrency 32] [--duration 10] [--workers 1,2,4]
+
+Với --url, CSDL phải có tài khoản --email/--password (mặc định của seed_data.py).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import httpx
+from benchmarks.async_load import free_port, prepare, start_server
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)] * 1000 if values else 0.0
+
+
+async def drive(port: int, token: str, email: str, password: str, concurrency: int, duration: float) -> dict:
+    logins = []
+    probes = []
+    statuses = {}
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120) as client:
+        (await client.post("/api/v1/auth/login", json={"email": email, "password": password})).raise_for_status()
+        deadline = time.perf_counter() + duration
+
+        async def login_worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post("/api/v1/auth/login", json={"email": email, "password": password})
+                logins.append(time.perf_counter() - started)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def probe():
+            headers = {"Authorization": f"Bearer {token}"}
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                (await client.get("/api/v1/rooms", headers=headers)).raise_for_status()
+                probes.append(time.perf_counter() - started)
+                await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(login_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        hasher = (await client.get("/health/passwords")).json()
+
+    return {
+        "ok": statuses.get(200, 0),
+        "busy": statuses.get(503, 0),
+        "rps": statuses.get(200, 0) / elapsed,
+        "login_p50": statistics.median(logins) * 1000,
+        "login_p99": percentile(logins, 0.99),
+        "probe_p99": percentile(probes, 0.99),
+        "queue_wait": hasher["avg_wait_ms"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated PASSWORD_HASH_WORKERS values")
+    parser.add_argument("--rounds", type=int, default=None, help="BCRYPT_ROUNDS for the server (default: settings)")
+    parser.add_argument("--url", default=None, help="Database URL (default: temporary seeded SQLite file)")
+    parser.add_argument("--email", default="cominh@gmail.com")
+    parser.add_argument("--password", default="123456")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'login.db')}"
+    token = prepare(url, seed=tmpdir is not None)
+
+    overrides = {"PASSWORD_HASH_QUEUE_LIMIT": str(args.concurrency * 2)}
+    if args.rounds is not None:
+        overrides["BCRYPT_ROUNDS"] = str(args.rounds)
+
+    print(f"{args.concurrency} concurrent logins, {args.duration:.0f}s per run")
+    print(f"{'workers':>7} {'ok':>6} {'503':>5} {'login/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'queue ms':>9} {'rooms p99':>10}")
+    for workers in [int(value) for value in args.workers.split(",")]:
+        port = free_port()
+        server = start_server(url, port, PASSWORD_HASH_WORKERS=str(workers), **overrides)
+        try:
+            result = asyncio.run(drive(port, token, args.email, args.password, args.concurrency, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        print(
+            f"{workers:>7} {result['ok']:>6} {result['busy']:>5} {result['rps']:>8.1f} {result['login_p50']:>8.1f} "
+            f"{result['login_p99']:>8.1f} {result['queue_wait']:>9.1f} {result['probe_p99']:>10.1f}"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: thời gian dựng JSON cho danh sách InvoiceResponse
+
+So sánh đường mặc định của FastAPI (kiểm tra theo response_model, serialize ra
+dict, rồi JSONResponse/json.dumps) với đường FAST_JSON_RESPONSES (TypeAdapter
+kiểm tra rồi ghi thẳng ra bytes), trên --rows đối tượng giống dòng ORM. Nếu có
+orjson thì đo thêm orjson.dumps trên dict đã serialize để tham khảo.
+
+    python -m benchmarks.serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_response_field
+from app.api.pagination import json_list_response, list_adapter
+from app.models.invoice import InvoiceStatus
+from app.schemas.invoice import InvoiceResponse
+
+
+def make_rows(count: int) -> list:
+    """Đối tượng có thuộc tính như Invoice (kèm room), tiền là Decimal như khi đọc từ CSDL"""
+    created_at = datetime(2026, 1, 1, 8, 0, 0)
+    rows = []
+    for i in range(count):
+        electric_fee = Decimal(3500 * (50 + i % 150))
+        water_fee = Decimal(8000 * (3 + i % 10))
+        total = Decimal("2000000") + electric_fee + water_fee + Decimal("80000")
+        rows.append(SimpleNamespace(
+            id=i + 1, room_id=i % 500 + 1, month=i % 12 + 1, year=2026,
+            room_fee=Decimal("2000000"), absent_days=0, absent_deduction=Decimal("0"),
+            electric_fee=electric_fee, water_fee=water_fee, garbage_fee=Decimal("30000"),
+            wifi_fee=Decimal("50000"), tv_fee=Decimal("0"), laundry_fee=Decimal("0"),
+            other_fee=Decimal("0"), other_fee_note=None,
+            previous_debt=Decimal("0"), previous_credit=Decimal("0"), total=total,
+            paid_amount=Decimal("0"), remaining_debt=total, remaining_credit=Decimal("0"),
+            status=InvoiceStatus.UNPAID, payment_date=None, notes=None, created_at=created_at,
+            room=SimpleNamespace(id=i % 500 + 1, room_code=f"P{i % 500 + 1:03d}", location_id=1),
+        ))
+    return rows
+
+
+def fastapi_default(rows: list) -> bytes:
+    """Các bước FastAPI làm với response_model=List[InvoiceResponse]"""
+    field = create_response_field(name="Response_get_invoices", type_=List[InvoiceResponse])
+    value, errors = field.validate(rows, {}, loc=("response",))
+    assert not errors
+    return JSONResponse(field.serialize(value)).body
+
+
+def fast_json(rows: list) -> bytes:
+    return json_list_response(InvoiceResponse, rows).body
+
+
+def orjson_dumps(rows: list) -> bytes:
+    import orjson
+
+    adapter = list_adapter(InvoiceResponse)
+    return orjson.dumps(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json"))
+
+
+def measure(func, rows: list, repeat: int) -> float:
+    func(rows)  # Warm-up (schema build, caches)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    body = fastapi_default(rows)
+    assert fast_json(rows) == body, "fast path must produce the same JSON"
+
+    paths = [("fastapi (before)", fastapi_default), ("fast json (after)", fast_json)]
+    try:
+        import orjson  # noqa: F401
+        paths.append(("orjson", orjson_dumps))
+    except ImportError:
+        pass
+
+    print(f"{args.rows} InvoiceResponse, median of {args.repeat} runs, {len(body) / 1024:.0f} KiB")
+    print(f"{'path':<18} {'ms':>8} {'speedup':>8}")
+    baseline = None
+    for name, func in paths:
+        elapsed = measure(func, rows, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<18} {elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
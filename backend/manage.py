@@ -0,0 +1,79 @@
+"""
+Management commands - Lệnh quản trị chạy từ dòng lệnh
+
+    python manage.py migrate
+    python manage.py rebuild-balances [--room-id ID]
+    python manage.py rebuild-summaries
+    python manage.py prune-tokens
+"""
+import argparse
+from app.core.database import SessionLocal
+
+
+def migrate(args):
+    """Nâng schema CSDL lên bản mới nhất (chạy trước khi khởi động server)"""
+    from app.core.migrations import run_migrations
+
+    run_migrations()
+    print("✅ Database schema is up to date")
+
+
+def rebuild_balances(args):
+    """Dựng lại sổ công nợ từ hóa đơn"""
+    from app.services.ledger import rebuild_balances as rebuild
+
+    db = SessionLocal()
+    try:
+        count = rebuild(db, room_id=args.room_id)
+        print(f"✅ Rebuilt {count} room balance entries")
+    finally:
+        db.close()
+
+
+def rebuild_summaries(args):
+    """Dựng lại bảng tổng hợp tháng từ hóa đơn và chi tiêu"""
+    from app.services.monthly_summary import rebuild_summaries as rebuild
+
+    db = SessionLocal()
+    try:
+        count = rebuild(db)
+        print(f"✅ Rebuilt {count} monthly summary rows")
+    finally:
+        db.close()
+
+
+def prune_tokens(args):
+    """Xóa refresh token đã hết hạn hoặc đã thu hồi"""
+    from app.services.auth_tokens import prune_refresh_tokens
+
+    db = SessionLocal()
+    try:
+        count = prune_refresh_tokens(db)
+        print(f"✅ Removed {count} refresh tokens")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minh Rental management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("migrate", help="Apply database migrations").set_defaults(func=migrate)
+
+    balances = subparsers.add_parser("rebuild-balances", help="Rebuild room_balances from invoices")
+    balances.add_argument("--room-id", type=int, default=None, help="Only rebuild one room")
+    balances.set_defaults(func=rebuild_balances)
+
+    summaries = subparsers.add_parser("rebuild-summaries", help="Rebuild monthly_summary from invoices and expenses")
+    summaries.set_defaults(func=rebuild_summaries)
+
+    subparsers.add_parser(
+        "prune-tokens", help="Delete expired and revoked refresh tokens"
+    ).set_defaults(func=prune_tokens)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
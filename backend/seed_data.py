@@ -4,7 +4,8 @@ Seed data for testing - Dữ liệu mẫu theo cấu trúc file Excel thực t
 from datetime import date, datetime
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal
+from app.core.migrations import run_migrations
 from app.core.security import get_password_hash
 from app.models.user import User
 from app.models.location import Location
@@ -14,12 +15,14 @@ from app.models.tenant import Tenant
 from app.models.meter import Meter, MeterReading, MeterType
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.expense import Expense, ExpenseCategory
+from app.services.ledger import rebuild_balances
+from app.services.monthly_summary import rebuild_summaries
 
 
 def seed_database():
     """Seed database with sample data based on Excel file structure"""
-    # Create tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade tables
+    run_migrations()
     
     db = SessionLocal()
     
@@ -307,6 +310,12 @@ def seed_database():
             db.add(expense)
         
         db.commit()
+        
+        # ============ ROOM BALANCES ============
+        print("Building room balance ledger...")
+        rebuild_balances(db)
+        print("Building monthly summary...")
+        rebuild_summaries(db)
         print("✅ Database seeded successfully!")
         
         # Print summary
@@ -8,7 +8,10 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.core.database import Base, get_db
+from app.core.denylist import token_denylist
+from app.core.jobs import job_runner
 from app.core.security import get_password_hash
+from app.core.user_cache import user_cache
 from app.models.user import User
 
 # Create in-memory SQLite database for testing
@@ -44,6 +47,11 @@ def client(db):
             pass
     
     app.dependency_overrides[get_db] = override_get_db
+    # Run background jobs inline against the test database
+    job_runner.configure(session_factory=TestingSessionLocal, max_workers=0)
+    token_denylist.configure(session_factory=TestingSessionLocal)
+    # User ids restart at 1 for every test database
+    user_cache.clear()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
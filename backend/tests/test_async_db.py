@@ -0,0 +1,118 @@
+"""
+Tests for the async read endpoints (DB_ASYNC)
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.api import dashboard, invoices, meters, rooms
+from app.core.async_database import async_database_url, get_async_db
+from app.core.database import Base, get_db
+from app.core.denylist import token_denylist
+from app.core.jobs import job_runner
+from app.core.security import create_access_token
+from app.core.user_cache import user_cache
+from app.models.user import User
+from tests.test_invoices import create_occupied_room
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+
+@pytest.fixture
+def file_clients(tmp_path):
+    """Sync app and async-only app sharing one SQLite file."""
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SessionFactory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with SessionFactory() as db:
+        user = User(email="async@example.com", hashed_password="-", full_name="Async", is_active=True)
+        db.add(user)
+        db.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+
+    def override_get_db():
+        db = SessionFactory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    AsyncFactory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncFactory() as db:
+            yield db
+
+    async_app = FastAPI()
+    for module in (rooms, invoices, dashboard, meters):
+        async_app.include_router(module.async_router, prefix="/api/v1")
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+
+    app.dependency_overrides[get_db] = override_get_db
+    job_runner.configure(session_factory=SessionFactory, max_workers=0)
+    token_denylist.configure(session_factory=SessionFactory)
+    user_cache.clear()
+    with TestClient(app) as sync_client, TestClient(async_app) as async_client:
+        yield sync_client, async_client, headers
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+def test_async_database_url():
+    """Test that sync URLs map to their async drivers."""
+    assert async_database_url("postgresql://u:p@db/minh") == "postgresql+asyncpg://u:p@db/minh"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+
+def test_async_reads_match_sync(file_clients):
+    """Test that the async read endpoints return the same payloads as the sync ones."""
+    sync_client, async_client, headers = file_clients
+    room = create_occupied_room(sync_client, headers)
+    sync_client.post("/api/v1/invoices/generate", headers=headers, json={"month": 1, "year": 2026})
+    assert len(sync_client.get("/api/v1/invoices", headers=headers).json()) == 1
+
+    paths = [
+        "/api/v1/rooms",
+        f"/api/v1/rooms?location_id={room['location_id']}",
+        "/api/v1/invoices",
+        f"/api/v1/invoices?location_id={room['location_id']}&month=1&year=2026",
+        "/api/v1/invoices?fields=id,total",
+        "/api/v1/dashboard/stats",
+        "/api/v1/meters",
+        f"/api/v1/meters?room_id={room['id']}",
+    ]
+    for path in paths:
+        expected = sync_client.get(path, headers=headers)
+        actual = async_client.get(path, headers=headers)
+        assert expected.status_code == 200, path
+        assert actual.status_code == 200, path
+        assert actual.json() == expected.json(), path
+
+
+def test_async_invoice_cursor(file_clients):
+    """Test keyset pagination on the async invoice list."""
+    sync_client, async_client, headers = file_clients
+    create_occupied_room(sync_client, headers)
+    create_occupied_room(sync_client, headers, location_name="Second", room_code="201")
+    sync_client.post("/api/v1/invoices/generate", headers=headers, json={"month": 1, "year": 2026})
+
+    first = async_client.get("/api/v1/invoices?limit=1", headers=headers)
+    assert len(first.json()) == 1
+    cursor = first.headers["X-Next-Cursor"]
+    second = async_client.get(f"/api/v1/invoices?limit=1&cursor={cursor}", headers=headers)
+    assert len(second.json()) == 1
+    assert second.json()[0]["id"] != first.json()[0]["id"]
+
+
+def test_async_requires_auth(file_clients):
+    """Test that async endpoints reject invalid tokens."""
+    _, async_client, _ = file_clients
+    response = async_client.get("/api/v1/rooms", headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
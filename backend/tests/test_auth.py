@@ -47,3 +47,157 @@ def test_get_me_unauthenticated(client):
     response = client.get("/api/v1/auth/me")
     assert response.status_code == 401
 
+
+
+def test_current_user_is_cached(client, auth_headers):
+    """Test that repeated requests are served from the user cache."""
+    from app.core.user_cache import user_cache
+
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    stats = client.get("/health/cache").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["size"] == 1
+    assert user_cache.get(1) is not None
+
+
+def test_deactivated_user_is_invalidated(client, auth_headers, db, test_user):
+    """Test that deactivating a user drops the cached entry and denies their tokens immediately."""
+    from app.core.user_cache import user_cache
+
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200
+
+    test_user.is_active = False
+    db.commit()
+
+    assert user_cache.get(test_user.id) is None
+    response = client.get("/api/v1/rooms", headers=auth_headers)
+    assert response.status_code == 401
+
+
+def test_user_cache_bounded():
+    """Test LRU eviction and TTL expiry."""
+    import time
+    from datetime import datetime
+    from app.core.user_cache import CurrentUser, UserCache
+
+    cache = UserCache(max_size=2, ttl=60)
+    for user_id in (1, 2, 3):
+        cache.put(CurrentUser(user_id, f"u{user_id}@example.com", "User", True, datetime.now()))
+    assert cache.get(1) is None
+    assert cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
+
+    expiring = UserCache(max_size=2, ttl=0.01)
+    expiring.put(CurrentUser(1, "u1@example.com", "User", True, datetime.now()))
+    time.sleep(0.02)
+    assert expiring.get(1) is None
+
+
+def test_login_rehashes_when_cost_changes(client, db):
+    """Test that a hash made with another bcrypt cost is replaced on login."""
+    from passlib.context import CryptContext
+    from app.core.config import settings
+    from app.models.user import User
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("oldcost")
+    user = User(email="old@example.com", hashed_password=old_hash, full_name="Old Cost", is_active=True)
+    db.add(user)
+    db.commit()
+
+    response = client.post("/api/v1/auth/login", json={"email": "old@example.com", "password": "oldcost"})
+    assert response.status_code == 200
+    db.refresh(user)
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+
+    stats = client.get("/health/passwords").json()
+    assert stats["completed"] >= 1
+    assert stats["queued"] == 0
+
+
+def test_login_busy_when_hash_queue_full(client, test_user, monkeypatch):
+    """Test that logins are rejected with 503 once the hashing queue is full."""
+    from app.core.security import password_hasher
+
+    monkeypatch.setattr(password_hasher, "queue_limit", 0)
+    response = client.post(
+        "/api/v1/auth/login",
+        json={"email": "test@example.com", "password": "testpassword"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def login(client, email="test@example.com", password="testpassword"):
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_login_returns_refresh_token(client, test_user):
+    """Test that login issues a short-lived access token and a stored refresh token."""
+    from app.core.config import settings
+    from app.core.security import decode_access_token, decode_refresh_token
+
+    data = login(client)
+    assert data["expires_in"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    access = decode_access_token(data["access_token"])
+    refresh = decode_refresh_token(data["refresh_token"])
+    assert access["sid"] == refresh["sid"]
+    # Token types are not interchangeable
+    assert decode_access_token(data["refresh_token"]) is None
+
+
+def test_refresh_rotates_token(client, test_user):
+    """Test that a refresh token can be used once and yields a new pair in the same session."""
+    data = login(client)
+
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != data["refresh_token"]
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert client.get("/api/v1/rooms", headers=headers).status_code == 200
+
+
+def test_refresh_token_reuse_revokes_session(client, test_user):
+    """Test that replaying a rotated refresh token revokes the whole session."""
+    data = login(client)
+    rotated = client.post("/api/v1/auth/refresh", json={"refresh_token": data["refresh_token"]}).json()
+
+    replay = client.post("/api/v1/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert replay.status_code == 401
+    # The legitimate holder's newer token is revoked too
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_logout_denies_access_token(client, test_user):
+    """Test that logout revokes the session and its access tokens right away."""
+    data = login(client)
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    assert client.get("/api/v1/rooms", headers=headers).status_code == 200
+
+    response = client.post("/api/v1/auth/logout", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 204
+    assert client.get("/api/v1/rooms", headers=headers).status_code == 401
+    response = client.post("/api/v1/auth/refresh", json={"refresh_token": data["refresh_token"]})
+    assert response.status_code == 401
+
+
+def test_denylist_refresh_loads_revoked_sessions(client, db, test_user):
+    """Test that another process's revocations are picked up on the periodic refresh."""
+    from app.core.denylist import token_denylist
+    from app.core.security import decode_access_token
+    from app.services.auth_tokens import revoke_session
+
+    data = login(client)
+    headers = {"Authorization": f"Bearer {data['access_token']}"}
+    revoke_session(db, decode_access_token(data["access_token"])["sid"])
+    db.commit()
+    assert client.get("/api/v1/rooms", headers=headers).status_code == 200
+
+    assert token_denylist.refresh()
+    assert client.get("/api/v1/rooms", headers=headers).status_code == 401
+    assert client.get("/health/denylist").json()["sessions"] == 1
@@ -0,0 +1,47 @@
+"""
+Tests for response compression
+"""
+import gzip
+import pytest
+from app.core.compression import choose_encoding
+from tests.test_invoices import create_occupied_room
+
+
+def test_choose_encoding():
+    """Test Accept-Encoding negotiation (brotli preferred, q=0 excluded)."""
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_large_json_is_compressed(client, auth_headers, encoding):
+    """Test that list responses above the size threshold are compressed."""
+    for code in range(101, 111):
+        create_occupied_room(client, auth_headers, f"Khu {code}", str(code))
+    response = client.get("/api/v1/rooms", headers={**auth_headers, "Accept-Encoding": encoding})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) < len(response.content)
+    assert len(response.json()) == 10
+
+
+def test_small_responses_are_not_compressed(client):
+    """Test that responses below the threshold are sent as-is."""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streaming_response_is_compressed_per_chunk(client, auth_headers):
+    """Test that streamed JSON is gzip-compressed and still decodes to the whole body."""
+    create_occupied_room(client, auth_headers)
+    with client.stream(
+        "POST", "/api/v1/invoices/generate/preview",
+        headers={**auth_headers, "Accept-Encoding": "gzip"},
+        json={"month": 1, "year": 2026},
+    ) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert '"items"' in gzip.decompress(raw).decode()
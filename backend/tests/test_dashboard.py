@@ -0,0 +1,153 @@
+"""
+Tests for dashboard endpoints
+"""
+from app.services.monthly_summary import rebuild_summaries
+from tests.conftest import TestingSessionLocal
+from tests.test_invoices import create_occupied_room
+
+
+def test_monthly_report(client, auth_headers):
+    """Test report totals and the unpaid invoice list."""
+    create_occupied_room(client, auth_headers)
+    create_occupied_room(client, auth_headers, location_name="Second Location", room_code="201")
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoices = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()
+    paid, partial = sorted(invoices, key=lambda invoice: invoice["id"])
+    client.put(f"/api/v1/invoices/{paid['id']}/pay?amount=2470000", headers=auth_headers)
+    client.put(f"/api/v1/invoices/{partial['id']}/pay?amount=470000", headers=auth_headers)
+    client.post(
+        "/api/v1/expenses",
+        headers=auth_headers,
+        json={"description": "Sửa ống nước", "amount": "100000", "expense_date": "2026-01-15"}
+    )
+
+    report = client.get("/api/v1/dashboard/report?month=1&year=2026", headers=auth_headers).json()
+    assert float(report["total_income"]) == 2 * 2470000
+    assert float(report["total_collected"]) == 2470000 + 470000
+    assert float(report["total_pending"]) == 2000000
+    assert float(report["net_income"]) == 2470000 + 470000 - 100000
+    assert [item["id"] for item in report["unpaid_invoices"]] == [partial["id"]]
+    assert report["unpaid_invoices"][0]["location_name"] == "Second Location"
+    assert float(report["unpaid_invoices"][0]["remaining"]) == 2000000
+
+
+def test_dashboard_stats(client, auth_headers):
+    """Test room and tenant counts on the dashboard."""
+    create_occupied_room(client, auth_headers)
+    stats = client.get("/api/v1/dashboard/stats", headers=auth_headers).json()
+    assert stats["total_rooms"] == 1
+    assert stats["occupied_rooms"] == 1
+    assert stats["vacant_rooms"] == 0
+    assert stats["total_tenants"] == 1
+
+
+def test_report_reads_monthly_summary(client, auth_headers):
+    """Test that the summary follows payments, expense edits and a rebuild."""
+    room = create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/pay?amount=470000", headers=auth_headers)
+    expense = client.post(
+        "/api/v1/expenses",
+        headers=auth_headers,
+        json={"location_id": room["location_id"], "description": "Sơn tường",
+              "amount": "300000", "expense_date": "2026-01-20"}
+    ).json()
+    client.put(f"/api/v1/expenses/{expense['id']}", headers=auth_headers, json={"expense_date": "2026-02-01"})
+
+    report = client.get("/api/v1/dashboard/report?month=1&year=2026", headers=auth_headers).json()
+    assert len(report["locations"]) == 1
+    summary = report["locations"][0]
+    assert summary["location_name"] == "Test Location"
+    assert summary["invoice_count"] == 1
+    assert float(summary["total_collected"]) == 470000
+    assert float(summary["total_expense"]) == 0
+
+    february = client.get("/api/v1/dashboard/report?month=2&year=2026", headers=auth_headers).json()
+    assert float(february["total_expense"]) == 300000
+
+    db = TestingSessionLocal()
+    try:
+        rebuild_summaries(db)
+    finally:
+        db.close()
+    rebuilt = client.get("/api/v1/dashboard/report?month=1&year=2026", headers=auth_headers).json()
+    assert rebuilt["total_income"] == report["total_income"]
+    assert rebuilt["total_collected"] == report["total_collected"]
+
+
+def test_range_report(client, auth_headers):
+    """Test the multi-month report columns."""
+    room = create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/pay?amount=2470000", headers=auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+    client.post(
+        "/api/v1/expenses",
+        headers=auth_headers,
+        json={"location_id": room["location_id"], "category": "repair", "description": "Sửa khóa",
+              "amount": "150000", "expense_date": "2026-02-28"}
+    )
+
+    response = client.get(
+        "/api/v1/dashboard/range?from_month=12&from_year=2025&to_month=2&to_year=2026",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["periods"] == ["2025-12", "2026-01", "2026-02"]
+    assert [float(value) for value in data["income"]] == [0, 2470000, 2080000]
+    assert data["collection_rate"] == [None, 1.0, 0.0]
+    assert [float(value) for value in data["expense_by_category"]["repair"]] == [0, 0, 150000]
+    assert data["rooms"]["room_code"] == ["101"]
+    assert [float(value) for value in data["rooms"]["revenue"]] == [2470000 + 2080000]
+    assert data["rooms"]["invoiced_months"] == [2]
+    assert data["rooms"]["vacant_months"] == [1]
+
+
+def test_range_report_excludes_carried_debt(client, auth_headers):
+    """Test that unpaid debt carried into later invoices is counted once, as in room revenue."""
+    create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+    february = client.get("/api/v1/invoices?month=2&year=2026", headers=auth_headers).json()[0]
+    assert float(february["previous_debt"]) == 2470000
+
+    data = client.get(
+        "/api/v1/dashboard/range?from_month=1&from_year=2026&to_month=2&to_year=2026",
+        headers=auth_headers
+    ).json()
+    assert [float(value) for value in data["income"]] == [2470000, 2080000]
+    assert [float(value) for value in data["pending"]] == [2470000, 2080000]
+    assert sum(float(value) for value in data["income"]) == float(data["rooms"]["revenue"][0])
+
+
+def test_range_report_rejects_reversed_range(client, auth_headers):
+    """Test that an empty or reversed range and an out-of-range year are rejected."""
+    response = client.get(
+        "/api/v1/dashboard/range?from_month=3&from_year=2026&to_month=1&to_year=2026",
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/v1/dashboard/range?from_month=1&from_year=-5&to_month=1&to_year=2026",
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+def test_dashboard_conditional_get(client, auth_headers):
+    """Test that the dashboard ETag changes when an invoice is paid."""
+    create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    path = "/api/v1/dashboard/report?month=1&year=2026"
+    etag = client.get(path, headers=auth_headers).headers["ETag"]
+    assert client.get(path, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    invoice = client.get("/api/v1/invoices", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/pay", headers=auth_headers)
+    response = client.get(path, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["unpaid_invoices"] == []
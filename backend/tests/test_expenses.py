@@ -0,0 +1,110 @@
+"""
+Tests for expense endpoints
+"""
+import pytest
+
+
+@pytest.fixture
+def expenses(client, auth_headers):
+    """Create five expenses in January 2026."""
+    created = []
+    for day in range(1, 6):
+        response = client.post(
+            "/api/v1/expenses",
+            headers=auth_headers,
+            json={
+                "category": "repair",
+                "description": f"Sửa chữa {day}",
+                "amount": str(100000 * day),
+                "expense_date": f"2026-01-0{day}"
+            }
+        )
+        created.append(response.json())
+    return created
+
+
+def test_get_expenses(client, auth_headers, expenses):
+    """Test listing all expenses, newest first."""
+    response = client.get("/api/v1/expenses", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["expense_date"] for item in data][:2] == ["2026-01-05", "2026-01-04"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_expenses_keyset_pagination(client, auth_headers, expenses):
+    """Test walking the expense list page by page with the next cursor."""
+    seen = []
+    url = "/api/v1/expenses?limit=2"
+    while True:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(item["id"] for item in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        url = f"/api/v1/expenses?limit=2&cursor={cursor}"
+    assert sorted(seen) == sorted(item["id"] for item in expenses)
+    assert len(seen) == len(set(seen))
+
+
+def test_get_expenses_field_projection(client, auth_headers, expenses):
+    """Test selecting only some fields of the expense list."""
+    response = client.get("/api/v1/expenses?fields=id,amount&limit=3", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 3
+    assert set(data[0]) == {"id", "amount"}
+    assert response.headers.get("X-Next-Cursor")
+
+
+def test_get_expenses_invalid_field(client, auth_headers, expenses):
+    """Test that unknown projection fields are rejected."""
+    response = client.get("/api/v1/expenses?fields=id,password", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_get_expenses_invalid_cursor(client, auth_headers):
+    """Test that a malformed cursor is rejected."""
+    response = client.get("/api/v1/expenses?cursor=not-a-cursor", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_get_expenses_month_filter(client, auth_headers, expenses):
+    """Test that month filters include the whole month and nothing after it."""
+    client.post(
+        "/api/v1/expenses",
+        headers=auth_headers,
+        json={"description": "Đầu tháng 2", "amount": "50000", "expense_date": "2026-02-01"}
+    )
+    january = client.get("/api/v1/expenses?month=1&year=2026", headers=auth_headers).json()
+    assert len(january) == 5
+    assert len(client.get("/api/v1/expenses?year=2026", headers=auth_headers).json()) == 6
+    assert client.get("/api/v1/expenses?year=2025", headers=auth_headers).json() == []
+
+
+def test_get_expense_summary(client, auth_headers, expenses):
+    """Test expense totals grouped by month and category."""
+    client.post(
+        "/api/v1/expenses",
+        headers=auth_headers,
+        json={"category": "utility", "description": "Điện chung", "amount": "200000", "expense_date": "2026-02-10"}
+    )
+    response = client.get(
+        "/api/v1/expenses/summary?date_from=2026-01-01&date_to=2026-03-01",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [(row["month"], row["category"], row["count"]) for row in data] == [
+        (1, "repair", 5), (2, "utility", 1)
+    ]
+    assert float(data[0]["total"]) == 1500000
+
+    response = client.get(
+        "/api/v1/expenses/summary?date_from=2026-03-01&date_to=2026-01-01",
+        headers=auth_headers
+    )
+    assert response.status_code == 400
@@ -17,3 +17,11 @@ def test_health_check(client):
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
+
+
+def test_database_health(client):
+    """Test pool status endpoint."""
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    data = response.json()
+    assert {"pool", "checkouts", "timeouts", "avg_wait_ms", "max_wait_ms"} <= set(data)
@@ -0,0 +1,315 @@
+"""
+Tests for invoice endpoints
+"""
+import pytest
+from app.models.room_balance import RoomBalance
+from tests.conftest import TestingSessionLocal
+
+
+def create_occupied_room(client, auth_headers, location_name="Test Location", room_code="101"):
+    """Create a location with one occupied room and meter readings for 1/2026."""
+    location = client.post(
+        "/api/v1/locations",
+        headers=auth_headers,
+        json={
+            "name": location_name,
+            "electric_price": "3500",
+            "water_price": "8000",
+            "garbage_fee": "30000",
+            "wifi_fee": "50000"
+        }
+    ).json()
+    room_type = client.post(
+        "/api/v1/room-types",
+        headers=auth_headers,
+        json={"location_id": location["id"], "code": "A", "price": "2000000", "daily_deduction": "60000"}
+    ).json()
+    room = client.post(
+        "/api/v1/rooms",
+        headers=auth_headers,
+        json={"location_id": location["id"], "room_type_id": room_type["id"], "room_code": room_code}
+    ).json()
+    client.post(
+        "/api/v1/tenants",
+        headers=auth_headers,
+        json={"room_id": room["id"], "full_name": "Nguyễn Văn An", "move_in_date": "2025-01-01"}
+    )
+    client.post(
+        "/api/v1/meters/readings/batch",
+        headers=auth_headers,
+        json={
+            "month": 1,
+            "year": 2026,
+            "readings": [
+                {"room_id": room["id"], "meter_type": "electric", "old_reading": "100", "new_reading": "200"},
+                {"room_id": room["id"], "meter_type": "water", "old_reading": "10", "new_reading": "15"}
+            ]
+        }
+    )
+    return room
+
+
+@pytest.fixture
+def occupied_room(client, auth_headers):
+    return create_occupied_room(client, auth_headers)
+
+
+def test_generate_invoices(client, auth_headers, occupied_room):
+    """Test generating monthly invoices from meter readings."""
+    response = client.post(
+        "/api/v1/invoices/generate",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert data["created"] == ["101"]
+    assert data["skipped"] == []
+
+    invoices = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()
+    assert len(invoices) == 1
+    invoice = invoices[0]
+    assert float(invoice["electric_fee"]) == 350000
+    assert float(invoice["water_fee"]) == 40000
+    assert float(invoice["total"]) == 2000000 + 350000 + 40000 + 30000 + 50000
+    assert invoice["status"] == "unpaid"
+
+
+def test_generate_invoices_skips_existing(client, auth_headers, occupied_room):
+    """Test that rooms with an invoice for the month are skipped."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    response = client.post(
+        "/api/v1/invoices/generate",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    assert response.status_code == 201
+    assert response.json()["created"] == []
+    assert response.json()["skipped"] == ["101"]
+
+
+def test_generate_invoices_carries_previous_debt(client, auth_headers, occupied_room):
+    """Test that the previous month's remaining debt is carried forward."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/pay?amount=2000000", headers=auth_headers)
+
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+    february = client.get("/api/v1/invoices?month=2&year=2026", headers=auth_headers).json()[0]
+    assert float(february["previous_debt"]) == 470000
+    assert float(february["electric_fee"]) == 0
+
+
+def test_generate_invoices_per_location(client, auth_headers, occupied_room):
+    """Test that generating without a location reports results for each location."""
+    create_occupied_room(client, auth_headers, location_name="Second Location", room_code="201")
+
+    response = client.post(
+        "/api/v1/invoices/generate",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    assert response.status_code == 201
+    data = response.json()
+    assert sorted(data["created"]) == ["101", "201"]
+    assert len(data["locations"]) == 2
+    for location in data["locations"]:
+        assert location["error"] is None
+        assert len(location["created"]) == 1
+        assert location["elapsed_ms"] >= 0
+
+
+def test_preview_invoices_does_not_write(client, auth_headers, occupied_room):
+    """Test that the preview returns fee breakdowns without creating invoices."""
+    response = client.post(
+        "/api/v1/invoices/generate/preview",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["room_code"] for item in data["items"]] == ["101"]
+    assert float(data["items"][0]["electric_fee"]) == 350000
+    assert data["totals"]["count"] == 1
+    assert float(data["totals"]["total"]) == 2470000
+    assert data["skipped"] == []
+
+    invoices = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()
+    assert invoices == []
+
+
+def test_preview_invoices_diff(client, auth_headers, occupied_room):
+    """Test that the preview diff compares existing invoices with a recalculation."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}", headers=auth_headers, json={"wifi_fee": "0"})
+
+    response = client.post(
+        "/api/v1/invoices/generate/preview?diff=true",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    data = response.json()
+    assert data["items"] == []
+    assert data["skipped"] == ["101"]
+    assert data["diffs"][0]["invoice_id"] == invoice["id"]
+    assert float(data["diffs"][0]["difference"]) == 50000
+
+
+def test_preview_diff_keeps_manual_fees(client, auth_headers, occupied_room):
+    """Test that absent days and other fees on an existing invoice are not reported as differences."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/absent?absent_days=2", headers=auth_headers)
+    client.put(f"/api/v1/invoices/{invoice['id']}", headers=auth_headers, json={"other_fee": "20000"})
+
+    data = client.post(
+        "/api/v1/invoices/generate/preview?diff=true",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    ).json()
+    diff = data["diffs"][0]
+    assert diff["absent_days"] == 2
+    assert float(diff["absent_deduction"]) == 120000
+    assert float(diff["current_total"]) == 2470000 - 120000 + 20000
+    assert float(diff["difference"]) == 0
+
+
+def test_invoice_edits_update_status(client, auth_headers, occupied_room):
+    """Test that editing fees or absent days recomputes the remaining amounts and status."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/invoices/{invoice['id']}/pay?amount=2470000", headers=auth_headers)
+
+    data = client.put(f"/api/v1/invoices/{invoice['id']}", headers=auth_headers, json={"other_fee": "10000"}).json()
+    assert data["status"] == "partial"
+    assert float(data["remaining_debt"]) == 10000
+
+    data = client.put(f"/api/v1/invoices/{invoice['id']}/absent?absent_days=1", headers=auth_headers).json()
+    assert data["status"] == "paid"
+    assert float(data["remaining_credit"]) == 50000
+
+
+def test_retroactive_edit_cascades_to_later_months(client, auth_headers, occupied_room):
+    """Test that editing an old invoice updates carried debt on later invoices."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 3, "year": 2026})
+    january = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+    march = client.get("/api/v1/invoices?month=3&year=2026", headers=auth_headers).json()[0]
+
+    # Unpaid balances are carried month to month
+    assert float(march["previous_debt"]) == 2470000 + 2080000
+
+    client.put(f"/api/v1/invoices/{january['id']}/pay?amount=470000", headers=auth_headers)
+
+    march = client.get("/api/v1/invoices?month=3&year=2026", headers=auth_headers).json()[0]
+    assert float(march["previous_debt"]) == 2000000 + 2080000
+    assert float(march["total"]) == 2000000 + 2080000 + 2080000
+
+    balance = client.get(
+        f"/api/v1/rooms/{occupied_room['id']}/balance?month=3&year=2026",
+        headers=auth_headers
+    ).json()
+    assert float(balance["closing_balance"]) == float(march["total"])
+
+
+def test_edit_invoice_without_ledger_row(client, auth_headers, occupied_room):
+    """Test that editing an invoice created before the ledger only carries the change forward."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+    db = TestingSessionLocal()
+    try:
+        db.query(RoomBalance).delete()
+        db.commit()
+    finally:
+        db.close()
+    january = client.get("/api/v1/invoices?month=1&year=2026", headers=auth_headers).json()[0]
+
+    client.put(f"/api/v1/invoices/{january['id']}", headers=auth_headers, json={"other_fee": "10000"})
+    february = client.get("/api/v1/invoices?month=2&year=2026", headers=auth_headers).json()[0]
+    assert float(february["previous_debt"]) == 2470000 + 10000
+
+    client.put(f"/api/v1/invoices/{january['id']}/pay?amount=480000", headers=auth_headers)
+    february = client.get("/api/v1/invoices?month=2&year=2026", headers=auth_headers).json()[0]
+    assert float(february["previous_debt"]) == 2000000
+    balance = client.get(
+        f"/api/v1/rooms/{occupied_room['id']}/balance?month=1&year=2026",
+        headers=auth_headers
+    ).json()
+    assert float(balance["closing_balance"]) == 2000000
+
+
+def test_get_invoices_projection(client, auth_headers, occupied_room):
+    """Test listing invoices with only a few fields."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    response = client.get("/api/v1/invoices?fields=id,room_id,total,status", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert set(data[0]) == {"id", "room_id", "total", "status"}
+    assert data[0]["status"] == "unpaid"
+
+
+def test_export_invoices_csv(client, auth_headers, occupied_room):
+    """Test exporting invoices as CSV with the list filters."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    response = client.get("/api/v1/invoices/export?month=1&year=2026", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="hoa_don_2026_01.csv"' in response.headers["content-disposition"]
+
+    lines = response.content.decode("utf-8-sig").splitlines()
+    assert lines[0].startswith("Mã HĐ,Khu trọ,Phòng,Tháng,Năm")
+    assert len(lines) == 2
+    assert ",Test Location,101,1,2026," in lines[1]
+    assert lines[1].endswith(",unpaid,")
+
+    empty = client.get("/api/v1/invoices/export?month=2&year=2026", headers=auth_headers)
+    assert len(empty.content.decode("utf-8-sig").splitlines()) == 1
+
+
+def test_export_invoices_xlsx(client, auth_headers, occupied_room):
+    """Test exporting invoices as an Excel workbook."""
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    response = client.get("/api/v1/invoices/export?format=xlsx", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/vnd.openxmlformats")
+    assert response.content[:2] == b"PK"
+
+
+def test_invoice_money_encoding(client, auth_headers, occupied_room):
+    """Test that money is always encoded as a whole-dong string."""
+    from decimal import Decimal
+    from app.schemas.money import format_money
+
+    assert format_money(Decimal("52500.00")) == "52500"
+    assert format_money(Decimal("1.5E+6")) == "1500000"
+    assert format_money(Decimal("52500.5")) == "52501"
+    assert format_money(Decimal("52502.5")) == "52503"
+
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    invoice = client.get("/api/v1/invoices", headers=auth_headers).json()[0]
+    assert invoice["total"] == "2470000"
+    assert invoice["electric_fee"] == "350000"
+
+    projected = client.get("/api/v1/invoices?fields=id,total", headers=auth_headers).json()[0]
+    assert projected["total"] == "2470000"
+
+
+@pytest.mark.parametrize("path", ["/api/v1/invoices?limit=1", "/api/v1/meters/readings?limit=1"])
+def test_fast_json_responses_match_default(client, auth_headers, occupied_room, monkeypatch, path):
+    """Test that the direct JSON path returns the same body and cursor as FastAPI's encoder."""
+    from app.core.config import settings
+
+    create_occupied_room(client, auth_headers, "Second Location", "201")
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    default = client.get(path, headers=auth_headers)
+
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get(path, headers=auth_headers)
+
+    assert fast.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == default.json()
+    assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
@@ -0,0 +1,181 @@
+"""
+Tests for background job endpoints
+"""
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from app.core.config import settings
+from app.core.jobs import JOB_HANDLERS, job_runner
+from app.models.job import Job, JobStatus
+from app.models.meter import MeterType
+from tests.conftest import TestingSessionLocal
+from tests.test_invoices import create_occupied_room
+
+
+def test_generate_invoices_in_background(client, auth_headers):
+    """Test submitting invoice generation as a background job."""
+    response = client.post(
+        "/api/v1/invoices/generate?background=true",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    response = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["job_type"] == "generate_invoices"
+    assert data["status"] == "succeeded"
+    assert data["result"]["created"] == []
+
+
+def test_import_readings_in_background_reports_errors(client, auth_headers):
+    """Test that a batch import job stores per-item errors in its result."""
+    response = client.post(
+        "/api/v1/meters/readings/batch?background=true",
+        headers=auth_headers,
+        json={
+            "month": 1,
+            "year": 2026,
+            "readings": [{"room_id": 999, "meter_type": "electric", "old_reading": "1", "new_reading": "2"}]
+        }
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    data = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()
+    assert data["status"] == "succeeded"
+    assert len(data["result"]["errors"]) == 1
+    assert data["progress_done"] == 1
+
+
+def test_import_readings_in_background_reports_mismatches(client, auth_headers):
+    """Test that old-reading mismatches are stored in the job result."""
+    room = create_occupied_room(client, auth_headers)
+    job_id = client.post(
+        "/api/v1/meters/readings/batch?background=true",
+        headers=auth_headers,
+        json={
+            "month": 2,
+            "year": 2026,
+            "readings": [{"room_id": room["id"], "meter_type": "water", "old_reading": "14", "new_reading": "20"}]
+        }
+    ).json()["job_id"]
+
+    data = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()
+    assert data["status"] == "succeeded"
+    mismatch = data["result"]["mismatches"][0]
+    assert mismatch["meter_type"] == "water"
+    assert float(mismatch["old_reading"]) == 14
+    assert float(mismatch["previous_reading"]) == 15
+
+
+def test_job_events_stream(client, auth_headers):
+    """Test streaming job progress as server-sent events."""
+    job_id = client.post(
+        "/api/v1/invoices/generate?background=true",
+        headers=auth_headers,
+        json={"month": 1, "year": 2026}
+    ).json()["job_id"]
+
+    response = client.get(f"/api/v1/jobs/{job_id}/events", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.text.startswith("data: ")
+    assert '"status":"succeeded"' in response.text
+
+
+def test_get_job_not_found(client, auth_headers):
+    """Test getting a job that does not exist."""
+    response = client.get("/api/v1/jobs/999", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def add_job(job_status, worker_id=None, heartbeat_age=None):
+    db = TestingSessionLocal()
+    try:
+        heartbeat_at = None
+        if heartbeat_age is not None:
+            heartbeat_at = datetime.now(timezone.utc) - timedelta(seconds=heartbeat_age)
+        job = Job(
+            job_type="generate_invoices", params={}, status=job_status,
+            worker_id=worker_id, heartbeat_at=heartbeat_at,
+        )
+        db.add(job)
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+
+def test_recover_stale_jobs(client, auth_headers):
+    """Test that unfinished jobs whose worker is gone are marked as failed."""
+    pending_id = add_job(JobStatus.PENDING)
+    running_id = add_job(JobStatus.RUNNING, worker_id="old:1:dead", heartbeat_age=settings.JOB_STALE_SECONDS + 60)
+    sibling_id = add_job(JobStatus.RUNNING, worker_id="other:2:alive", heartbeat_age=5)
+    own_id = add_job(JobStatus.RUNNING, worker_id=job_runner.worker_id, heartbeat_age=settings.JOB_STALE_SECONDS + 60)
+    done_id = add_job(JobStatus.SUCCEEDED)
+
+    assert job_runner.recover_stale() == 2
+    for job_id in (pending_id, running_id):
+        data = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()
+        assert data["status"] == "failed"
+        assert data["error"]
+        assert data["finished_at"] is not None
+    for job_id in (sibling_id, own_id):
+        assert client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()["status"] == "running"
+    assert client.get(f"/api/v1/jobs/{done_id}", headers=auth_headers).json()["status"] == "succeeded"
+
+
+def test_heartbeat_keeps_own_jobs_alive(client):
+    """Test that the heartbeat refreshes only this worker's unfinished jobs."""
+    own_id = add_job(JobStatus.RUNNING, worker_id=job_runner.worker_id, heartbeat_age=3600)
+    other_id = add_job(JobStatus.RUNNING, worker_id="other:2:alive", heartbeat_age=3600)
+
+    job_runner.heartbeat()
+    db = TestingSessionLocal()
+    try:
+        own, other = (db.get(Job, job_id) for job_id in (own_id, other_id))
+        assert own.heartbeat_at.replace(tzinfo=None) > other.heartbeat_at.replace(tzinfo=None)
+    finally:
+        db.close()
+
+
+def test_job_events_stream_is_bounded(client, auth_headers, monkeypatch):
+    """Test that the event stream of a job that never finishes ends after the time limit."""
+    job_id = add_job(JobStatus.RUNNING)
+    monkeypatch.setattr(settings, "JOB_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(settings, "JOB_EVENTS_MAX_SECONDS", 0.05)
+
+    response = client.get(f"/api/v1/jobs/{job_id}/events", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.text.count("data: ") == 1
+    assert '"status":"running"' in response.text
+
+
+def run_job(handler, monkeypatch):
+    monkeypatch.setitem(JOB_HANDLERS, "test_job", handler)
+    db = TestingSessionLocal()
+    try:
+        return job_runner.submit(db, "test_job", {})
+    finally:
+        db.close()
+
+
+def test_job_result_is_json_encoded(client, monkeypatch):
+    """Test that Decimal and enum values in a handler result are stored as JSON."""
+    job = run_job(lambda db, params, progress: {"amount": Decimal("1500000"), "meter_type": MeterType.WATER}, monkeypatch)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.result == {"amount": "1500000", "meter_type": "water"}
+
+
+def test_job_fails_when_its_writes_cannot_be_saved(client, monkeypatch):
+    """Test that a failing final commit marks the job as failed instead of leaving it running."""
+    def handler(db, params, progress):
+        db.add(Job(job_type=None))  # job_type is NOT NULL: the commit fails
+        return {}
+
+    job = run_job(handler, monkeypatch)
+    assert job.status == JobStatus.FAILED
+    assert job.error
+    assert job.finished_at is not None
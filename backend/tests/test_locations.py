@@ -3,6 +3,8 @@ Tests for location endpoints
 """
 import pytest
 
+from tests.test_invoices import create_occupied_room
+
 
 def test_create_location(client, auth_headers):
     """Test creating a new location."""
@@ -86,6 +88,24 @@ def test_delete_location(client, auth_headers):
     assert response.status_code == 204
 
 
+def test_location_room_counts(client, auth_headers):
+    """Test total and occupied room counts on the location list and detail."""
+    room = create_occupied_room(client, auth_headers)
+    client.post(
+        "/api/v1/rooms",
+        headers=auth_headers,
+        json={"location_id": room["location_id"], "room_code": "102"}
+    )
+    client.post("/api/v1/locations", headers=auth_headers, json={"name": "Empty Location"})
+
+    locations = client.get("/api/v1/locations", headers=auth_headers).json()
+    counts = {loc["name"]: (loc["room_count"], loc["occupied_count"]) for loc in locations}
+    assert counts == {"Test Location": (2, 1), "Empty Location": (0, 0)}
+
+    detail = client.get(f"/api/v1/locations/{room['location_id']}", headers=auth_headers).json()
+    assert (detail["room_count"], detail["occupied_count"]) == (2, 1)
+
+
 def test_locations_unauthenticated(client):
     """Test accessing locations without authentication."""
     response = client.get("/api/v1/locations")
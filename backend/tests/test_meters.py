@@ -0,0 +1,173 @@
+"""
+Tests for meter endpoints
+"""
+from tests.test_invoices import create_occupied_room
+
+
+def test_update_reading_recalculates_invoices(client, auth_headers):
+    """Test that editing a reading updates its invoice and later carried debt."""
+    room = create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 2, "year": 2026})
+
+    reading = client.get(
+        f"/api/v1/meters/readings?month=1&year=2026&room_id={room['id']}&meter_type=electric",
+        headers=auth_headers
+    ).json()[0]
+    response = client.put(
+        f"/api/v1/meters/readings/{reading['id']}",
+        headers=auth_headers,
+        json={"new_reading": "150"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert float(data["consumption"]) == 50
+    assert len(data["recalculated"]) == 1
+    change = data["recalculated"][0]
+    assert float(change["electric_fee"]) == 175000
+    assert float(change["old_total"]) - float(change["new_total"]) == 175000
+    assert change["later_invoices_updated"] == 1
+
+    february = client.get("/api/v1/invoices?month=2&year=2026", headers=auth_headers).json()[0]
+    assert float(february["previous_debt"]) == 2470000 - 175000
+
+
+def test_update_reading_without_invoice(client, auth_headers):
+    """Test that editing a reading with no invoice reports nothing recalculated."""
+    room = create_occupied_room(client, auth_headers)
+    reading = client.get(
+        f"/api/v1/meters/readings?room_id={room['id']}&meter_type=water",
+        headers=auth_headers
+    ).json()[0]
+    response = client.put(
+        f"/api/v1/meters/readings/{reading['id']}",
+        headers=auth_headers,
+        json={"new_reading": "20"}
+    )
+    assert response.status_code == 200
+    assert response.json()["recalculated"] == []
+
+
+def test_export_readings_csv(client, auth_headers):
+    """Test exporting meter readings as CSV."""
+    create_occupied_room(client, auth_headers)
+    response = client.get("/api/v1/meters/readings/export?meter_type=electric", headers=auth_headers)
+    assert response.status_code == 200
+    lines = response.content.decode("utf-8-sig").splitlines()
+    assert lines[0] == "Phòng,Loại,Tháng,Năm,Chỉ số cũ,Chỉ số mới,Tiêu thụ"
+    assert lines[1] == "101,electric,1,2026,100.00,200.00,100.00"
+    assert len(lines) == 2
+
+
+def test_readings_batch_upserts_and_reports_errors(client, auth_headers):
+    """Test that a batch updates existing readings in place and reports unknown meters."""
+    room = create_occupied_room(client, auth_headers)
+    first = client.get("/api/v1/meters/readings?month=1&year=2026", headers=auth_headers).json()
+
+    response = client.post(
+        "/api/v1/meters/readings/batch",
+        headers=auth_headers,
+        json={
+            "month": 1,
+            "year": 2026,
+            "readings": [
+                {"room_id": room["id"], "meter_type": "electric", "old_reading": "100", "new_reading": "250"},
+                {"room_id": 9999, "meter_type": "water", "old_reading": "0", "new_reading": "1"}
+            ]
+        }
+    )
+    assert response.status_code == 201
+    data = response.json()
+    electric = next(reading for reading in first if float(reading["new_reading"]) == 200)
+    assert data["created_ids"] == [electric["id"]]
+    assert data["errors"] == ["Không tìm thấy đồng hồ cho phòng 9999"]
+
+    readings = client.get("/api/v1/meters/readings?month=1&year=2026", headers=auth_headers).json()
+    assert len(readings) == 2
+    updated = next(reading for reading in readings if reading["id"] == electric["id"])
+    assert float(updated["consumption"]) == 150
+
+
+def test_readings_batch_prefills_old_reading(client, auth_headers):
+    """Test that an omitted old reading is taken from the previous month and mismatches are flagged."""
+    room = create_occupied_room(client, auth_headers)
+
+    response = client.post(
+        "/api/v1/meters/readings/batch",
+        headers=auth_headers,
+        json={
+            "month": 2,
+            "year": 2026,
+            "readings": [
+                {"room_id": room["id"], "meter_type": "electric", "new_reading": "260"},
+                {"room_id": room["id"], "meter_type": "water", "old_reading": "14", "new_reading": "20"}
+            ]
+        }
+    )
+    data = response.json()
+    assert data["errors"] == []
+    assert len(data["mismatches"]) == 1
+    assert data["mismatches"][0]["meter_type"] == "water"
+    assert float(data["mismatches"][0]["previous_reading"]) == 15
+
+    readings = client.get("/api/v1/meters/readings?month=2&year=2026", headers=auth_headers).json()
+    electric = next(reading for reading in readings if float(reading["new_reading"]) == 260)
+    assert float(electric["old_reading"]) == 200
+    assert float(electric["consumption"]) == 60
+
+
+def test_create_reading_requires_old_reading_without_history(client, auth_headers):
+    """Test that the first reading of a meter must include the old reading."""
+    room = create_occupied_room(client, auth_headers)
+    meter = client.get(f"/api/v1/meters?room_id={room['id']}&meter_type=electric", headers=auth_headers).json()[0]
+
+    response = client.post(
+        "/api/v1/meters/readings",
+        headers=auth_headers,
+        json={"meter_id": meter["id"], "month": 12, "year": 2025, "new_reading": "100"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/meters/readings",
+        headers=auth_headers,
+        json={"meter_id": meter["id"], "month": 2, "year": 2026, "new_reading": "230"}
+    )
+    assert response.status_code == 201
+    assert float(response.json()["old_reading"]) == 200
+    assert response.json()["mismatch"] is None
+
+
+def test_get_meters_latest_reading(client, auth_headers):
+    """Test that each meter reports the new reading of its latest period."""
+    room = create_occupied_room(client, auth_headers)
+    client.post(
+        "/api/v1/meters/readings/batch",
+        headers=auth_headers,
+        json={"month": 2, "year": 2026, "readings": [
+            {"room_id": room["id"], "meter_type": "electric", "new_reading": "260"}
+        ]}
+    )
+
+    meters = client.get(f"/api/v1/meters?room_id={room['id']}", headers=auth_headers).json()
+    latest = {meter["meter_type"]: float(meter["latest_reading"]) for meter in meters}
+    assert latest == {"electric": 260, "water": 15}
+
+
+def test_duplicate_reading_rejected_by_unique_key(client, auth_headers):
+    """Test that a second reading for the same meter and month is rejected."""
+    room = create_occupied_room(client, auth_headers)
+    meter = client.get(f"/api/v1/meters?room_id={room['id']}&meter_type=water", headers=auth_headers).json()[0]
+    response = client.post(
+        "/api/v1/meters/readings",
+        headers=auth_headers,
+        json={"meter_id": meter["id"], "month": 1, "year": 2026, "old_reading": "10", "new_reading": "20"}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/meters",
+        headers=auth_headers,
+        json={"room_id": room["id"], "meter_type": "water"}
+    )
+    assert response.status_code == 400
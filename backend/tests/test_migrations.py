@@ -0,0 +1,105 @@
+"""
+Tests for the Alembic migration history
+"""
+import os
+import subprocess
+import sys
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.core.database import Base
+from app.core.migrations import BACKEND_DIR, alembic_config, run_migrations
+
+
+def test_migrations_match_models(tmp_path):
+    """Test that upgrading to head yields the schema declared by the models, and downgrades cleanly."""
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = alembic_config(url, configure_logger=False)
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+    command.downgrade(config, "base")
+    with engine.connect() as conn:
+        tables = set(engine.dialect.get_table_names(conn)) - {"alembic_version"}
+    assert tables == set()
+    engine.dispose()
+
+
+def test_run_migrations_adopts_create_all_schema(tmp_path):
+    """Test that a database created by the old create_all startup is stamped and upgraded, not recreated."""
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    run_migrations(url, configure_logger=False)
+
+    with engine.connect() as conn:
+        assert MigrationContext.configure(conn).get_current_revision() is not None
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+    engine.dispose()
+
+
+def test_duplicate_readings_stop_upgrade(tmp_path):
+    """Test that duplicated meter readings stop the upgrade with a readable error."""
+    url = f"sqlite:///{tmp_path / 'duplicates.db'}"
+    config = alembic_config(url, configure_logger=False)
+    command.upgrade(config, "0001_baseline")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        for _ in range(2):
+            conn.execute(text(
+                "INSERT INTO meter_readings (meter_id, month, year, old_reading, new_reading) "
+                "VALUES (1, 1, 2026, 0, 10)"
+            ))
+
+    with pytest.raises(RuntimeError, match="meter_readings"):
+        command.upgrade(config, "head")
+    engine.dispose()
+
+
+def test_upgrade_backfills_room_balances(tmp_path):
+    """Test that invoices created before the ledger get their balance rows on upgrade."""
+    url = f"sqlite:///{tmp_path / 'backfill.db'}"
+    config = alembic_config(url, configure_logger=False)
+    command.upgrade(config, "0001_baseline")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO invoices (room_id, month, year, room_fee, previous_debt, previous_credit, total, paid_amount) "
+            "VALUES (1, 1, 2026, 2000000, 0, 0, 2000000, 500000), (1, 2, 2026, 2000000, 1500000, 0, 3500000, 0)"
+        ))
+
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT month, opening_balance, charges, payments, closing_balance "
+            "FROM room_balances ORDER BY year, month"
+        )).all()
+    assert [tuple(int(value) for value in row) for row in rows] == [
+        (1, 0, 2000000, 500000, 1500000),
+        (2, 1500000, 2000000, 0, 3500000),
+    ]
+    engine.dispose()
+
+
+def test_importing_app_does_not_touch_schema(tmp_path):
+    """Test that importing and starting the app creates no tables (schema belongs to manage.py migrate)."""
+    db_path = tmp_path / "untouched.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", JOB_WORKERS="0")
+    subprocess.run(
+        [sys.executable, "-c",
+         "from fastapi.testclient import TestClient\n"
+         "from app.main import app\n"
+         "with TestClient(app) as client:\n"
+         "    assert client.get('/health').status_code == 200\n"],
+        cwd=BACKEND_DIR, env=env, check=True,
+    )
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    assert inspect(engine).get_table_names() == []
+    engine.dispose()
@@ -0,0 +1,92 @@
+"""
+Tests for room endpoints
+"""
+from tests.test_invoices import create_occupied_room
+
+
+def test_duplicate_room_code_rejected(client, auth_headers):
+    """Test that room codes are unique within a location, on create and on rename."""
+    room = create_occupied_room(client, auth_headers)
+    response = client.post(
+        "/api/v1/rooms",
+        headers=auth_headers,
+        json={"location_id": room["location_id"], "room_code": "101"}
+    )
+    assert response.status_code == 400
+
+    other = client.post(
+        "/api/v1/rooms",
+        headers=auth_headers,
+        json={"location_id": room["location_id"], "room_code": "102"}
+    )
+    assert other.status_code == 201
+    meters = client.get(f"/api/v1/meters?room_id={other.json()['id']}", headers=auth_headers).json()
+    assert sorted(meter["meter_type"] for meter in meters) == ["electric", "water"]
+
+    response = client.put(
+        f"/api/v1/rooms/{other.json()['id']}",
+        headers=auth_headers,
+        json={"room_code": "101"}
+    )
+    assert response.status_code == 400
+
+
+def test_rooms_conditional_get(client, auth_headers):
+    """Test that an unchanged room list answers If-None-Match with 304."""
+    room = create_occupied_room(client, auth_headers)
+    response = client.get("/api/v1/rooms", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    cached = client.get("/api/v1/rooms", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    # Filters are part of the tag
+    filtered = client.get("/api/v1/rooms?status=vacant", headers={**auth_headers, "If-None-Match": etag})
+    assert filtered.status_code == 200
+
+    # Updating a related table changes the tag
+    client.put(f"/api/v1/locations/{room['location_id']}", headers=auth_headers, json={"wifi_fee": "60000"})
+    response = client.get("/api/v1/rooms", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_conditional_get_sees_deletes(client, auth_headers):
+    """Test that deleting a row changes the tag even though max(updated_at) does not move."""
+    location = client.post("/api/v1/locations", headers=auth_headers, json={"name": "Khu A"}).json()
+    client.post("/api/v1/locations", headers=auth_headers, json={"name": "Khu B"})
+    etag = client.get("/api/v1/locations", headers=auth_headers).headers["ETag"]
+
+    client.delete(f"/api/v1/locations/{location['id']}", headers=auth_headers)
+    response = client.get("/api/v1/locations", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Khu B"]
+
+
+def test_conditional_get_requires_auth(client):
+    """Test that the ETag check does not bypass authentication."""
+    response = client.get("/api/v1/room-types", headers={"If-None-Match": "*"})
+    assert response.status_code in (401, 403)
+
+
+def test_delete_room_refreshes_dashboard(client, auth_headers):
+    """Test that deleting a room drops its invoices and the room from the summaries."""
+    room = create_occupied_room(client, auth_headers)
+    client.post("/api/v1/invoices/generate", headers=auth_headers, json={"month": 1, "year": 2026})
+    report = client.get("/api/v1/dashboard/report?month=1&year=2026", headers=auth_headers).json()
+    assert float(report["total_income"]) == 2470000
+
+    tenant = client.get(f"/api/v1/tenants?room_id={room['id']}", headers=auth_headers).json()[0]
+    client.put(f"/api/v1/tenants/{tenant['id']}/move-out", headers=auth_headers)
+    assert client.get("/api/v1/dashboard/stats", headers=auth_headers).json()["total_rooms"] == 1
+    response = client.delete(f"/api/v1/rooms/{room['id']}", headers=auth_headers)
+    assert response.status_code == 204
+
+    report = client.get("/api/v1/dashboard/report?month=1&year=2026", headers=auth_headers).json()
+    assert float(report["total_income"]) == 0
+    assert float(report["total_pending"]) == 0
+    assert client.get("/api/v1/dashboard/stats", headers=auth_headers).json()["total_rooms"] == 0
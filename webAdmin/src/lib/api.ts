@@ -21,14 +21,53 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
-// Handle auth errors
+const clearSession = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+  localStorage.removeItem('user');
+};
+
+// Access tokens are short-lived: concurrent 401s share a single refresh call
+let refreshing: Promise<string> | null = null;
+
+const refreshAccessToken = (): Promise<string> => {
+  if (!refreshing) {
+    const refresh_token = localStorage.getItem('refresh_token');
+    refreshing = (refresh_token
+      ? axios.post(`${API_BASE_URL}/auth/refresh`, { refresh_token }).then((res) => {
+          localStorage.setItem('token', res.data.access_token);
+          localStorage.setItem('refresh_token', res.data.refresh_token);
+          return res.data.access_token as string;
+        })
+      : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+};
+
+// Endpoints where a 401 means bad credentials or a dead session, never an expired access token
+const NO_REFRESH_URLS = ['/auth/login', '/auth/refresh', '/auth/logout'];
+
+// Handle auth errors: refresh once, then send the user to login
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
-    if (error.response?.status === 401) {
-      if (typeof window !== 'undefined') {
-        localStorage.removeItem('token');
-        localStorage.removeItem('user');
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && typeof window !== 'undefined') {
+      if (original && !original._retry && !NO_REFRESH_URLS.includes(original.url ?? '')) {
+        original._retry = true;
+        try {
+          const token = await refreshAccessToken();
+          original.headers.Authorization = `Bearer ${token}`;
+          return api(original);
+        } catch {
+          // fall through to login
+        }
+      }
+      if (!original?.url?.startsWith('/auth/login')) {
+        clearSession();
         window.location.href = '/login';
       }
     }
@@ -41,6 +80,8 @@ export const authAPI = {
   login: (email: string, password: string) =>
     api.post('/auth/login', { email, password }),
   getMe: () => api.get('/auth/me'),
+  logout: (refresh_token: string) =>
+    api.post('/auth/logout', { refresh_token }),
 };
 
 // Dashboard